@@ -1,15 +1,69 @@
-"""Command line entry point for running the FastAPI server locally."""
-import uvicorn
+"""Command line entry point: run the API server, an offline bulk job, or a benchmark tool."""
+import argparse
+import sys
+from importlib import import_module
 
 
-def main() -> None:
+def _serve(args: argparse.Namespace) -> int:
+    import uvicorn
+
     uvicorn.run(
         "idcard_ocr.api.app:app",
-        host="0.0.0.0",
-        port=8080,
-        reload=True,
+        host=args.host,
+        port=args.port,
+        reload=args.reload,
     )
+    return 0
+
+
+# Subcommand -> (module with add_arguments() and main(), help). A module is imported only when its
+# subcommand runs: several of them load numpy, and `prefork` must size the OpenMP/BLAS thread pools
+# before that happens.
+_SUBCOMMANDS = {
+    "prefork": (
+        "idcard_ocr.prefork",
+        "run the production server: load models once, then fork workers that share them",
+    ),
+    "batch": ("idcard_ocr.bulk", "recognize card pairs offline into a resumable JSONL file"),
+    "bench": ("idcard_ocr.bench.runner", "load-test the app in-process against a simulated engine"),
+    "replay": ("idcard_ocr.bench.replay", "re-parse a captured OCR corpus and report field diffs"),
+    "compare-backends": (
+        "idcard_ocr.bench.compare",
+        "compare OCR backends' latency and output parity on the same images",
+    ),
+}
+
+
+def _build_parser(command: str | None = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m idcard_ocr", description="ID card OCR service")
+    subcommands = parser.add_subparsers(dest="command")
+
+    serve = subcommands.add_parser("serve", help="run the FastAPI server locally (default)")
+    serve.add_argument("--host", default="0.0.0.0")
+    serve.add_argument("--port", type=int, default=8080)
+    serve.add_argument("--reload", action=argparse.BooleanOptionalAction, default=True)
+    serve.set_defaults(handler=_serve)
+
+    for name, (module_name, help_text) in _SUBCOMMANDS.items():
+        subparser = subcommands.add_parser(name, help=help_text)
+        if name == command:
+            module = import_module(module_name)
+            module.add_arguments(subparser)
+            subparser.set_defaults(handler=module.main)
+    return parser
+
+
+_COMMANDS = {"serve", *_SUBCOMMANDS}
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or (argv[0] not in _COMMANDS and argv[0] not in {"-h", "--help"}):
+        # Bare `python -m idcard_ocr [--port ...]` keeps starting the dev server.
+        argv.insert(0, "serve")
+    args = _build_parser(argv[0]).parse_args(argv)
+    return args.handler(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,19 +1,145 @@
 """FastAPI application entry point for the ID card OCR service."""
 from __future__ import annotations
 
-from dataclasses import asdict
+import asyncio
+import json
+import tempfile
+import time
+import zipfile
+from contextlib import asynccontextmanager
+from dataclasses import fields
+from typing import Any, AsyncIterator, BinaryIO
 
-from fastapi import FastAPI, File, HTTPException, UploadFile, status
+from fastapi import FastAPI, File, Form, Header, HTTPException, Request, Response, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from idcard_ocr.inference.engine import PaddleOCRNotAvailable
-from idcard_ocr.inference.service import analyze_id_card
-from idcard_ocr.schemas.idcard import ErrorResponseSchema, IdCardResponseSchema
+from idcard_ocr.api.batch import (
+    BatchArchiveError,
+    BatchItem,
+    close_archive,
+    close_spooled_item,
+    items_from_archive,
+    ndjson_line,
+    open_archive,
+    read_archive_item,
+    read_spooled_item,
+)
+from idcard_ocr.api.jobs import JobQueueFull, JobStore, get_job_runner, get_job_store, valid_callback_url
+from idcard_ocr.api.serialize import encode_payload, negotiate_media_type, result_payload
+
+from idcard_ocr.inference.admission import get_memory_budget, request_cost
+from idcard_ocr.inference.backends import BackendNotAvailable
+from idcard_ocr.inference.cache import get_result_cache
+from idcard_ocr.inference.cascade import cascade_enabled, get_cascade
+from idcard_ocr.inference.corpus import get_corpus_writer
+from idcard_ocr.inference.engine import get_accurate_engine_pool, get_engine_pool, get_recognition_batcher
+from idcard_ocr.inference.executor import ExecutorSaturated, get_executor
+from idcard_ocr.inference.parser import BACK_FIELDS, FRONT_FIELDS
+from idcard_ocr.inference.roi import get_roi_reader
+from idcard_ocr.inference.service import analyze_combined_id_card, analyze_id_card, requested_fields
+from idcard_ocr.inference.sides import CardSplitError
+from idcard_ocr.inference.warmup import get_warmup_state, start_warmup
+from idcard_ocr.schemas.idcard import ErrorResponseSchema, IdCardResponseSchema, JobSchema, JobSubmittedSchema
+from idcard_ocr.utils.config import env_int
+from idcard_ocr.utils.image import ImageDecodingError, read_image_size, sniff_image_format
+from idcard_ocr.utils.metrics import (
+    FIELD_CONFIDENCE,
+    IMAGE_BYTES,
+    IMAGE_PIXELS,
+    REGISTRY,
+    REQUESTS_TOTAL,
+    Gauge,
+    metrics_enabled,
+    record_stage,
+    stage_timer,
+    start_request_timings,
+)
 
 MAX_UPLOAD_SIZE = 8 * 1024 * 1024  # 8MB per image
-ALLOWED_CONTENT_TYPES = {"image/jpeg", "image/png", "image/jpg"}
+MAX_IMAGE_PIXELS = env_int("IDCARD_OCR_MAX_IMAGE_PIXELS", 50_000_000, minimum=1)
+ALLOWED_IMAGE_FORMATS = {"JPEG", "PNG"}
+MAX_BATCH_ITEMS = env_int("IDCARD_OCR_BATCH_MAX_ITEMS", 100, minimum=1)
+_UPLOAD_CHUNK_SIZE = 64 * 1024
+# Room for multipart boundaries, part headers and the small form fields.
+_FORM_OVERHEAD = 1024 * 1024
+_BATCH_PATH = "/api/v1/idcard/parse-batch"
+_BATCH_SATURATION_RETRIES = 3
+
+_RUNTIME_STATS = REGISTRY.register(
+    Gauge("idcard_ocr_runtime", "Numeric /stats values, refreshed on scrape.", ["component", "stat"])
+)
+
+
+@asynccontextmanager
+async def _lifespan(_: FastAPI) -> AsyncIterator[None]:
+    # Warm-up runs in the background so liveness and readiness probes are answered meanwhile.
+    start_warmup()
+    runner = get_job_runner()
+    if runner is not None:
+        runner.start()
+    try:
+        yield
+    finally:
+        if runner is not None:
+            runner.stop()
+
+
+class _BodyTooLarge(HTTPException):
+    def __init__(self, limit: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"request body exceeds {limit // (1024 * 1024)}MB limit",
+        )
+
+
+class RequestBodyLimit:
+    """Reject request bodies larger than any valid upload before the form parser spools them.
+
+    The per-file checks only run once FastAPI has parsed the whole form
+    into temporary files, so on their own they let a client push an
+    arbitrarily large body to disk. A declared ``Content-Length`` over the
+    limit is answered with 413 without reading anything; otherwise the
+    received bytes are counted and reading stops with 413 at the limit.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    @staticmethod
+    def limit_for(path: str) -> int:
+        if path == _BATCH_PATH:
+            return MAX_UPLOAD_SIZE * 2 * MAX_BATCH_ITEMS + _FORM_OVERHEAD
+        return MAX_UPLOAD_SIZE * 2 + _FORM_OVERHEAD
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        limit = self.limit_for(scope["path"])
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            error = _BodyTooLarge(limit)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI re-raises HTTPException from body parsing, so this becomes the response.
+                    raise _BodyTooLarge(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
 
-app = FastAPI(title="ID Card OCR Service", version="0.1.0")
+app = FastAPI(title="ID Card OCR Service", version="0.1.0", lifespan=_lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,6 +148,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestBodyLimit)
+
+
+if metrics_enabled():
+
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next: Any) -> Response:
+        """Count requests per route and attach per-stage durations as ``Server-Timing``."""
+
+        timings = start_request_timings()
+        started = time.perf_counter()
+        response = await call_next(request)
+        # Streaming responses send headers before the body, so this is time to first byte.
+        record_stage("total", time.perf_counter() - started)
+        route = request.scope.get("route")
+        REQUESTS_TOTAL.inc(route=getattr(route, "path", "unmatched"), outcome=_outcome(response.status_code))
+        if timings is not None:
+            response.headers["Server-Timing"] = timings.server_timing()
+        return response
+
+
+def _outcome(status_code: int) -> str:
+    if status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+        return "rejected"
+    if status_code >= 500:
+        return "error"
+    if status_code >= 400:
+        return "client_error"
+    return "ok"
 
 
 @app.get("/health", tags=["health"], response_model=dict[str, str])
@@ -31,53 +186,566 @@ def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get(
+    "/ready",
+    tags=["health"],
+    response_model=dict[str, Any],
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"description": "模型加载或预热尚未完成"}},
+)
+def readiness_check(response: Response) -> dict[str, Any]:
+    """Readiness probe: 503 until the engines are loaded and warmed up, with load and warm-up durations."""
+
+    payload = get_warmup_state().snapshot()
+    if payload["status"] != "ready":
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    pool = get_engine_pool().stats()
+    payload["engines"] = {"size": pool["size"], "built": pool["built"]}
+    return payload
+
+
+@app.get("/stats", tags=["health"], response_model=dict[str, Any])
+def runtime_stats() -> dict[str, Any]:
+    """Expose inference queue depth, engine usage, and wait times for capacity planning."""
+
+    batcher = get_recognition_batcher()
+    cache = get_result_cache()
+    writer = get_corpus_writer()
+    jobs = get_job_store()
+    budget = get_memory_budget()
+    return {
+        "executor": get_executor().stats(),
+        "admission": budget.stats() if budget is not None else None,
+        "engine_pool": get_engine_pool().stats(),
+        "recognition_batcher": batcher.stats() if batcher is not None else None,
+        "result_cache": cache.stats() if cache is not None else None,
+        "roi_fast_path": get_roi_reader().stats(),
+        "cascade": (
+            {**get_cascade().stats(), "engine_pool": get_accurate_engine_pool().stats()}
+            if cascade_enabled()
+            else None
+        ),
+        "capture": writer.stats() if writer is not None else None,
+        "jobs": {**jobs.stats(), **get_job_runner().stats()} if jobs is not None else None,
+    }
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    """Expose stage latencies, request counts, and /stats values in the Prometheus text format."""
+
+    for component, values in runtime_stats().items():
+        for stat, value in _numeric_items(values):
+            _RUNTIME_STATS.set(value, component=component, stat=stat)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+def _numeric_items(values: Any, prefix: str = "") -> list[tuple[str, float]]:
+    if isinstance(values, (int, float)):  # bool included
+        return [(prefix, float(values))]
+    if isinstance(values, dict):
+        items: list[tuple[str, float]] = []
+        for key, value in values.items():
+            items.extend(_numeric_items(value, f"{prefix}.{key}" if prefix else str(key)))
+        return items
+    return []
+
+
+@app.delete("/cache", tags=["health"], response_model=dict[str, int])
+def purge_result_cache() -> dict[str, int]:
+    """Drop every cached OCR result, e.g. after a model rollout."""
+
+    cache = get_result_cache()
+    return {"purged": cache.purge() if cache is not None else 0}
+
+
 @app.post(
     "/api/v1/idcard/parse",
+    # Documents the body; the handler encodes it itself (see ``api.serialize``).
     response_model=IdCardResponseSchema,
     responses={
         status.HTTP_400_BAD_REQUEST: {"model": ErrorResponseSchema},
         status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": ErrorResponseSchema},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ErrorResponseSchema},
     },
     tags=["idcard"],
 )
 async def parse_id_card(
-    front_image: UploadFile = File(..., description="身份证正面照片"),
-    back_image: UploadFile = File(..., description="身份证反面照片"),
-) -> IdCardResponseSchema:
-    """Handle multipart uploads, invoke OCR, and return structured fields."""
+    front_image: UploadFile | None = File(None, description="身份证正面照片（所请求字段都在反面时可省略）"),
+    back_image: UploadFile | None = File(None, description="身份证反面照片（所请求字段都在正面时可省略）"),
+    capture: bool = Form(
+        False, description="将脱敏后的原始识别结果写入回放语料库（需配置 IDCARD_OCR_CAPTURE_PATH，不能与 fields 同时使用）"
+    ),
+    fields: str | None = Form(
+        None,
+        description="逗号分隔的字段名（如 name,id_number），只识别并返回这些字段，缺省为全部字段",
+    ),
+    image: UploadFile | None = File(
+        None, description="同时拍有正反两面的单张照片，自动切分并判断正反面；与 front_image/back_image 二选一"
+    ),
+    raw_text: bool = Form(True, description="是否返回 raw_text（OCR 原始文本），关闭可明显减小响应体"),
+    accept: str | None = Header(None, include_in_schema=False),
+) -> Response:
+    """Handle multipart uploads, invoke OCR, and return structured fields.
 
-    front_bytes = await _read_validated_file(front_image, "front_image")
-    back_bytes = await _read_validated_file(back_image, "back_image")
+    With ``fields`` only the sides holding those fields are OCRed. A single
+    ``image`` showing both sides is split into its two cards instead. The
+    body is JSON, or MessagePack when ``Accept`` prefers it.
+    """
+
+    selected = _select_fields(fields, capture)
+    image_bytes, front_bytes, back_bytes = await _read_card_uploads(front_image, back_image, image, selected)
+    if image_bytes is not None:
+        # Both halves are decoded again after the split, so the photo is counted twice.
+        images, call = (image_bytes, image_bytes), (analyze_combined_id_card, image_bytes)
+    else:
+        images, call = (front_bytes, back_bytes), (analyze_id_card, front_bytes, back_bytes)
 
     try:
-        result, front_lines, back_lines = analyze_id_card(front_bytes, back_bytes)
-    except PaddleOCRNotAvailable as exc:  # pragma: no cover - initialization failure
+        result, front_lines, back_lines = await _run_admitted(images, *call, capture=capture, fields=selected)
+    except CardSplitError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    except ExecutorSaturated as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    except BackendNotAvailable as exc:  # pragma: no cover - initialization failure
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
 
+    _observe_field_confidence(result)
+    with stage_timer("serialize"):
+        media_type = negotiate_media_type(accept)
+        payload = result_payload(result, front_lines, back_lines, selected=selected, raw_text=raw_text)
+        body = encode_payload(payload, media_type)
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
+
+
+def _select_fields(fields: str | None, capture: bool) -> frozenset[str] | None:
+    try:
+        return requested_fields(fields.split(",") if fields is not None else None, capture)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+
+
+async def _read_card_uploads(
+    front_image: UploadFile | None,
+    back_image: UploadFile | None,
+    image: UploadFile | None,
+    selected: frozenset[str] | None,
+) -> tuple[bytes | None, bytes | None, bytes | None]:
+    """Read and validate either a combined ``image`` or the front/back pair."""
+
+    if image is not None:
+        if front_image is not None or back_image is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="send either image or front_image/back_image, not both",
+            )
+        return await _read_validated_file(image, "image"), None, None
+    front_bytes = await _read_requested_file(front_image, "front_image", selected, FRONT_FIELDS)
+    back_bytes = await _read_requested_file(back_image, "back_image", selected, BACK_FIELDS)
+    return None, front_bytes, back_bytes
+
+
+async def _read_requested_file(
+    upload: UploadFile | None,
+    field_name: str,
+    selected: frozenset[str] | None,
+    side_fields: tuple[str, ...],
+) -> bytes | None:
+    """Read ``upload``; it may only be missing when no requested field is on its side.
+
+    An image that is not needed is still read, since side detection may
+    find that it holds the needed side after all.
+    """
+
+    if upload is None:
+        if selected is not None and selected.isdisjoint(side_fields):
+            return None
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{field_name} is required")
+    return await _read_validated_file(upload, field_name)
+
+
+@app.post(
+    "/api/v1/idcard/jobs",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=JobSubmittedSchema,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {"model": ErrorResponseSchema},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ErrorResponseSchema},
+    },
+    tags=["idcard"],
+)
+async def submit_id_card_job(
+    response: Response,
+    front_image: UploadFile | None = File(None, description="身份证正面照片（所请求字段都在反面时可省略）"),
+    back_image: UploadFile | None = File(None, description="身份证反面照片（所请求字段都在正面时可省略）"),
+    capture: bool = Form(
+        False, description="将脱敏后的原始识别结果写入回放语料库（需配置 IDCARD_OCR_CAPTURE_PATH，不能与 fields 同时使用）"
+    ),
+    fields: str | None = Form(None, description="逗号分隔的字段名，只识别并返回这些字段，缺省为全部字段"),
+    image: UploadFile | None = File(None, description="同时拍有正反两面的单张照片；与 front_image/back_image 二选一"),
+    raw_text: bool = Form(True, description="结果中是否包含 raw_text（OCR 原始文本）"),
+    callback_url: str | None = Form(None, description="任务完成后以 POST 通知的 http(s) 地址，请求体为任务 ID 与状态"),
+) -> dict[str, str]:
+    """Queue a recognition job and return its ID at once; poll ``GET .../jobs/{id}`` for the result.
+
+    Takes the same uploads and options as ``/parse``. Needs
+    ``IDCARD_OCR_JOB_DB``; answers 503 without it or when the queue is full.
+    """
+
+    store = _require_job_store()
+    if callback_url is not None and not valid_callback_url(callback_url, get_job_runner().callback_hosts):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="callback_url must be an http(s) URL on a host listed in IDCARD_OCR_JOB_CALLBACK_HOSTS",
+        )
+    selected = _select_fields(fields, capture)
+    image_bytes, front_bytes, back_bytes = await _read_card_uploads(front_image, back_image, image, selected)
+    options = {"capture": capture, "fields": sorted(selected) if selected else None, "raw_text": raw_text}
+    try:
+        job = store.submit(
+            front=front_bytes, back=back_bytes, image=image_bytes, options=options, callback_url=callback_url
+        )
+    except JobQueueFull as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": str(get_executor().retry_after)},
+        ) from exc
+    get_job_runner().notify()
+    response.headers["Location"] = f"/api/v1/idcard/jobs/{job.id}"
+    return {"id": job.id, "status": job.status}
+
+
+@app.get(
+    "/api/v1/idcard/jobs/{job_id}",
+    # Documents the body; the stored result is passed through without re-validation.
+    response_model=JobSchema,
+    responses={
+        status.HTTP_404_NOT_FOUND: {"model": ErrorResponseSchema},
+        status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ErrorResponseSchema},
+    },
+    tags=["idcard"],
+)
+def get_id_card_job(job_id: str, accept: str | None = Header(None, include_in_schema=False)) -> Response:
+    """Return a job's status, and its result once done; 404 once the result has expired."""
+
+    job = _require_job_store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="job not found or expired")
     payload = {
-        "front": asdict(result.front),
-        "back": asdict(result.back),
-        "raw_text": {
-            "front": "\n".join(front_lines),
-            "back": "\n".join(back_lines),
-        },
+        "id": job.id,
+        "status": job.status,
+        "created_at": _timestamp(job.created_at),
+        "finished_at": _timestamp(job.finished_at),
+        "expires_at": _timestamp(job.expires_at),
+        "result": json.loads(job.result) if job.result is not None else None,
+        "error": job.error,
     }
-    return IdCardResponseSchema.model_validate(payload)
+    media_type = negotiate_media_type(accept)
+    body = encode_payload(payload, media_type)
+    return Response(content=body, media_type=media_type, headers={"Vary": "Accept"})
+
+
+def _require_job_store() -> JobStore:
+    store = get_job_store()
+    if store is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="jobs are disabled (IDCARD_OCR_JOB_DB is not set)",
+        )
+    return store
+
+
+def _timestamp(value: float | None) -> str | None:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value)) if value is not None else None
+
+
+@app.post(
+    "/api/v1/idcard/parse-batch",
+    response_class=StreamingResponse,
+    responses={
+        status.HTTP_200_OK: {
+            "content": {"application/x-ndjson": {}},
+            "description": "每张证件一行 JSON，按完成顺序返回",
+        },
+        status.HTTP_400_BAD_REQUEST: {"model": ErrorResponseSchema},
+    },
+    tags=["idcard"],
+)
+async def parse_id_card_batch(
+    front_images: list[UploadFile] = File(None, description="身份证正面照片列表，与 back_images 一一对应"),
+    back_images: list[UploadFile] = File(None, description="身份证反面照片列表"),
+    ids: list[str] = Form(None, description="客户端自定义 ID，与图片顺序一致，缺省为序号"),
+    archive: UploadFile | None = File(None, description="zip 包，内含 <id>/front.jpg 与 <id>/back.jpg"),
+    raw_text: bool = Form(True, description="是否在每张证件的结果中返回 raw_text（OCR 原始文本）"),
+) -> StreamingResponse:
+    """Recognize many card pairs concurrently and stream one NDJSON line per card as it completes."""
+
+    items, opened = await _collect_batch_items(front_images or [], back_images or [], ids or [], archive)
+    return StreamingResponse(_stream_batch(items, raw_text, opened), media_type="application/x-ndjson")
+
+
+async def _collect_batch_items(
+    front_images: list[UploadFile],
+    back_images: list[UploadFile],
+    ids: list[str],
+    archive: UploadFile | None,
+) -> tuple[list[BatchItem], zipfile.ZipFile | None]:
+    """Return the batch's card pairs and, for an archive upload, the open archive they are read from."""
+
+    if archive is not None and (front_images or back_images):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="send either an archive or image lists, not both"
+        )
+    if archive is not None:
+        return await _open_batch_archive(archive)
+    if len(front_images) != len(back_images):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="front_images and back_images must have the same length",
+        )
+    if ids and len(ids) != len(front_images):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="ids must match the number of image pairs"
+        )
+    if len(front_images) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"at most {MAX_BATCH_ITEMS} cards per batch"
+        )
+    if not front_images:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="batch contains no card pairs")
+    items: list[BatchItem] = []
+    try:
+        for index, (front, back) in enumerate(zip(front_images, back_images)):
+            item = BatchItem(id=ids[index] if ids else str(index))
+            items.append(item)
+            # FastAPI closes the uploads when this handler returns, before the response streams, so each
+            # pair is copied to files of its own and read only when it is processed.
+            try:
+                item.front_file = await _spool_upload(front, "front_image", MAX_UPLOAD_SIZE)
+                item.back_file = await _spool_upload(back, "back_image", MAX_UPLOAD_SIZE)
+            except HTTPException as exc:
+                close_spooled_item(item)
+                item.error = exc.detail
+    except BaseException:
+        for item in items:
+            close_spooled_item(item)
+        raise
+    return items, None
+
+
+async def _open_batch_archive(upload: UploadFile) -> tuple[list[BatchItem], zipfile.ZipFile]:
+    """Index the card pairs of an archive upload; entries are decompressed as each pair is processed."""
+
+    spool = await _spool_upload(upload, "archive", MAX_UPLOAD_SIZE * 2 * MAX_BATCH_ITEMS)
+    archive = None
+    try:
+        archive = open_archive(spool)
+        items = items_from_archive(archive, max_items=MAX_BATCH_ITEMS, max_entry_size=MAX_UPLOAD_SIZE)
+        if not items:
+            raise BatchArchiveError("batch contains no card pairs")
+    except BatchArchiveError as exc:
+        if archive is None:
+            spool.close()
+        else:
+            close_archive(archive)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return items, archive
+
+
+async def _load_archive_item(archive: zipfile.ZipFile, item: BatchItem) -> None:
+    """Decompress and validate one archive pair, recording any problem as the item's error."""
+
+    try:
+        await asyncio.to_thread(read_archive_item, archive, item)
+        _validate_image_bytes(item.front, "front_image")
+        _validate_image_bytes(item.back, "back_image")
+    except BatchArchiveError as exc:
+        item.error = str(exc)
+    except HTTPException as exc:
+        item.error = exc.detail
+
+
+async def _load_spooled_item(item: BatchItem) -> None:
+    """Read and validate one spooled pair, recording any problem as the item's error."""
+
+    try:
+        await asyncio.to_thread(read_spooled_item, item)
+        _validate_image_bytes(item.front, "front_image")
+        _validate_image_bytes(item.back, "back_image")
+    except HTTPException as exc:
+        item.error = exc.detail
+
+
+async def _process_batch_item(
+    item: BatchItem,
+    limiter: asyncio.Semaphore,
+    raw_text: bool = True,
+    archive: zipfile.ZipFile | None = None,
+) -> dict[str, Any]:
+    if item.error is not None:
+        return {"id": item.id, "status": "error", "error": item.error}
+    async with limiter:
+        # Pairs are read here, so only the ones holding the limiter are in memory.
+        try:
+            if archive is not None:
+                await _load_archive_item(archive, item)
+            elif item.front_file is not None:
+                await _load_spooled_item(item)
+            if item.error is not None:
+                return {"id": item.id, "status": "error", "error": item.error}
+            return await _recognize_batch_item(item, raw_text)
+        finally:
+            item.front = item.back = None
+
+
+async def _recognize_batch_item(item: BatchItem, raw_text: bool) -> dict[str, Any]:
+    for attempt in range(_BATCH_SATURATION_RETRIES + 1):
+        try:
+            images = (item.front, item.back)
+            result, front_lines, back_lines = await _run_admitted(images, analyze_id_card, *images)
+            break
+        except ExecutorSaturated as exc:
+            # Batches wait for capacity instead of failing items under load.
+            if attempt == _BATCH_SATURATION_RETRIES:
+                return {"id": item.id, "status": "error", "error": str(exc)}
+            await asyncio.sleep(exc.retry_after)
+        except Exception as exc:  # noqa: BLE001 - reported per item
+            return {"id": item.id, "status": "error", "error": str(exc) or type(exc).__name__}
+    _observe_field_confidence(result)
+    payload = result_payload(result, front_lines, back_lines, raw_text=raw_text)
+    return {"id": item.id, "status": "ok", "result": payload}
+
+
+async def _stream_batch(
+    items: list[BatchItem], raw_text: bool = True, archive: zipfile.ZipFile | None = None
+) -> AsyncIterator[bytes]:
+    # Keep at most one executor's worth of this batch queued so single-card requests still get in.
+    limiter = asyncio.Semaphore(max(1, get_executor().max_workers))
+    tasks = [asyncio.ensure_future(_process_batch_item(item, limiter, raw_text, archive)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield ndjson_line(await next_done)
+    finally:
+        # On disconnect: queued executor calls give their slot back, running ones finish unobserved.
+        for task in tasks:
+            task.cancel()
+        for item in items:
+            close_spooled_item(item)
+        if archive is not None:
+            close_archive(archive)
+
+
+async def _run_admitted(images: tuple[bytes | None, ...], func: Any, *args: Any, **kwargs: Any) -> Any:
+    """Run ``func`` on the executor once the memory budget has room for decoding ``images``.
+
+    Raises ``ExecutorSaturated`` when either the queue or the budget is full.
+    """
+
+    budget = get_memory_budget()
+    if budget is None:
+        return await get_executor().run(func, *args, **kwargs)
+    cost = await budget.acquire_async(request_cost(*images))
+    try:
+        future = get_executor().submit(func, *args, **kwargs)
+    except BaseException:
+        budget.release(cost)
+        raise
+    # A cancelled request's call keeps decoding on its worker, so hold the bytes until the call ends.
+    future.add_done_callback(lambda _: budget.release(cost))
+    return await asyncio.wrap_future(future)
+
+
+def _observe_field_confidence(result: Any) -> None:
+    if not metrics_enabled():
+        return
+    for side in (result.front, result.back):
+        for item in fields(side):
+            confidence = getattr(side, item.name).confidence
+            if confidence is not None:
+                FIELD_CONFIDENCE.observe(confidence, field=item.name)
+
+
+async def _read_limited(upload: UploadFile, field_name: str, limit: int) -> bytes:
+    """Read an already-parsed upload in chunks, rejecting it once it grows past ``limit`` bytes."""
+
+    chunks = [chunk async for chunk in _iter_limited(upload, field_name, limit)]
+    return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+async def _spool_upload(upload: UploadFile, field_name: str, limit: int) -> BinaryIO:
+    """Copy an upload into a temporary file on disk that outlives the request handler.
+
+    FastAPI closes uploaded files as soon as the handler returns, which is
+    before a streamed response body is produced.
+    """
+
+    spool = tempfile.TemporaryFile()
+    try:
+        async for chunk in _iter_limited(upload, field_name, limit):
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+async def _iter_limited(upload: UploadFile, field_name: str, limit: int) -> AsyncIterator[bytes]:
+    """Yield an upload chunk by chunk, rejecting it once it exceeds ``limit`` bytes or turns out empty."""
+
+    too_large = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"{field_name} exceeds {limit // (1024 * 1024)}MB limit",
+    )
+    if upload.size is not None and upload.size > limit:
+        raise too_large
+    total = 0
+    while chunk := await upload.read(_UPLOAD_CHUNK_SIZE):
+        total += len(chunk)
+        if total > limit:
+            raise too_large
+        yield chunk
+    if not total:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{field_name} is empty")
 
 
 async def _read_validated_file(upload: UploadFile, field_name: str) -> bytes:
-    content_type = (upload.content_type or "").lower()
-    if content_type not in ALLOWED_CONTENT_TYPES:
+    """Read an image upload in chunks, rejecting it once it exceeds the size limit.
+
+    The whole request body is bounded by :class:`RequestBodyLimit` while it
+    is received; this check applies the per-image limit. The file type
+    comes from magic bytes rather than the client-supplied content type,
+    and the pixel dimensions are checked from the header before anything
+    is decoded.
+    """
+
+    with stage_timer("upload_read"):
+        data = await _read_limited(upload, field_name, MAX_UPLOAD_SIZE)
+    _validate_image_bytes(data, field_name)
+    return data
+
+
+def _validate_image_bytes(data: bytes, field_name: str) -> None:
+    if sniff_image_format(data) not in ALLOWED_IMAGE_FORMATS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"{field_name} must be a JPEG or PNG image",
         )
-    data = await upload.read()
-    if not data:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{field_name} is empty")
-    if len(data) > MAX_UPLOAD_SIZE:
+    try:
+        width, height = read_image_size(data)
+    except ImageDecodingError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"{field_name} is not a readable image"
+        ) from exc
+    if width * height > MAX_IMAGE_PIXELS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"{field_name} exceeds {MAX_UPLOAD_SIZE // (1024 * 1024)}MB limit",
+            detail=f"{field_name} exceeds {MAX_IMAGE_PIXELS} pixel limit",
         )
-    return data
+    if metrics_enabled():
+        IMAGE_BYTES.observe(len(data))
+        IMAGE_PIXELS.observe(width * height)
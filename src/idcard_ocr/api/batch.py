@@ -0,0 +1,120 @@
+"""Helpers for the batch endpoint: collecting card pairs and NDJSON framing."""
+from __future__ import annotations
+
+import json
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import Any, BinaryIO
+
+from idcard_ocr.utils.pairs import match_card_image
+
+
+class BatchArchiveError(ValueError):
+    """Raised when an uploaded batch archive cannot be read."""
+
+
+@dataclass(slots=True)
+class BatchItem:
+    """One card pair in a batch; ``error`` is set when the pair is incomplete.
+
+    Pairs from an archive carry the names of their entries and get their
+    image bytes from :func:`read_archive_item` only when they are processed;
+    pairs uploaded as separate files carry the temporary files they were
+    spooled to and are read by :func:`read_spooled_item` the same way.
+    """
+
+    id: str
+    front: bytes | None = None
+    back: bytes | None = None
+    error: str | None = None
+    front_entry: str | None = None
+    back_entry: str | None = None
+    front_file: BinaryIO | None = None
+    back_file: BinaryIO | None = None
+
+
+def open_archive(file: BinaryIO) -> zipfile.ZipFile:
+    """Open an uploaded zip archive without reading its entries."""
+
+    try:
+        return zipfile.ZipFile(file)
+    except zipfile.BadZipFile as exc:
+        raise BatchArchiveError("archive must be a zip file") from exc
+
+
+def close_archive(archive: zipfile.ZipFile) -> None:
+    """Close an archive from :func:`open_archive` together with the file it was opened on."""
+
+    file = archive.fp
+    archive.close()
+    if file is not None:
+        file.close()
+
+
+def items_from_archive(archive: zipfile.ZipFile, *, max_items: int, max_entry_size: int) -> list[BatchItem]:
+    """Collect card pairs from a zip archive.
+
+    Entries are matched by name, either ``<id>/front.jpg`` and
+    ``<id>/back.jpg`` or ``<id>_front.jpg`` and ``<id>_back.jpg`` (PNG is
+    accepted as well). Entries larger than ``max_entry_size`` are reported
+    as item errors without being decompressed.
+    """
+
+    items: dict[str, BatchItem] = {}
+    for info in archive.infolist():
+        if info.is_dir():
+            continue
+        match = match_card_image(info.filename)
+        if match is None:
+            continue
+        item_id, side = match
+        item = items.get(item_id)
+        if item is None:
+            if len(items) >= max_items:
+                raise BatchArchiveError(f"archive contains more than {max_items} cards")
+            item = items[item_id] = BatchItem(id=item_id)
+        if info.file_size > max_entry_size:
+            item.error = f"{info.filename} exceeds {max_entry_size // (1024 * 1024)}MB limit"
+            continue
+        setattr(item, f"{side}_entry", info.filename)
+
+    for item in items.values():
+        if item.error is None and (item.front_entry is None or item.back_entry is None):
+            item.error = "front and back images are both required"
+    return list(items.values())
+
+
+def read_archive_item(archive: zipfile.ZipFile, item: BatchItem) -> None:
+    """Decompress the entries of an archive pair into ``item.front`` and ``item.back``."""
+
+    try:
+        item.front = archive.read(item.front_entry)
+        item.back = archive.read(item.back_entry)
+    except (zipfile.BadZipFile, zlib.error, OSError, EOFError) as exc:
+        raise BatchArchiveError(f"cannot read card {item.id} from the archive") from exc
+
+
+def read_spooled_item(item: BatchItem) -> None:
+    """Read a spooled pair into ``item.front`` and ``item.back``, then delete its temporary files."""
+
+    try:
+        item.front = item.front_file.read()
+        item.back = item.back_file.read()
+    finally:
+        close_spooled_item(item)
+
+
+def close_spooled_item(item: BatchItem) -> None:
+    """Delete the temporary files of a spooled pair; a no-op for other pairs."""
+
+    for file in (item.front_file, item.back_file):
+        if file is not None:
+            file.close()
+    item.front_file = item.back_file = None
+
+
+def ndjson_line(payload: dict[str, Any]) -> bytes:
+    """Encode one NDJSON record."""
+
+    return (json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
@@ -0,0 +1,553 @@
+"""Asynchronous recognition jobs: a durable SQLite queue drained by in-process workers.
+
+A submitted job stores its uploads and options and is answered with an ID
+straight away; worker threads claim queued jobs, run the regular pipeline
+on the shared inference executor (so jobs and API requests share its
+concurrency and queue limits) and store the response document. Uploads are dropped once a job finishes,
+and finished jobs are deleted after ``IDCARD_OCR_JOB_TTL`` seconds. A
+claimed job carries a lease, so a job whose worker died (for example in a
+restarted process sharing the database) is picked up again, up to a few
+attempts; a running job's lease is renewed while it waits for its result.
+When the job gives a callback URL, it is sent a small JSON
+notice on completion; delivery failures are logged, not retried.
+Callbacks are only accepted for hosts listed in
+``IDCARD_OCR_JOB_CALLBACK_HOSTS``, redirects are not followed, and the
+notices are posted from a thread of their own so slow receivers never
+hold up the job workers.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+import urllib.request
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Collection
+from urllib.parse import urlsplit
+
+from idcard_ocr.api.serialize import json_bytes, result_payload
+from idcard_ocr.inference.admission import MemoryBudgetExhausted, get_memory_budget, request_cost
+from idcard_ocr.inference.executor import ExecutorSaturated, get_executor
+from idcard_ocr.inference.service import analyze_combined_id_card, analyze_id_card
+from idcard_ocr.utils.config import env_int
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_LEASE_SECONDS = 600
+_LEASE_RENEW_INTERVAL = _LEASE_SECONDS / 4
+# How long a claimed job waits for memory budget before it goes back to the queue; well inside its lease.
+_ADMISSION_WAIT = 60.0
+_MAX_ATTEMPTS = 3
+_PURGE_INTERVAL = 60.0
+_CALLBACK_TIMEOUT = 5.0
+_MAX_PENDING_CALLBACKS = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL,
+    expires_at REAL,
+    lease_until REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    front BLOB,
+    back BLOB,
+    image BLOB,
+    options TEXT NOT NULL,
+    callback_url TEXT,
+    result BLOB,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_by_expiry ON jobs (expires_at);
+"""
+
+
+class JobQueueFull(RuntimeError):
+    """Raised when the number of queued jobs reached ``IDCARD_OCR_JOB_MAX_QUEUED``."""
+
+
+@dataclass(slots=True)
+class Job:
+    """A job as stored; uploads are only present while it has not finished."""
+
+    id: str
+    status: str
+    created_at: float
+    finished_at: float | None = None
+    expires_at: float | None = None
+    attempts: int = 0
+    front: bytes | None = None
+    back: bytes | None = None
+    image: bytes | None = None
+    options: dict[str, Any] = field(default_factory=dict)
+    callback_url: str | None = None
+    result: bytes | None = None
+    error: str | None = None
+
+
+def callback_hosts() -> frozenset[str]:
+    """Hosts callbacks may go to, from the comma-separated ``IDCARD_OCR_JOB_CALLBACK_HOSTS``."""
+
+    raw = os.getenv("IDCARD_OCR_JOB_CALLBACK_HOSTS", "")
+    return frozenset(host.strip().lower() for host in raw.split(",") if host.strip())
+
+
+def valid_callback_url(url: str, allowed_hosts: Collection[str]) -> bool:
+    """Whether ``url`` is an absolute http(s) URL on one of ``allowed_hosts``.
+
+    An entry starting with a dot also admits the subdomains of what
+    follows it. With no allowed hosts every callback is refused: the server
+    would otherwise post to any address a client names, internal ones included.
+    """
+
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return False
+    host = parts.hostname
+    return any(host == allowed or (allowed.startswith(".") and host.endswith(allowed)) for allowed in allowed_hosts)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args: Any, **kwargs: Any) -> None:
+        return None  # the 3xx response then fails the callback instead of being followed
+
+
+_CALLBACK_OPENER = urllib.request.build_opener(_NoRedirect)
+
+
+class JobStore:
+    """Jobs in a SQLite database in WAL mode, safe to share between threads and processes."""
+
+    def __init__(self, path: Path, *, ttl: float = 3600.0, max_queued: int = 1000) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_queued = max_queued
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Autocommit mode; writes that read first take the database lock with BEGIN IMMEDIATE.
+        self._db = sqlite3.connect(str(path), timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def submit(
+        self,
+        *,
+        front: bytes | None = None,
+        back: bytes | None = None,
+        image: bytes | None = None,
+        options: dict[str, Any] | None = None,
+        callback_url: str | None = None,
+    ) -> Job:
+        """Queue a job; raises ``JobQueueFull`` when too many are already waiting."""
+
+        now = time.time()
+        job = Job(
+            id=secrets.token_hex(16),
+            status=QUEUED,
+            created_at=now,
+            front=front,
+            back=back,
+            image=image,
+            options=dict(options or {}),
+            callback_url=callback_url,
+        )
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                (queued,) = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)
+                ).fetchone()
+                if queued >= self.max_queued:
+                    raise JobQueueFull(f"{queued} jobs are already queued")
+                self._db.execute(
+                    "INSERT INTO jobs (id, status, created_at, updated_at, front, back, image, options,"
+                    " callback_url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (job.id, QUEUED, now, now, front, back, image, json.dumps(job.options), callback_url),
+                )
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+        return job
+
+    def claim(self) -> Job | None:
+        """Lease the oldest queued job, or one whose lease ran out, and mark it running.
+
+        A job already claimed ``_MAX_ATTEMPTS`` times is failed instead, so an
+        upload that keeps taking its worker down cannot block the queue.
+        """
+
+        while True:
+            now = time.time()
+            with self._lock:
+                self._db.execute("BEGIN IMMEDIATE")
+                try:
+                    row = self._db.execute(
+                        "SELECT id, status, created_at, attempts, front, back, image, options, callback_url"
+                        " FROM jobs WHERE status = ? OR (status = ? AND lease_until < ?)"
+                        " ORDER BY created_at LIMIT 1",
+                        (QUEUED, RUNNING, now),
+                    ).fetchone()
+                    if row is None:
+                        self._db.execute("COMMIT")
+                        return None
+                    job = Job(
+                        id=row[0],
+                        status=RUNNING,
+                        created_at=row[2],
+                        attempts=row[3] + 1,
+                        front=row[4],
+                        back=row[5],
+                        image=row[6],
+                        options=json.loads(row[7]),
+                        callback_url=row[8],
+                    )
+                    if row[3] >= _MAX_ATTEMPTS:
+                        self._finish(job.id, FAILED, None, f"gave up after {row[3]} attempts", now)
+                    else:
+                        self._db.execute(
+                            "UPDATE jobs SET status = ?, attempts = ?, lease_until = ?, updated_at = ?"
+                            " WHERE id = ?",
+                            (RUNNING, job.attempts, now + _LEASE_SECONDS, now, job.id),
+                        )
+                except BaseException:
+                    self._db.execute("ROLLBACK")
+                    raise
+                self._db.execute("COMMIT")
+            if row[3] < _MAX_ATTEMPTS:
+                return job
+
+    def requeue(self, job_id: str) -> None:
+        """Return a claimed job to the queue without counting the attempt it did not get to make."""
+
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts - 1, lease_until = NULL, updated_at = ?"
+                " WHERE id = ? AND status = ?",
+                (QUEUED, time.time(), job_id, RUNNING),
+            )
+
+    def renew(self, job_id: str) -> bool:
+        """Extend a running job's lease; ``False`` when the job is no longer running."""
+
+        now = time.time()
+        with self._lock:
+            return self._db.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (now + _LEASE_SECONDS, now, job_id, RUNNING),
+            ).rowcount == 1
+
+    def complete(self, job_id: str, result: bytes) -> None:
+        """Store the response document of a finished job."""
+
+        with self._lock:
+            self._finish(job_id, DONE, result, None, time.time())
+
+    def fail(self, job_id: str, error: str) -> None:
+        with self._lock:
+            self._finish(job_id, FAILED, None, error, time.time())
+
+    def _finish(self, job_id: str, status: str, result: bytes | None, error: str | None, now: float) -> None:
+        self._db.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ?,"
+            " expires_at = ?, lease_until = NULL, front = NULL, back = NULL, image = NULL WHERE id = ?",
+            (status, result, error, now, now, now + self.ttl, job_id),
+        )
+
+    def get(self, job_id: str) -> Job | None:
+        """Return a job without its uploads, or ``None`` when it is unknown or expired."""
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, status, created_at, finished_at, expires_at, attempts, options, callback_url,"
+                " result, error FROM jobs WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (job_id, time.time()),
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(
+            id=row[0],
+            status=row[1],
+            created_at=row[2],
+            finished_at=row[3],
+            expires_at=row[4],
+            attempts=row[5],
+            options=json.loads(row[6]),
+            callback_url=row[7],
+            result=row[8],
+            error=row[9],
+        )
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs past their TTL and return how many were removed."""
+
+        with self._lock:
+            return self._db.execute("DELETE FROM jobs WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            counts = dict(self._db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "path": str(self.path),
+            "ttl_seconds": self.ttl,
+            "max_queued": self.max_queued,
+            **{status: counts.get(status, 0) for status in (QUEUED, RUNNING, DONE, FAILED)},
+        }
+
+
+def run_job(job: Job, renew_lease: Callable[[], Any] | None = None) -> bytes:
+    """Recognize a claimed job's uploads and return its response document as JSON.
+
+    The recognition runs on the inference executor like an API request;
+    ``renew_lease`` is called every ``_LEASE_RENEW_INTERVAL`` seconds while
+    it does, so a slow job is not claimed a second time. Raises
+    ``MemoryBudgetExhausted`` when the budget had no room for
+    ``_ADMISSION_WAIT`` seconds, so that the job is not still waiting when
+    its lease runs out, and ``ExecutorSaturated`` when the executor queue is full.
+    """
+
+    options = job.options
+    fields = options.get("fields")
+    selected = frozenset(fields) if fields is not None else None
+    kwargs = {"capture": options.get("capture", False), "fields": selected}
+    budget = get_memory_budget()
+    images = (job.image, job.image) if job.image is not None else (job.front, job.back)
+    cost = request_cost(*images)
+    with budget.reserve(cost, timeout=_ADMISSION_WAIT) if budget is not None else nullcontext():
+        if job.image is not None:
+            future = get_executor().submit(analyze_combined_id_card, job.image, **kwargs)
+        else:
+            future = get_executor().submit(analyze_id_card, job.front, job.back, **kwargs)
+        while True:
+            try:
+                result, front_lines, back_lines = future.result(timeout=_LEASE_RENEW_INTERVAL)
+                break
+            except TimeoutError:
+                if renew_lease is not None:
+                    renew_lease()
+    raw_text = options.get("raw_text", True)
+    return json_bytes(result_payload(result, front_lines, back_lines, selected=selected, raw_text=raw_text))
+
+
+class JobRunner:
+    """Worker threads draining a ``JobStore``; each runs one job at a time."""
+
+    def __init__(
+        self,
+        store: JobStore,
+        workers: int = 2,
+        *,
+        poll_interval: float = 1.0,
+        callback_hosts: Collection[str] = (),
+    ) -> None:
+        self.store = store
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.callback_hosts = frozenset(callback_hosts)
+        self._callbacks: queue.Queue[Job | None] = queue.Queue(maxsize=_MAX_PENDING_CALLBACKS)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self._completed = 0
+        self._failed = 0
+        self._callbacks_failed = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"idcard-job-{index}", daemon=True)
+                for index in range(self.workers)
+            ]
+            self._threads.append(
+                threading.Thread(target=self._send_callbacks, name="idcard-job-callbacks", daemon=True)
+            )
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop claiming jobs and wait for running ones; an interrupted job is re-run after its lease."""
+
+        with self._lock:
+            threads, self._threads = self._threads, []
+        self._stop.set()
+        self._wake.set()
+        if threads:
+            self._callbacks.put(None)  # after the notices already queued
+        for thread in threads:
+            thread.join(timeout)
+
+    def notify(self) -> None:
+        """Wake idle workers after a submission instead of waiting for the next poll."""
+
+        self._wake.set()
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self.store.claim()
+            except sqlite3.Error:
+                logger.warning("failed to claim a job from %s", self.store.path, exc_info=True)
+                job = None
+            if job is None:
+                self._purge()
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+            if not self._process(job):
+                # Requeued for lack of capacity: give it a moment before claiming again.
+                self._stop.wait(self.poll_interval)
+
+    def _process(self, job: Job) -> bool:
+        """Run a claimed job and store its outcome; ``False`` when it went back to the queue.
+
+        A database error while storing the outcome is logged and leaves the
+        job running, to be claimed again once its lease runs out; it never
+        takes the worker thread down.
+        """
+
+        try:
+            result = run_job(job, lambda: self._renew(job))
+        except (MemoryBudgetExhausted, ExecutorSaturated):
+            # Jobs are not latency-bound: back in line, to wait again under a fresh lease.
+            try:
+                self.store.requeue(job.id)
+            except sqlite3.Error:
+                logger.warning("job %s: failed to requeue in %s", job.id, self.store.path, exc_info=True)
+            return False
+        except Exception as exc:  # noqa: BLE001 - reported through the job
+            job.status, job.error = FAILED, str(exc) or type(exc).__name__
+        else:
+            job.status = DONE
+        try:
+            if job.status == DONE:
+                self.store.complete(job.id, result)
+            else:
+                self.store.fail(job.id, job.error)
+        except sqlite3.Error:
+            logger.warning(
+                "job %s: failed to store its outcome in %s", job.id, self.store.path, exc_info=True
+            )
+            return True
+        with self._lock:
+            if job.status == DONE:
+                self._completed += 1
+            else:
+                self._failed += 1
+        if job.callback_url:
+            try:
+                self._callbacks.put_nowait(job)
+            except queue.Full:
+                logger.warning("job %s: dropped callback, %d already pending", job.id, _MAX_PENDING_CALLBACKS)
+                self._count_failed_callback()
+        return True
+
+    def _renew(self, job: Job) -> None:
+        try:
+            if not self.store.renew(job.id):
+                logger.warning("job %s: lost its lease while running", job.id)
+        except sqlite3.Error:
+            logger.warning("job %s: failed to renew its lease in %s", job.id, self.store.path, exc_info=True)
+
+    def _send_callbacks(self) -> None:
+        while (job := self._callbacks.get()) is not None:
+            self._send_callback(job)
+
+    def _send_callback(self, job: Job) -> None:
+        # Checked again here: the job may have been stored before the allowed hosts changed.
+        if not valid_callback_url(job.callback_url, self.callback_hosts):
+            logger.warning("job %s: callback host of %s is not allowed", job.id, job.callback_url)
+            self._count_failed_callback()
+            return
+        body = json_bytes({"id": job.id, "status": job.status, "error": job.error})
+        request = urllib.request.Request(
+            job.callback_url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with _CALLBACK_OPENER.open(request, timeout=_CALLBACK_TIMEOUT) as response:
+                response.read()
+        except Exception:  # noqa: BLE001 - the result stays available for polling
+            logger.warning("job %s: callback to %s failed", job.id, job.callback_url, exc_info=True)
+            self._count_failed_callback()
+
+    def _count_failed_callback(self) -> None:
+        with self._lock:
+            self._callbacks_failed += 1
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_purge < _PURGE_INTERVAL:
+                return
+            self._last_purge = now
+        try:
+            self.store.purge_expired()
+        except sqlite3.Error:
+            logger.warning("failed to purge expired jobs from %s", self.store.path, exc_info=True)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "running": bool(self._threads),
+                "completed": self._completed,
+                "failed": self._failed,
+                "callbacks_pending": self._callbacks.qsize(),
+                "callbacks_failed": self._callbacks_failed,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_job_store() -> JobStore | None:
+    """Return the job store, or ``None`` unless ``IDCARD_OCR_JOB_DB`` is set."""
+
+    path = os.getenv("IDCARD_OCR_JOB_DB")
+    if not path:
+        return None
+    return JobStore(
+        Path(path),
+        ttl=env_int("IDCARD_OCR_JOB_TTL", 3600, minimum=1),
+        max_queued=env_int("IDCARD_OCR_JOB_MAX_QUEUED", 1000, minimum=1),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_job_runner() -> JobRunner | None:
+    """Return the workers for the job store, ``IDCARD_OCR_JOB_WORKERS`` (default 2) of them."""
+
+    store = get_job_store()
+    if store is None:
+        return None
+    return JobRunner(
+        store, env_int("IDCARD_OCR_JOB_WORKERS", 2, minimum=1), callback_hosts=callback_hosts()
+    )
+
+
+# A forked process opens its own database connection and starts its own workers.
+os.register_at_fork(after_in_child=get_job_runner.cache_clear)
+os.register_at_fork(after_in_child=get_job_store.cache_clear)
@@ -0,0 +1,135 @@
+"""Serialize recognition results straight to response bytes.
+
+Going through ``IdCardResponseSchema`` validates data the pipeline built
+itself, and FastAPI validates and serializes it once more for
+``response_model``. The helpers here write the same document directly
+from the result dataclasses; the schema still documents it in OpenAPI.
+JSON is the default, MessagePack is returned when the ``Accept`` header
+prefers it and the optional ``msgpack`` package is installed.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import fields
+from functools import lru_cache
+from typing import Any
+
+from idcard_ocr.inference.models import IdCardResult, ProcessingInfo, SideProcessingInfo
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+_MSGPACK_MEDIA_TYPES = frozenset({MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"})
+_JSON_MEDIA_TYPES = frozenset({JSON_MEDIA_TYPE, "application/*", "*/*"})
+
+
+@lru_cache(maxsize=None)
+def _field_names(cls: type) -> tuple[str, ...]:
+    return tuple(item.name for item in fields(cls))
+
+
+def _side_payload(side: Any, selected: frozenset[str] | None) -> dict[str, Any]:
+    payload: dict[str, Any] = {}
+    for name in _field_names(type(side)):
+        if selected is None or name in selected:
+            field_result = getattr(side, name)
+            confidence = field_result.confidence
+            payload[name] = {
+                "value": field_result.value,
+                "confidence": None if confidence is None else float(confidence),
+            }
+    return payload
+
+
+def _side_meta(info: SideProcessingInfo) -> dict[str, Any]:
+    meta = {name: getattr(info, name) for name in _field_names(SideProcessingInfo)}
+    meta["field_tiers"] = dict(info.field_tiers)
+    return meta
+
+
+def _processing_meta(processing: ProcessingInfo | None) -> dict[str, Any] | None:
+    if processing is None:
+        return None
+    return {
+        "front": _side_meta(processing.front),
+        "back": _side_meta(processing.back),
+        "side_source": processing.side_source,
+    }
+
+
+def result_payload(
+    result: IdCardResult,
+    front_lines: list[str],
+    back_lines: list[str],
+    *,
+    selected: frozenset[str] | None = None,
+    raw_text: bool = True,
+) -> dict[str, Any]:
+    """Build the ``IdCardResponseSchema`` document for ``result`` as plain data.
+
+    With ``selected`` only those fields are included, and a side without
+    any of them is left out. Without ``raw_text`` the ``raw_text`` object
+    is sent empty.
+    """
+
+    payload: dict[str, Any] = {}
+    for side_name, side in (("front", result.front), ("back", result.back)):
+        side_payload = _side_payload(side, selected)
+        if selected is None or side_payload:
+            payload[side_name] = side_payload
+    payload["raw_text"] = {"front": "\n".join(front_lines), "back": "\n".join(back_lines)} if raw_text else {}
+    payload["meta"] = _processing_meta(result.processing)
+    return payload
+
+
+@lru_cache(maxsize=1)
+def _msgpack() -> Any:
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def _quality(params: list[str]) -> float:
+    for param in params:
+        key, _, value = param.partition("=")
+        if key.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def negotiate_media_type(accept: str | None) -> str:
+    """Pick the response media type for an ``Accept`` header.
+
+    MessagePack is chosen only when it is preferred over JSON and
+    ``msgpack`` is installed; anything else gets JSON.
+    """
+
+    if not accept or _msgpack() is None:
+        return JSON_MEDIA_TYPE
+    json_quality = msgpack_quality = 0.0
+    for entry in accept.split(","):
+        media_type, *params = entry.split(";")
+        media_type = media_type.strip().lower()
+        if media_type in _MSGPACK_MEDIA_TYPES:
+            msgpack_quality = max(msgpack_quality, _quality(params))
+        elif media_type in _JSON_MEDIA_TYPES:
+            json_quality = max(json_quality, _quality(params))
+    return MSGPACK_MEDIA_TYPE if msgpack_quality > json_quality else JSON_MEDIA_TYPE
+
+
+def json_bytes(payload: Any) -> bytes:
+    """Encode ``payload`` as compact UTF-8 JSON."""
+
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_payload(payload: Any, media_type: str) -> bytes:
+    """Encode ``payload`` in a media type returned by :func:`negotiate_media_type`."""
+
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return _msgpack().packb(payload, use_bin_type=True)
+    return json_bytes(payload)
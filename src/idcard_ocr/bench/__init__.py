@@ -0,0 +1,6 @@
+"""Offline benchmark tooling: synthetic cards, a simulated engine, and a load runner.
+
+Nothing here needs PaddleOCR or a network. ``python -m idcard_ocr bench``
+drives the real FastAPI app in-process at fixed concurrency levels and
+writes a JSON report that can be compared across commits.
+"""
@@ -0,0 +1,221 @@
+"""Compare OCR backends offline: load time, per-image latency, and output parity.
+
+Every backend reads the same decoded (and, if enabled, localized) images.
+The first backend listed is the reference the others are compared with:
+line-level text agreement, character error rate, and agreement of the
+parsed fields. Synthetic cards additionally report field accuracy against
+their known values.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from idcard_ocr.bench.runner import percentile
+from idcard_ocr.bulk import discover_directory, read_manifest
+from idcard_ocr.inference.backends import BackendNotAvailable, build_backend
+from idcard_ocr.inference.card import localize_card
+from idcard_ocr.inference.corpus import expected_fields
+from idcard_ocr.inference.engine import card_localization_enabled, engine_pool_settings, max_image_side
+from idcard_ocr.utils.image import decode_image
+
+# (id, front bytes, back bytes, known field values or None)
+Case = tuple[str, bytes, bytes, dict[str, Any] | None]
+
+
+def edit_distance(first: str, second: str) -> int:
+    """Levenshtein distance between two strings."""
+
+    previous = list(range(len(second) + 1))
+    for i, left in enumerate(first, start=1):
+        current = [i]
+        for j, right in enumerate(second, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (left != right)))
+        previous = current
+    return previous[-1]
+
+
+def page_texts(raw: Any) -> list[str]:
+    """Recognized texts of a ``[[box, (text, score)], ...]`` result, in reading order."""
+
+    return [detection[1][0] for page in raw or [] for detection in page or []]
+
+
+def line_parity(reference: Any, candidate: Any) -> dict[str, int]:
+    """Count reference lines reproduced exactly, and character edits between the two transcripts."""
+
+    reference_lines = page_texts(reference)
+    remaining = list(page_texts(candidate))
+    matched = 0
+    for line in reference_lines:
+        if line in remaining:
+            remaining.remove(line)
+            matched += 1
+    reference_text = "\n".join(reference_lines)
+    return {
+        "lines": len(reference_lines),
+        "lines_matched": matched,
+        "chars": len(reference_text),
+        "char_edits": edit_distance(reference_text, "\n".join(page_texts(candidate))),
+    }
+
+
+def _load_cases(args: argparse.Namespace) -> list[Case]:
+    if args.input_dir or args.manifest:
+        tasks = discover_directory(args.input_dir) if args.input_dir else read_manifest(args.manifest)
+        return [
+            (task.id, Path(task.front).read_bytes(), Path(task.back).read_bytes(), None)
+            for task in tasks[: args.limit or None]
+        ]
+    from idcard_ocr.bench.synthetic import generate_cards
+
+    cards = generate_cards(max(1, args.synthetic), seed=args.seed, font_path=args.font)
+    return [(card.id, card.front, card.back, card.expected) for card in cards]
+
+
+def _prepare(image_bytes: bytes) -> Any:
+    """Decode and localize like the service does, so backends see what production sees."""
+
+    image = decode_image(image_bytes, max_image_side()).array
+    if card_localization_enabled():
+        image = localize_card(image).image
+    return image
+
+
+def run_backend(name: str, images: list[tuple[Any, Any]], *, cpu_threads: int, repeat: int) -> dict[str, Any]:
+    """Load backend ``name`` and OCR every ``(front, back)`` pair ``repeat`` times."""
+
+    started = time.perf_counter()
+    backend = build_backend(name, cpu_threads=cpu_threads)
+    load_seconds = time.perf_counter() - started
+    # One untimed pass so first-call setup does not skew the latencies.
+    outputs = [
+        (list(backend.ocr(front, cls=True)), list(backend.ocr(back, cls=True))) for front, back in images
+    ]
+    latencies: list[float] = []
+    for _ in range(repeat):
+        for front, back in images:
+            for image in (front, back):
+                started = time.perf_counter()
+                backend.ocr(image, cls=True)
+                latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "load_seconds": round(load_seconds, 3),
+        "images": len(latencies),
+        "latency_ms": {
+            "mean": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "p50": round(percentile(latencies, 0.50), 2) if latencies else None,
+            "p95": round(percentile(latencies, 0.95), 2) if latencies else None,
+        },
+        "outputs": outputs,
+    }
+
+
+def compare_outputs(
+    cases: list[Case], reference: list[tuple[Any, Any]], candidate: list[tuple[Any, Any]]
+) -> dict[str, Any]:
+    """Line, character, and field agreement of ``candidate`` with ``reference`` outputs."""
+
+    totals = {"lines": 0, "lines_matched": 0, "chars": 0, "char_edits": 0}
+    fields_compared = fields_matched = 0
+    diffs: list[dict[str, Any]] = []
+    for (card_id, *_), (ref_front, ref_back), (cand_front, cand_back) in zip(cases, reference, candidate):
+        for ref_raw, cand_raw in ((ref_front, cand_front), (ref_back, cand_back)):
+            for key, value in line_parity(ref_raw, cand_raw).items():
+                totals[key] += value
+        expected = expected_fields(ref_front, ref_back)
+        actual = expected_fields(cand_front, cand_back)
+        for field_name, value in expected.items():
+            fields_compared += 1
+            if actual.get(field_name) == value:
+                fields_matched += 1
+            else:
+                diffs.append(
+                    {"id": card_id, "field": field_name, "reference": value, "actual": actual.get(field_name)}
+                )
+    return {
+        "line_agreement": round(totals["lines_matched"] / totals["lines"], 4) if totals["lines"] else None,
+        "char_error_rate": round(totals["char_edits"] / totals["chars"], 4) if totals["chars"] else None,
+        "field_agreement": round(fields_matched / fields_compared, 4) if fields_compared else None,
+        "field_diffs": diffs,
+    }
+
+
+def field_accuracy(cases: list[Case], outputs: list[tuple[Any, Any]]) -> float | None:
+    """Share of known field values (synthetic cards) a backend's output parses to."""
+
+    compared = matched = 0
+    for (_, _, _, known), (front, back) in zip(cases, outputs):
+        if not known:
+            continue
+        actual = expected_fields(front, back)
+        for field_name, value in known.items():
+            compared += 1
+            matched += actual.get(field_name) == value
+    return round(matched / compared, 4) if compared else None
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--backends", default="paddle,onnx", help="comma-separated backend names; the first is the reference"
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--input-dir", type=Path, help="directory of <id>_front/<id>_back image pairs")
+    source.add_argument("--manifest", type=Path, help="CSV or JSONL manifest with id,front,back columns")
+    parser.add_argument("--limit", type=int, default=0, help="compare at most this many pairs (0: all)")
+    parser.add_argument("--synthetic", type=int, default=20, help="synthetic cards when no input is given")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--font", help="TrueType font with CJK glyphs for synthetic cards")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes over the images per backend")
+    parser.add_argument("--cpu-threads", type=int, help="inference threads per backend (default: pool's)")
+    parser.add_argument("--output", type=Path, default=Path("backend-comparison.json"), help="report path")
+
+
+def main(args: argparse.Namespace) -> int:
+    names = list(dict.fromkeys(name.strip() for name in args.backends.split(",") if name.strip()))
+    cases = _load_cases(args)
+    images = [(_prepare(front), _prepare(back)) for _, front, back, _ in cases]
+    cpu_threads = args.cpu_threads or engine_pool_settings()[1]
+
+    backends: dict[str, Any] = {}
+    outputs: dict[str, list[tuple[Any, Any]]] = {}
+    for name in names:
+        try:
+            result = run_backend(name, images, cpu_threads=cpu_threads, repeat=max(1, args.repeat))
+        except BackendNotAvailable as exc:
+            print(f"[compare] {name}: {exc}", file=sys.stderr)
+            return 2
+        outputs[name] = result.pop("outputs")
+        result["field_accuracy"] = field_accuracy(cases, outputs[name])
+        backends[name] = result
+
+    reference = names[0]
+    for name in names[1:]:
+        backends[name]["parity"] = compare_outputs(cases, outputs[reference], outputs[name])
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "cards": len(cases),
+            "reference": reference,
+            "cpu_threads": cpu_threads,
+            "cpu_count": os.cpu_count(),
+        },
+        "backends": backends,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    summary = {
+        name: {
+            "load_seconds": result["load_seconds"],
+            "latency_ms_mean": result["latency_ms"]["mean"],
+            **{key: value for key, value in result.get("parity", {}).items() if key != "field_diffs"},
+        }
+        for name, result in backends.items()
+    }
+    print(json.dumps({"output": str(args.output), "backends": summary}, ensure_ascii=False))
+    return 0
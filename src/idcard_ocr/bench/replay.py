@@ -0,0 +1,99 @@
+"""Replay a captured OCR corpus through the parser: field-level diffs and parse throughput.
+
+No OCR engine is involved, so parser changes can be checked for accuracy
+and speed in seconds. The exit status is non-zero when any field differs,
+which makes the corpus usable as a regression gate.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+from idcard_ocr.inference.corpus import decode_detections, expected_fields, read_corpus
+from idcard_ocr.inference.parser import parse_id_card
+
+
+def load_cases(path: Path) -> list[tuple[str, Any, Any, dict[str, Any]]]:
+    """Return ``(id, front_raw, back_raw, expected)`` for every record in the corpus."""
+
+    return [
+        (
+            str(record["id"]),
+            decode_detections(record["front"]),
+            decode_detections(record["back"]),
+            record.get("expected") or {},
+        )
+        for record in read_corpus(path)
+    ]
+
+
+def compare(cases: list[tuple[str, Any, Any, dict[str, Any]]]) -> dict[str, Any]:
+    """Parse every case once and collect per-field mismatches against the expected values."""
+
+    per_field: dict[str, dict[str, int]] = {}
+    diffs: list[dict[str, Any]] = []
+    for card_id, front, back, expected in cases:
+        actual = expected_fields(front, back)
+        for field_name, expected_value in expected.items():
+            counts = per_field.setdefault(field_name, {"compared": 0, "mismatched": 0})
+            counts["compared"] += 1
+            actual_value = actual.get(field_name)
+            if actual_value != expected_value:
+                counts["mismatched"] += 1
+                diffs.append(
+                    {"id": card_id, "field": field_name, "expected": expected_value, "actual": actual_value}
+                )
+    for counts in per_field.values():
+        counts["accuracy"] = 1 - counts["mismatched"] / counts["compared"] if counts["compared"] else 1.0
+    return {"fields": per_field, "diffs": diffs}
+
+
+def measure_throughput(cases: list[tuple[str, Any, Any, dict[str, Any]]], *, repeat: int) -> dict[str, Any]:
+    """Time ``parse_id_card`` alone over the corpus ``repeat`` times."""
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for _, front, back, _ in cases:
+            parse_id_card(front, back)
+    elapsed = time.perf_counter() - started
+    parsed = len(cases) * repeat
+    return {
+        "parsed": parsed,
+        "elapsed_seconds": round(elapsed, 4),
+        "cards_per_second": round(parsed / elapsed, 1) if elapsed else None,
+    }
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("corpus", type=Path, help="corpus file written with IDCARD_OCR_CAPTURE_PATH")
+    parser.add_argument("--repeat", type=int, default=5, help="parse passes over the corpus for throughput")
+    parser.add_argument("--show-diffs", type=int, default=20, help="field diffs to print (0 prints none)")
+    parser.add_argument("--output", type=Path, help="also write the full report, with every diff, as JSON")
+
+
+def main(args: argparse.Namespace) -> int:
+    cases = load_cases(args.corpus)
+    comparison = compare(cases)
+    report = {
+        "corpus": str(args.corpus),
+        "cards": len(cases),
+        "mismatched_fields": len(comparison["diffs"]),
+        "fields": comparison["fields"],
+        "throughput": measure_throughput(cases, repeat=max(1, args.repeat)),
+    }
+    for diff in comparison["diffs"][: max(0, args.show_diffs)]:
+        print(
+            f"[replay] {diff['id']} {diff['field']}: expected {diff['expected']!r}, got {diff['actual']!r}",
+            file=sys.stderr,
+        )
+    if args.output:
+        args.output.write_text(
+            json.dumps({**report, "diffs": comparison["diffs"]}, ensure_ascii=False, indent=2) + "\n",
+            encoding="utf-8",
+        )
+    print(json.dumps(report, ensure_ascii=False))
+    return 1 if comparison["diffs"] else 0
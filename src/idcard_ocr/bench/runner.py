@@ -0,0 +1,281 @@
+"""Drive the FastAPI app in-process at fixed concurrency levels and report throughput.
+
+Requests go through ``httpx``'s ASGI transport, so multipart parsing,
+validation, the executor, the engine pool, and serialization all run as
+in production while the engine itself is simulated. The client shares the
+process with the server; compare reports from the same machine only.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any
+
+from idcard_ocr.bench.engine import LatencyModel, SimulatedEngine
+from idcard_ocr.bench.synthetic import SyntheticCard, generate_cards
+
+_RSS_SAMPLE_INTERVAL = 0.02
+_PARSE_PATH = "/api/v1/idcard/parse"
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of ``values`` (``q`` in ``[0, 1]``)."""
+
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _current_rss_bytes() -> int | None:
+    try:
+        with open("/proc/self/statm", encoding="ascii") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _max_rss_bytes() -> int:
+    # ru_maxrss is kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _RssSampler:
+    """Track peak resident memory while a level runs."""
+
+    def __init__(self) -> None:
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="bench-rss", daemon=True)
+
+    def _run(self) -> None:
+        while True:
+            rss = _current_rss_bytes()
+            if rss is not None:
+                self.peak = max(self.peak, rss)
+            if self._stop.wait(_RSS_SAMPLE_INTERVAL):
+                return
+
+    def __enter__(self) -> "_RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        if not self.peak:
+            self.peak = _max_rss_bytes()
+
+
+def install_simulated_engine(reference: SyntheticCard, latency: LatencyModel) -> None:
+    """Register :class:`SimulatedEngine` as the ``simulated`` backend and select it."""
+
+    from idcard_ocr.inference import engine
+    from idcard_ocr.inference.backends import register_backend
+
+    register_backend("simulated", lambda cpu_threads=None, **_: SimulatedEngine(reference, latency))
+    os.environ["IDCARD_OCR_BACKEND"] = "simulated"
+    engine.get_engine_pool.cache_clear()
+    engine.get_recognition_batcher.cache_clear()
+    engine.engine_fingerprint.cache_clear()
+
+
+def _parse_server_timing(header: str | None) -> dict[str, float]:
+    stages: dict[str, float] = {}
+    for part in (header or "").split(","):
+        name, _, duration = part.strip().partition(";dur=")
+        if name and duration:
+            stages[name] = float(duration)
+    return stages
+
+
+async def _run_level(
+    client: Any, cards: list[SyntheticCard], concurrency: int, requests: int, warmup: int
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    stage_totals: dict[str, float] = {}
+
+    async def _worker(counter: Any, total: int, record: bool) -> None:
+        while (index := next(counter)) < total:
+            card = cards[index % len(cards)]
+            files = {
+                "front_image": ("front.jpg", card.front, "image/jpeg"),
+                "back_image": ("back.jpg", card.back, "image/jpeg"),
+            }
+            started = time.perf_counter()
+            response = await client.post(_PARSE_PATH, files=files)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if not record:
+                continue
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+            if response.status_code == 200:
+                latencies.append(elapsed_ms)
+                for stage, duration in _parse_server_timing(response.headers.get("server-timing")).items():
+                    stage_totals[stage] = stage_totals.get(stage, 0.0) + duration
+
+    warmup_counter = itertools.count()
+    await asyncio.gather(*(_worker(warmup_counter, warmup, False) for _ in range(concurrency)))
+
+    counter = itertools.count()
+    with _RssSampler() as rss:
+        started = time.perf_counter()
+        await asyncio.gather(*(_worker(counter, requests, True) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    succeeded = len(latencies)
+
+    def _ms(value: float | None) -> float | None:
+        return round(value, 3) if value is not None else None
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "succeeded": succeeded,
+        "statuses": statuses,
+        "elapsed_seconds": round(elapsed, 3),
+        "requests_per_second": round(succeeded / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": _ms(percentile(latencies, 0.50)),
+            "p95": _ms(percentile(latencies, 0.95)),
+            "p99": _ms(percentile(latencies, 0.99)),
+            "max": _ms(max(latencies) if latencies else None),
+            "mean": _ms(sum(latencies) / succeeded if succeeded else None),
+        },
+        "stage_ms_mean": {stage: round(total / succeeded, 3) for stage, total in stage_totals.items()},
+        "peak_rss_mb": round(rss.peak / (1024 * 1024), 1),
+    }
+
+
+async def run_benchmark(
+    cards: list[SyntheticCard],
+    concurrency_levels: list[int],
+    *,
+    requests: int,
+    warmup: int,
+    progress: bool = True,
+) -> list[dict[str, Any]]:
+    """Run every concurrency level in order against the in-process app."""
+
+    import httpx
+
+    from idcard_ocr.api.app import app
+
+    levels = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for concurrency in concurrency_levels:
+            level = await _run_level(client, cards, concurrency, requests, warmup)
+            levels.append(level)
+            if progress:
+                latency = {name: f"{value:.1f}ms" for name, value in level["latency_ms"].items() if value}
+                print(
+                    f"[bench] c={concurrency}: {level['requests_per_second']} req/s, "
+                    f"p50={latency.get('p50')} p95={latency.get('p95')} p99={latency.get('p99')}, "
+                    f"peak RSS {level['peak_rss_mb']}MB, statuses {level['statuses']}",
+                    file=sys.stderr,
+                )
+    return levels
+
+
+def _git_revision() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            timeout=5,
+            check=True,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--output", type=Path, default=Path("bench-results.json"), help="JSON report path")
+    parser.add_argument(
+        "--concurrency",
+        default="1,4,16",
+        help="comma-separated concurrency levels, run in order (default: 1,4,16)",
+    )
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per level")
+    parser.add_argument("--warmup", type=int, default=20, help="unmeasured requests before each level")
+    parser.add_argument("--cards", type=int, default=16, help="distinct synthetic card pairs to cycle through")
+    parser.add_argument("--seed", type=int, default=0, help="seed for synthetic cards and latency jitter")
+    parser.add_argument("--font", help="TrueType font with CJK glyphs for rendering card text")
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="keep the result cache enabled (off by default since the card set repeats)",
+    )
+    defaults = LatencyModel()
+    latency = parser.add_argument_group("simulated engine")
+    latency.add_argument("--detection-ms", type=float, default=defaults.detection_ms)
+    latency.add_argument(
+        "--classification-ms-per-crop", type=float, default=defaults.classification_ms_per_crop
+    )
+    latency.add_argument("--recognition-ms", type=float, default=defaults.recognition_ms)
+    latency.add_argument("--recognition-ms-per-crop", type=float, default=defaults.recognition_ms_per_crop)
+    latency.add_argument(
+        "--cpu-fraction",
+        type=float,
+        default=defaults.cpu_fraction,
+        help="share of each simulated delay spent burning CPU instead of sleeping",
+    )
+    latency.add_argument("--jitter", type=float, default=defaults.jitter)
+
+
+def main(args: argparse.Namespace) -> int:
+    if not args.cache:
+        # Must be set before the cache singleton is first created.
+        os.environ["IDCARD_OCR_CACHE_MAX_ENTRIES"] = "0"
+    concurrency_levels = [int(value) for value in args.concurrency.split(",") if value.strip()]
+    latency = LatencyModel(
+        detection_ms=args.detection_ms,
+        classification_ms_per_crop=args.classification_ms_per_crop,
+        recognition_ms=args.recognition_ms,
+        recognition_ms_per_crop=args.recognition_ms_per_crop,
+        cpu_fraction=min(1.0, max(0.0, args.cpu_fraction)),
+        jitter=max(0.0, args.jitter),
+    )
+    cards = generate_cards(max(1, args.cards), seed=args.seed, font_path=args.font)
+    install_simulated_engine(cards[0], latency)
+
+    levels = asyncio.run(
+        run_benchmark(cards, concurrency_levels, requests=max(1, args.requests), warmup=max(0, args.warmup))
+    )
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "cards": len(cards),
+            "image_bytes_mean": round(sum(len(c.front) + len(c.back) for c in cards) / (2 * len(cards))),
+            "latency_model": asdict(latency),
+            "environment": {
+                key: value for key, value in sorted(os.environ.items()) if key.startswith("IDCARD_OCR_")
+            },
+        },
+        "levels": levels,
+        "peak_rss_mb": round(_max_rss_bytes() / (1024 * 1024), 1),
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(json.dumps({"output": str(args.output), "levels": len(levels)}, ensure_ascii=False))
+    return 0
@@ -0,0 +1,202 @@
+"""Render synthetic ID card photos whose text follows the layout ``parser.py`` expects."""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, field
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+from idcard_ocr.inference.card import CARD_HEIGHT, CARD_WIDTH
+from idcard_ocr.inference.validation import id_number_check_code
+
+FRONT_BACKGROUND = (246, 238, 222)
+BACK_BACKGROUND = (226, 236, 246)
+_PHOTO_BACKGROUND = (48, 52, 58)
+_TEXT_COLOR = (30, 30, 30)
+_LABEL_COLOR = (60, 90, 140)
+
+_SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗"
+_GIVEN_NAMES = ("伟", "芳", "娜", "秀英", "敏", "静", "丽", "强", "磊", "军", "洋", "勇", "艳", "杰", "娟", "涛")
+_ETHNICITIES = ("汉", "汉", "汉", "汉", "回", "满", "壮", "苗", "维吾尔", "土家")
+_REGIONS = (
+    ("110105", "北京市朝阳区", "北京市公安局朝阳分局"),
+    ("310104", "上海市徐汇区", "上海市公安局徐汇分局"),
+    ("440305", "广东省深圳市南山区", "深圳市公安局南山分局"),
+    ("510107", "四川省成都市武侯区", "成都市公安局武侯区分局"),
+    ("330106", "浙江省杭州市西湖区", "杭州市公安局西湖区分局"),
+)
+_STREETS = ("建国路", "人民路", "解放大道", "中山北路", "科技园南路", "文三路")
+
+# Box of each printed line as (left, top, right, bottom) card fractions; address lines wrap.
+_FRONT_BOXES = {
+    "name": (0.06, 0.08, 0.45, 0.20),
+    "gender": (0.06, 0.21, 0.26, 0.32),
+    "ethnicity": (0.30, 0.21, 0.50, 0.32),
+    "birth_date": (0.06, 0.33, 0.55, 0.45),
+    "id_number": (0.06, 0.78, 0.95, 0.92),
+}
+# The address label is detected on its own, so the parser joins the wrapped value lines.
+_ADDRESS_LABEL_BOX = (0.06, 0.46, 0.15, 0.56)
+_ADDRESS_BOXES = ((0.17, 0.46, 0.63, 0.56), (0.17, 0.55, 0.63, 0.65), (0.17, 0.64, 0.52, 0.74))
+_ADDRESS_CHARS_PER_LINE = 13
+_BACK_BOXES = {
+    "issuing_authority": (0.22, 0.70, 0.80, 0.81),
+    "valid_period": (0.22, 0.81, 0.85, 0.93),
+}
+_LABELS = {
+    "name": "姓名",
+    "gender": "性别",
+    "ethnicity": "民族",
+    "birth_date": "出生",
+    "address": "住址",
+    "id_number": "公民身份号码",
+    "issuing_authority": "签发机关",
+    "valid_period": "有效期限",
+}
+
+
+@dataclass(slots=True)
+class TextLine:
+    """One detected text line; either ``label`` or ``value`` may be empty."""
+
+    key: str
+    label: str
+    value: str
+    box: tuple[float, float, float, float]
+
+    @property
+    def text(self) -> str:
+        return self.label + self.value
+
+    def pixel_box(self, width: int = CARD_WIDTH, height: int = CARD_HEIGHT) -> list[list[int]]:
+        left, top, right, bottom = self.box
+        x0, y0, x1, y1 = int(left * width), int(top * height), int(right * width), int(bottom * height)
+        return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+@dataclass(slots=True)
+class SyntheticCard:
+    """A rendered card pair with the transcript and the fields a perfect reader would return."""
+
+    id: str
+    expected: dict[str, str]
+    front_lines: list[TextLine]
+    back_lines: list[TextLine]
+    front: bytes = field(repr=False)
+    back: bytes = field(repr=False)
+
+
+def _random_fields(rng: random.Random) -> dict[str, str]:
+    region_code, address_prefix, authority = rng.choice(_REGIONS)
+    year, month, day = rng.randint(1950, 2005), rng.randint(1, 12), rng.randint(1, 28)
+    sequence = rng.randint(0, 999)
+    body = f"{region_code}{year:04d}{month:02d}{day:02d}{sequence:03d}"
+    issued = rng.randint(2008, 2022)
+    issued_on = f"{issued}.{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d}"
+    expires = "长期" if rng.random() < 0.1 else f"{issued + 20}{issued_on[4:]}"
+    return {
+        "name": rng.choice(_SURNAMES) + rng.choice(_GIVEN_NAMES),
+        "gender": "男" if sequence % 2 else "女",
+        "ethnicity": rng.choice(_ETHNICITIES),
+        "birth_date": f"{year:04d}-{month:02d}-{day:02d}",
+        "address": f"{address_prefix}{rng.choice(_STREETS)}{rng.randint(1, 999)}号{rng.randint(1, 30)}栋"
+        f"{rng.randint(1, 30)}0{rng.randint(1, 9)}室",
+        "id_number": body + id_number_check_code(body),
+        "issuing_authority": authority,
+        "valid_period": f"{issued_on}-{expires}",
+    }
+
+
+def _front_lines(fields: dict[str, str]) -> list[TextLine]:
+    year, month, day = (int(part) for part in fields["birth_date"].split("-"))
+    printed = dict(fields, birth_date=f"{year}年{month}月{day}日")
+    lines = [TextLine(key, _LABELS[key], printed[key], box) for key, box in _FRONT_BOXES.items()]
+    lines.append(TextLine("address", _LABELS["address"], "", _ADDRESS_LABEL_BOX))
+    address = fields["address"]
+    for index, box in enumerate(_ADDRESS_BOXES):
+        chunk = address[index * _ADDRESS_CHARS_PER_LINE : (index + 1) * _ADDRESS_CHARS_PER_LINE]
+        if chunk:
+            lines.append(TextLine("address", "", chunk, box))
+    # Printed order: top to bottom, the ID number last.
+    return sorted(lines, key=lambda line: (line.box[1], line.box[0]))
+
+
+def _back_lines(fields: dict[str, str]) -> list[TextLine]:
+    return [TextLine(key, _LABELS[key], fields[key], box) for key, box in _BACK_BOXES.items()]
+
+
+def _render_side(
+    lines: list[TextLine],
+    background: tuple[int, int, int],
+    *,
+    front: bool,
+    photo_size: tuple[int, int],
+    quality: int,
+    font_path: str | None,
+) -> bytes:
+    card = Image.new("RGB", (CARD_WIDTH, CARD_HEIGHT), background)
+    draw = ImageDraw.Draw(card)
+    font_size = int(CARD_HEIGHT * 0.07)
+    # Without a CJK font the glyphs render as boxes, which is fine for load tests.
+    font = ImageFont.truetype(font_path, font_size) if font_path else ImageFont.load_default(size=font_size)
+    if front:
+        # Portrait placeholder on the right, as on a real card.
+        portrait = (0.64 * CARD_WIDTH, 0.12 * CARD_HEIGHT, 0.92 * CARD_WIDTH, 0.72 * CARD_HEIGHT)
+        draw.rectangle([int(value) for value in portrait], fill=(200, 200, 205))
+    else:
+        # National emblem placeholder in the top-left corner.
+        draw.ellipse([40, 30, 160, 150], fill=(200, 30, 40))
+    for line in lines:
+        (x0, y0), _, _, _ = line.pixel_box()
+        if line.label:
+            draw.text((x0, y0), line.label, font=font, fill=_LABEL_COLOR)
+            x0 += int(draw.textlength(line.label, font=font)) + 16
+        draw.text((x0, y0), line.value, font=font, fill=_TEXT_COLOR)
+
+    photo = Image.new("RGB", photo_size, _PHOTO_BACKGROUND)
+    scale = 0.8 * min(photo_size[0] / CARD_WIDTH, photo_size[1] / CARD_HEIGHT)
+    placed = card.resize((int(CARD_WIDTH * scale), int(CARD_HEIGHT * scale)), Image.BILINEAR)
+    photo.paste(placed, ((photo_size[0] - placed.width) // 2, (photo_size[1] - placed.height) // 2))
+    buffer = BytesIO()
+    photo.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def generate_card(
+    card_id: str,
+    rng: random.Random,
+    *,
+    photo_size: tuple[int, int] = (1600, 1200),
+    quality: int = 90,
+    font_path: str | None = None,
+) -> SyntheticCard:
+    """Render one random but internally consistent card pair, photographed on a dark surface."""
+
+    fields = _random_fields(rng)
+    front_lines, back_lines = _front_lines(fields), _back_lines(fields)
+    options = {"photo_size": photo_size, "quality": quality, "font_path": font_path}
+    return SyntheticCard(
+        id=card_id,
+        expected=fields,
+        front_lines=front_lines,
+        back_lines=back_lines,
+        front=_render_side(front_lines, FRONT_BACKGROUND, front=True, **options),
+        back=_render_side(back_lines, BACK_BACKGROUND, front=False, **options),
+    )
+
+
+def generate_cards(
+    count: int,
+    *,
+    seed: int = 0,
+    photo_size: tuple[int, int] = (1600, 1200),
+    font_path: str | None = None,
+) -> list[SyntheticCard]:
+    """Render ``count`` cards; the same seed always yields the same images."""
+
+    rng = random.Random(seed)
+    return [
+        generate_card(f"synthetic-{index:04d}", rng, photo_size=photo_size, font_path=font_path)
+        for index in range(count)
+    ]
@@ -0,0 +1,233 @@
+"""Offline bulk recognition: run ``analyze_id_card`` over many card pairs without HTTP.
+
+Results are appended to a JSONL file that doubles as the checkpoint. On
+restart, card IDs already present in the output are skipped, so an
+interrupted backfill resumes where it stopped.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from idcard_ocr.utils.pairs import match_card_image
+
+_FSYNC_EVERY = 100
+_PROGRESS_INTERVAL = 10.0
+
+
+@dataclass(slots=True)
+class CardTask:
+    """One front/back pair to recognize."""
+
+    id: str
+    front: str
+    back: str
+
+
+@dataclass(slots=True)
+class BulkStats:
+    """Throughput and latency summary for a bulk run."""
+
+    total: int = 0
+    skipped: int = 0
+    ok: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    interrupted: bool = False
+    latencies_ms: list[float] = field(default_factory=list)
+
+    def summary(self) -> dict[str, Any]:
+        processed = self.ok + self.failed
+        ordered = sorted(self.latencies_ms)
+
+        def _percentile(q: float) -> float | None:
+            if not ordered:
+                return None
+            return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+        return {
+            "total": self.total,
+            "skipped": self.skipped,
+            "processed": processed,
+            "ok": self.ok,
+            "failed": self.failed,
+            "interrupted": self.interrupted,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "cards_per_second": round(processed / self.elapsed_seconds, 3) if self.elapsed_seconds else None,
+            "latency_ms": {
+                "p50": _percentile(0.50),
+                "p95": _percentile(0.95),
+                "p99": _percentile(0.99),
+                "max": ordered[-1] if ordered else None,
+            },
+        }
+
+
+def discover_directory(root: Path) -> list[CardTask]:
+    """Find ``<id>_front.jpg``/``<id>_back.jpg`` or ``<id>/front.jpg`` pairs under ``root``."""
+
+    sides: dict[str, dict[str, str]] = {}
+    for path in sorted(root.rglob("*")):
+        if not path.is_file():
+            continue
+        match = match_card_image(path.relative_to(root).as_posix())
+        if match is None:
+            continue
+        card_id, side = match
+        sides.setdefault(card_id, {})[side] = str(path)
+    return [
+        CardTask(id=card_id, front=paths["front"], back=paths["back"])
+        for card_id, paths in sides.items()
+        if "front" in paths and "back" in paths
+    ]
+
+
+def read_manifest(path: Path) -> list[CardTask]:
+    """Read ``id,front,back`` rows from a CSV or JSONL manifest; paths are relative to it."""
+
+    base = path.parent
+    with path.open(encoding="utf-8") as handle:
+        if path.suffix.lower() in {".jsonl", ".ndjson"}:
+            rows: Iterable[dict[str, Any]] = (json.loads(line) for line in handle if line.strip())
+        else:
+            rows = csv.DictReader(handle)
+        return [
+            CardTask(id=str(row["id"]), front=str(base / row["front"]), back=str(base / row["back"]))
+            for row in rows
+        ]
+
+
+def load_completed_ids(output: Path) -> set[str]:
+    """Return IDs already written to ``output``, dropping a torn final line if present."""
+
+    if not output.exists():
+        return set()
+    completed: set[str] = set()
+    valid_bytes = 0
+    with output.open("rb") as handle:
+        for raw in handle:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                completed.add(str(json.loads(raw)["id"]))
+            except (ValueError, KeyError):
+                break
+            valid_bytes += len(raw)
+    if valid_bytes != output.stat().st_size:
+        with output.open("r+b") as handle:
+            handle.truncate(valid_bytes)
+    return completed
+
+
+def _init_worker(cpu_threads: int) -> None:
+    # One engine per process; processes, not threads, provide the parallelism here.
+    os.environ.setdefault("IDCARD_OCR_ENGINE_POOL_SIZE", "1")
+    os.environ.setdefault("IDCARD_OCR_ENGINE_CPU_THREADS", str(cpu_threads))
+    os.environ.setdefault("IDCARD_OCR_REC_BATCH_WAIT_MS", "0")
+
+
+def process_card(task: CardTask) -> dict[str, Any]:
+    """Recognize one card pair and return its JSONL record; ``result`` is the API's response document."""
+
+    from idcard_ocr.api.serialize import result_payload
+    from idcard_ocr.inference.service import analyze_id_card
+
+    started = time.perf_counter()
+    try:
+        front = Path(task.front).read_bytes()
+        back = Path(task.back).read_bytes()
+        result, front_lines, back_lines = analyze_id_card(front, back)
+    except Exception as exc:  # noqa: BLE001 - recorded per card
+        return {
+            "id": task.id,
+            "status": "error",
+            "error": str(exc) or type(exc).__name__,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+    return {
+        "id": task.id,
+        "status": "ok",
+        "result": result_payload(result, front_lines, back_lines),
+        "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+def _results(tasks: list[CardTask], workers: int) -> Iterator[dict[str, Any]]:
+    if workers == 0:
+        yield from map(process_card, tasks)
+        return
+    cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(workers, initializer=_init_worker, initargs=(cpu_threads,)) as pool:
+        yield from pool.imap_unordered(process_card, tasks, chunksize=1)
+
+
+def run_bulk(tasks: list[CardTask], output: Path, *, workers: int, progress: bool = True) -> BulkStats:
+    """Process ``tasks`` not yet present in ``output`` and append their records to it.
+
+    ``workers == 0`` runs everything in the current process. An interrupt
+    stops the run cleanly; everything written so far is kept for resuming.
+    """
+
+    completed = load_completed_ids(output)
+    pending = [task for task in tasks if task.id not in completed]
+    stats = BulkStats(total=len(tasks), skipped=len(tasks) - len(pending))
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    last_report = started
+    try:
+        with output.open("a", encoding="utf-8") as handle:
+            for written, record in enumerate(_results(pending, workers), start=1):
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+                handle.flush()
+                if written % _FSYNC_EVERY == 0:
+                    os.fsync(handle.fileno())
+                if record["status"] == "ok":
+                    stats.ok += 1
+                else:
+                    stats.failed += 1
+                stats.latencies_ms.append(record["latency_ms"])
+                now = time.perf_counter()
+                if progress and now - last_report >= _PROGRESS_INTERVAL:
+                    last_report = now
+                    rate = written / (now - started)
+                    print(
+                        f"[bulk] {written}/{len(pending)} done, {rate:.2f} cards/s, {stats.failed} failed",
+                        file=sys.stderr,
+                    )
+    except KeyboardInterrupt:
+        stats.interrupted = True
+    stats.elapsed_seconds = time.perf_counter() - started
+    return stats
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input-dir", type=Path, help="directory of <id>_front/<id>_back or <id>/front images")
+    source.add_argument("--manifest", type=Path, help="CSV or JSONL manifest with id, front, back columns")
+    parser.add_argument("--output", type=Path, required=True, help="JSONL results file, also used to resume")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="worker processes (0 runs in-process); defaults to the CPU count",
+    )
+    parser.add_argument("--quiet", action="store_true", help="suppress periodic progress output")
+
+
+def main(args: argparse.Namespace) -> int:
+    tasks = discover_directory(args.input_dir) if args.input_dir else read_manifest(args.manifest)
+    stats = run_bulk(tasks, args.output, workers=max(0, args.workers), progress=not args.quiet)
+    if stats.interrupted:
+        print("[bulk] interrupted; rerun the same command to resume", file=sys.stderr)
+    print(json.dumps(stats.summary(), ensure_ascii=False))
+    return 130 if stats.interrupted else 0
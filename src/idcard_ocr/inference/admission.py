@@ -0,0 +1,263 @@
+"""Admit requests against a global budget of estimated decode and inference memory.
+
+Concurrency limits bound how many requests run, not how much memory they
+need: a single large PNG decodes into hundreds of megabytes before it is
+shrunk, and PaddleOCR makes several working copies of what remains. Each
+request's cost is estimated from its image headers before anything is
+decoded and reserved for as long as it runs. A request that does not fit
+waits, first come first served, and is rejected with
+``MemoryBudgetExhausted`` once it has waited too long.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Iterator
+
+from idcard_ocr.inference.engine import max_image_side
+from idcard_ocr.inference.executor import ExecutorSaturated
+from idcard_ocr.utils.config import env_float, env_int
+from idcard_ocr.utils.image import (
+    ImageDecodingError,
+    estimate_decode_bytes,
+    read_image_size,
+    sniff_image_format,
+)
+from idcard_ocr.utils.metrics import ADMISSION_BYTES, metrics_enabled, record_stage
+
+# Working copies of the decoded image made downstream (resized and normalized float32 detector
+# input, card warp, recognition crops), in units of the decoded RGB array.
+_PIPELINE_COPIES = 4
+
+
+class MemoryBudgetExhausted(ExecutorSaturated):
+    """Raised when a request waited longer than allowed for memory budget."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(retry_after, "Memory budget is exhausted, retry later")
+
+
+def image_cost(data: bytes | None, max_side: int | None = None) -> int:
+    """Estimated peak bytes one image needs from decoding through recognition; 0 for ``None``."""
+
+    if data is None:
+        return 0
+    try:
+        width, height = read_image_size(data)
+    except ImageDecodingError:
+        return 0  # rejected when decoded, before it allocates anything
+    peak, result = estimate_decode_bytes(width, height, sniff_image_format(data), max_side)
+    return peak + _PIPELINE_COPIES * result
+
+
+def request_cost(*images: bytes | None) -> int:
+    """Estimated bytes for recognizing ``images`` at the configured decode size."""
+
+    max_side = max_image_side()
+    return sum(image_cost(image, max_side) for image in images)
+
+
+@dataclass(slots=True)
+class _Waiter:
+    cost: int
+    wake: Callable[[], None]
+    granted: bool = False
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+class MemoryBudget:
+    """Reserve estimated bytes against ``limit`` for the duration of a request.
+
+    Waiters are admitted strictly in arrival order, so a large request is
+    not starved by a stream of small ones. A cost above the whole budget is
+    capped at it: such a request runs, but only on its own.
+    """
+
+    def __init__(self, limit: int, *, max_wait: float = 5.0, retry_after: int = 1) -> None:
+        self.limit = max(1, limit)
+        self.max_wait = max(0.0, max_wait)
+        self.retry_after = max(1, retry_after)
+        self._lock = threading.Lock()
+        self._waiters: deque[_Waiter] = deque()
+        self._in_use = 0
+        self._peak = 0
+        self._admitted = 0
+        self._waited = 0
+        self._admitted_after_wait = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._publish()
+
+    @contextmanager
+    def reserve(self, cost: int, timeout: float | None = -1.0) -> Iterator[int]:
+        """Hold ``cost`` bytes, blocking the calling thread until they are available.
+
+        ``timeout`` defaults to ``max_wait``; ``None`` waits indefinitely.
+        """
+
+        cost = self._wait(self._clamp(cost), timeout)
+        try:
+            yield cost
+        finally:
+            self.release(cost)
+
+    @asynccontextmanager
+    async def reserve_async(self, cost: int, timeout: float | None = -1.0) -> AsyncIterator[int]:
+        """Like :meth:`reserve`, but waits without blocking the event loop."""
+
+        cost = await self.acquire_async(cost, timeout)
+        try:
+            yield cost
+        finally:
+            self.release(cost)
+
+    async def acquire_async(self, cost: int, timeout: float | None = -1.0) -> int:
+        """Wait for ``cost`` bytes and return the amount held; the caller must :meth:`release` it.
+
+        For work that may outlive the awaiting task, such as executor calls
+        that keep running after their request was cancelled.
+        """
+
+        return await self._wait_async(self._clamp(cost), timeout)
+
+    def release(self, cost: int) -> None:
+        with self._lock:
+            self._in_use -= cost
+            self._admit_waiters()
+        self._publish()
+
+    def _clamp(self, cost: int) -> int:
+        return min(max(0, cost), self.limit)
+
+    def _take(self, cost: int) -> None:
+        # Called with the lock held.
+        self._in_use += cost
+        self._admitted += 1
+        self._peak = max(self._peak, self._in_use)
+
+    def _admit_waiters(self) -> None:
+        """Admit from the head of the queue for as long as the next waiter fits (lock held)."""
+
+        while self._waiters and self._in_use + self._waiters[0].cost <= self.limit:
+            waiter = self._waiters.popleft()
+            waited = time.perf_counter() - waiter.enqueued_at
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._admitted_after_wait += 1
+            self._take(waiter.cost)
+            waiter.granted = True
+            waiter.wake()
+
+    def _enqueue(self, cost: int, wake: Callable[[], None]) -> _Waiter | None:
+        """Take ``cost`` at once if it fits and nobody is waiting (``None``), else queue a waiter."""
+
+        with self._lock:
+            if not self._waiters and self._in_use + cost <= self.limit:
+                self._take(cost)
+                waiter = None
+            else:
+                waiter = _Waiter(cost, wake)
+                self._waiters.append(waiter)
+                self._waited += 1
+        self._publish()
+        return waiter
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """Drop a waiter that gave up; ``False`` when it was admitted in the meantime."""
+
+        with self._lock:
+            if waiter.granted:
+                return False
+            self._waiters.remove(waiter)
+            self._rejected += 1
+            # It may have been holding back smaller waiters queued behind it.
+            self._admit_waiters()
+        return True
+
+    def _timeout(self, timeout: float | None) -> float | None:
+        return self.max_wait if timeout is not None and timeout < 0 else timeout
+
+    def _wait(self, cost: int, timeout: float | None) -> int:
+        event = threading.Event()
+        waiter = self._enqueue(cost, event.set)
+        if waiter is None:
+            return cost
+        if not event.wait(self._timeout(timeout)) and self._abandon(waiter):
+            raise MemoryBudgetExhausted(self.retry_after)
+        record_stage("admission_wait", time.perf_counter() - waiter.enqueued_at)
+        return cost
+
+    async def _wait_async(self, cost: int, timeout: float | None) -> int:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+
+        def _wake() -> None:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._enqueue(cost, _wake)
+        if waiter is None:
+            return cost
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self._timeout(timeout))
+        except asyncio.TimeoutError:
+            if self._abandon(waiter):
+                raise MemoryBudgetExhausted(self.retry_after) from None
+        except asyncio.CancelledError:
+            # A disconnected client must not leave its reservation behind.
+            if not self._abandon(waiter):
+                self.release(cost)
+            raise
+        record_stage("admission_wait", time.perf_counter() - waiter.enqueued_at)
+        return cost
+
+    def _publish(self) -> None:
+        if metrics_enabled():
+            ADMISSION_BYTES.set(self._in_use, state="in_use")
+            ADMISSION_BYTES.set(self.limit, state="limit")
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "limit_bytes": self.limit,
+                "in_use_bytes": self._in_use,
+                "peak_bytes": self._peak,
+                "waiting": len(self._waiters),
+                "admitted": self._admitted,
+                "waited": self._waited,
+                "admitted_after_wait": self._admitted_after_wait,
+                "rejected": self._rejected,
+                # Only admitted waiters record a wait; rejected and cancelled ones would dilute the mean.
+                "wait_seconds_avg": (
+                    self._wait_total / self._admitted_after_wait if self._admitted_after_wait else 0.0
+                ),
+                "wait_seconds_max": self._wait_max,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_memory_budget() -> MemoryBudget | None:
+    """Return the process-wide budget, or ``None`` when ``IDCARD_OCR_MEMORY_BUDGET_MB`` is 0.
+
+    Defaults to 1024 MB; requests wait up to ``IDCARD_OCR_MEMORY_BUDGET_WAIT``
+    seconds (default 5) for room before they are rejected.
+    """
+
+    limit_mb = env_int("IDCARD_OCR_MEMORY_BUDGET_MB", 1024, minimum=0)
+    if not limit_mb:
+        return None
+    return MemoryBudget(
+        limit_mb * 1024 * 1024,
+        max_wait=env_float("IDCARD_OCR_MEMORY_BUDGET_WAIT", 5.0, minimum=0.0),
+        retry_after=env_int("IDCARD_OCR_RETRY_AFTER", 1, minimum=1),
+    )
+
+
+# Reservations belong to the process that made them; a forked worker starts with an empty budget.
+os.register_at_fork(after_in_child=get_memory_budget.cache_clear)
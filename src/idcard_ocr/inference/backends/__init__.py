@@ -0,0 +1,85 @@
+"""Pluggable OCR backends selected with ``IDCARD_OCR_BACKEND``.
+
+``paddle`` (the default) runs PaddleOCR; ``onnx`` runs the same PP-OCR
+models exported to ONNX on ONNX Runtime's CPU provider. Backends are
+imported lazily, so only the selected one's dependencies must be installed.
+"""
+from __future__ import annotations
+
+import os
+from typing import Callable
+
+from idcard_ocr.inference.backends.base import (
+    BackendNotAvailable,
+    OcrBackend,
+    crop_text_region,
+    recognition_batch_size,
+    sorted_boxes,
+)
+
+BackendFactory = Callable[..., OcrBackend]
+
+
+def _paddle(cpu_threads: int | None = None, rec_model_dir: str | None = None) -> OcrBackend:
+    from idcard_ocr.inference.backends.paddle import PaddleBackend
+
+    return PaddleBackend(cpu_threads, rec_model_dir=rec_model_dir)
+
+
+def _onnx(cpu_threads: int | None = None, rec_model_dir: str | None = None) -> OcrBackend:
+    from idcard_ocr.inference.backends.onnx import OnnxBackend
+
+    return OnnxBackend(cpu_threads, rec_model_dir=rec_model_dir)
+
+
+_FACTORIES: dict[str, BackendFactory] = {"paddle": _paddle, "onnx": _onnx}
+
+
+def register_backend(name: str, factory: BackendFactory) -> None:
+    """Make ``factory(cpu_threads=..., rec_model_dir=...)`` selectable as ``IDCARD_OCR_BACKEND=<name>``."""
+
+    _FACTORIES[name] = factory
+
+
+def available_backends() -> list[str]:
+    return sorted(_FACTORIES)
+
+
+def backend_name() -> str:
+    """The configured backend (``IDCARD_OCR_BACKEND``, default ``paddle``)."""
+
+    return os.getenv("IDCARD_OCR_BACKEND", "paddle").strip().lower() or "paddle"
+
+
+def build_backend(
+    name: str | None = None, *, cpu_threads: int | None = None, rec_model_dir: str | None = None
+) -> OcrBackend:
+    """Instantiate backend ``name`` (the configured one by default).
+
+    ``rec_model_dir`` replaces the configured recognition model, e.g. with a
+    heavier one for the cascade's accurate tier.
+    """
+
+    name = name or backend_name()
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise BackendNotAvailable(
+            f"Unknown OCR backend {name!r}; choose one of: {', '.join(available_backends())}"
+        )
+    if rec_model_dir:
+        return factory(cpu_threads=cpu_threads, rec_model_dir=rec_model_dir)
+    return factory(cpu_threads=cpu_threads)
+
+
+__all__ = [
+    "BackendFactory",
+    "BackendNotAvailable",
+    "OcrBackend",
+    "available_backends",
+    "backend_name",
+    "build_backend",
+    "crop_text_region",
+    "recognition_batch_size",
+    "register_backend",
+    "sorted_boxes",
+]
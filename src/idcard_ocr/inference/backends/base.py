@@ -0,0 +1,113 @@
+"""Backend interface shared by every OCR implementation.
+
+A backend exposes the three model stages separately so the pipeline can
+detect and classify on a pooled engine while recognition is batched across
+requests. :meth:`OcrBackend.ocr` chains them the way PaddleOCR's
+``TextSystem`` does and returns the same ``[[box, (text, score)], ...]``
+page structure that the parser consumes.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Sequence
+
+import numpy as np
+
+from idcard_ocr.utils.config import env_int
+
+# Angle-classifier confidence needed before a line is treated as upside down.
+ANGLE_THRESHOLD = 0.9
+# PaddleOCR's own ``rec_batch_num``, used when cross-request batching is off.
+_DEFAULT_REC_BATCH = 6
+
+
+class BackendNotAvailable(RuntimeError):
+    """Raised when an OCR backend cannot be imported or initialized."""
+
+
+def recognition_batch_size() -> int:
+    """Crops per recognizer forward pass, the same ``IDCARD_OCR_REC_BATCH_SIZE`` the batcher merges up to.
+
+    A backend that split the batcher's merged batches into smaller chunks
+    would make raising the batch size pointless.
+    """
+
+    size = env_int("IDCARD_OCR_REC_BATCH_SIZE", 32)
+    return size if size > 1 else _DEFAULT_REC_BATCH
+
+
+def sorted_boxes(boxes: Iterable[Any]) -> list[list[list[float]]]:
+    """Order boxes top-to-bottom, then left-to-right, matching PaddleOCR's TextSystem."""
+
+    ordered = sorted(
+        (box.tolist() if hasattr(box, "tolist") else [list(point) for point in box] for box in boxes),
+        key=lambda box: (box[0][1], box[0][0]),
+    )
+    for i in range(len(ordered) - 1):
+        for j in range(i, -1, -1):
+            if abs(ordered[j + 1][0][1] - ordered[j][0][1]) < 10 and ordered[j + 1][0][0] < ordered[j][0][0]:
+                ordered[j], ordered[j + 1] = ordered[j + 1], ordered[j]
+            else:
+                break
+    return ordered
+
+
+def crop_text_region(image: np.ndarray, box: list[list[float]]) -> np.ndarray:
+    """Cut a detected quadrilateral out of ``image`` and rectify it for recognition."""
+
+    import cv2
+
+    points = np.array(box, dtype=np.float32)
+    width = int(max(np.linalg.norm(points[0] - points[1]), np.linalg.norm(points[2] - points[3])))
+    height = int(max(np.linalg.norm(points[0] - points[3]), np.linalg.norm(points[1] - points[2])))
+    target = np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32)
+    matrix = cv2.getPerspectiveTransform(points, target)
+    crop = cv2.warpPerspective(
+        image, matrix, (width, height), borderMode=cv2.BORDER_REPLICATE, flags=cv2.INTER_CUBIC
+    )
+    if crop.shape[0] / max(crop.shape[1], 1) >= 1.5:
+        crop = np.rot90(crop)
+    return crop
+
+
+class OcrBackend(ABC):
+    """Text detection, angle classification, and recognition behind one interface.
+
+    Instances are used by one thread at a time (the engine pool guarantees
+    this), so implementations need not be thread-safe.
+    """
+
+    name = ""
+    use_angle_cls = True
+    drop_score = 0.5
+
+    @abstractmethod
+    def detect(self, image: np.ndarray) -> list[Any]:
+        """Return text-line quadrilaterals (4 points each) in ``image`` coordinates."""
+
+    @abstractmethod
+    def angles(self, crops: Sequence[np.ndarray]) -> list[tuple[int, float]]:
+        """Return ``(degrees, score)`` per crop, where degrees is ``0`` or ``180``."""
+
+    def classify(self, crops: Sequence[np.ndarray]) -> list[np.ndarray]:
+        """Return ``crops`` with upside-down lines rotated upright."""
+
+        return [
+            np.rot90(crop, 2) if degrees == 180 and score > ANGLE_THRESHOLD else crop
+            for crop, (degrees, score) in zip(crops, self.angles(crops))
+        ]
+
+    @abstractmethod
+    def recognize(self, crops: Sequence[np.ndarray]) -> list[tuple[str, float]]:
+        """Return ``(text, score)`` for each crop, in order."""
+
+    def ocr(self, image: np.ndarray, cls: bool = True) -> list[list[Any]]:
+        """Detect, classify, and recognize one image into a single page of detections."""
+
+        boxes = sorted_boxes(self.detect(image))
+        crops = [crop_text_region(image, box) for box in boxes]
+        if crops and cls and self.use_angle_cls:
+            crops = self.classify(crops)
+        recognized = self.recognize(crops) if crops else []
+        drop_score = self.drop_score
+        return [[[box, result] for box, result in zip(boxes, recognized) if result[1] >= drop_score]]
@@ -0,0 +1,261 @@
+"""ONNX Runtime CPU backend running PP-OCR models exported with paddle2onnx.
+
+``IDCARD_OCR_ONNX_MODEL_DIR`` must contain ``det.onnx``, ``rec.onnx`` and
+the recognizer's character list ``dict.txt`` (one character per line, the
+``ppocr_keys_v1.txt`` shipped with the model); ``cls.onnx`` is optional and
+disables angle classification when absent. A separate ``rec_model_dir``
+holding its own ``rec.onnx`` and ``dict.txt`` may replace the recognizer. Pre- and post-processing follow
+PaddleOCR's defaults so the output matches :class:`PaddleBackend` closely.
+"""
+from __future__ import annotations
+
+import math
+import os
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+from idcard_ocr.inference.backends.base import BackendNotAvailable, OcrBackend, recognition_batch_size
+
+_DET_LIMIT_SIDE = 960
+_DET_THRESH = 0.3
+_DET_BOX_THRESH = 0.6
+_DET_UNCLIP_RATIO = 1.5
+_DET_MIN_SIZE = 3
+_DET_MAX_CANDIDATES = 1000
+_DET_MEAN = (0.485, 0.456, 0.406)
+_DET_STD = (0.229, 0.224, 0.225)
+
+_CLS_SHAPE = (3, 48, 192)
+_CLS_LABELS = (0, 180)
+_CLS_BATCH = 6
+
+_REC_HEIGHT = 48
+_REC_MIN_WIDTH = 320
+
+
+def onnx_model_dir() -> str:
+    """Directory holding the exported models (``IDCARD_OCR_ONNX_MODEL_DIR``)."""
+
+    return os.getenv("IDCARD_OCR_ONNX_MODEL_DIR", "")
+
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime
+    except Exception as exc:  # pragma: no cover - import error path
+        raise BackendNotAvailable("onnxruntime package is not available") from exc
+    return onnxruntime
+
+
+def _load_character_list(path: Path) -> list[str]:
+    """CTC labels: blank, then the dictionary, then the space PaddleOCR appends."""
+
+    characters = [line.rstrip("\r\n") for line in path.read_text(encoding="utf-8").splitlines()]
+    return ["blank", *characters, " "]
+
+
+def _normalize(image: np.ndarray, mean: Sequence[float], std: Sequence[float]) -> np.ndarray:
+    """Scale to ``[0, 1]``, normalize per channel, and return a CHW float32 array."""
+
+    scaled = image.astype(np.float32) / 255.0
+    scaled = (scaled - np.asarray(mean, dtype=np.float32)) / np.asarray(std, dtype=np.float32)
+    return scaled.transpose(2, 0, 1)
+
+
+def _resize_for_detection(
+    image: np.ndarray, limit_side: int = _DET_LIMIT_SIDE
+) -> tuple[np.ndarray, float, float]:
+    """Shrink so the long side is at most ``limit_side`` with both sides multiples of 32."""
+
+    import cv2
+
+    height, width = image.shape[:2]
+    ratio = min(1.0, limit_side / max(height, width))
+    resized_h = max(int(round(height * ratio / 32) * 32), 32)
+    resized_w = max(int(round(width * ratio / 32) * 32), 32)
+    resized = cv2.resize(image, (resized_w, resized_h))
+    return resized, resized_h / height, resized_w / width
+
+
+def _mini_box(points: np.ndarray) -> tuple[np.ndarray, float]:
+    """Minimum-area rectangle around ``points`` as clockwise corners from top-left, plus its short side."""
+
+    import cv2
+
+    rect = cv2.minAreaRect(points.astype(np.float32))
+    corners = sorted(cv2.boxPoints(rect).tolist(), key=lambda point: point[0])
+    left = sorted(corners[:2], key=lambda point: point[1])
+    right = sorted(corners[2:], key=lambda point: point[1])
+    box = np.array([left[0], right[0], right[1], left[1]], dtype=np.float32)
+    return box, min(rect[1])
+
+
+def _box_score(probabilities: np.ndarray, box: np.ndarray) -> float:
+    """Mean probability inside ``box``."""
+
+    import cv2
+
+    height, width = probabilities.shape
+    x_min = int(np.clip(np.floor(box[:, 0].min()), 0, width - 1))
+    x_max = int(np.clip(np.ceil(box[:, 0].max()), 0, width - 1))
+    y_min = int(np.clip(np.floor(box[:, 1].min()), 0, height - 1))
+    y_max = int(np.clip(np.ceil(box[:, 1].max()), 0, height - 1))
+    mask = np.zeros((y_max - y_min + 1, x_max - x_min + 1), dtype=np.uint8)
+    shifted = box - np.array([x_min, y_min], dtype=np.float32)
+    cv2.fillPoly(mask, shifted.reshape(1, -1, 2).astype(np.int32), 1)
+    return float(cv2.mean(probabilities[y_min : y_max + 1, x_min : x_max + 1], mask)[0])
+
+
+def _unclip(box: np.ndarray, ratio: float = _DET_UNCLIP_RATIO) -> np.ndarray:
+    """Grow a shrunk DB text kernel back to the full line.
+
+    PaddleOCR offsets the polygon with pyclipper by ``area * ratio /
+    perimeter``; for the rectangles produced here that is the same as
+    growing each side outwards by that distance.
+    """
+
+    import cv2
+
+    (center_x, center_y), (width, height), angle = cv2.minAreaRect(box.astype(np.float32))
+    perimeter = 2 * (width + height)
+    if perimeter <= 0:
+        return box
+    distance = width * height * ratio / perimeter
+    grown = ((center_x, center_y), (width + 2 * distance, height + 2 * distance), angle)
+    return cv2.boxPoints(grown)
+
+
+def db_postprocess(
+    probabilities: np.ndarray, scale_h: float, scale_w: float, original_shape: tuple[int, int]
+) -> list[np.ndarray]:
+    """Turn a DB probability map into text boxes in original image coordinates."""
+
+    import cv2
+
+    height, width = original_shape
+    bitmap = (probabilities > _DET_THRESH).astype(np.uint8) * 255
+    contours, _ = cv2.findContours(bitmap, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+    boxes: list[np.ndarray] = []
+    for contour in contours[:_DET_MAX_CANDIDATES]:
+        box, short_side = _mini_box(contour.reshape(-1, 2))
+        if short_side < _DET_MIN_SIZE or _box_score(probabilities, box) < _DET_BOX_THRESH:
+            continue
+        box, short_side = _mini_box(_unclip(box))
+        if short_side < _DET_MIN_SIZE + 2:
+            continue
+        box[:, 0] = np.clip(np.round(box[:, 0] / scale_w), 0, width)
+        box[:, 1] = np.clip(np.round(box[:, 1] / scale_h), 0, height)
+        boxes.append(box)
+    return boxes
+
+
+def _resize_normalize_line(crop: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Resize a text line to ``height`` keeping its aspect ratio, normalize, and right-pad to ``width``."""
+
+    import cv2
+
+    ratio = crop.shape[1] / max(crop.shape[0], 1)
+    resized_w = max(1, min(width, int(math.ceil(height * ratio))))
+    resized = cv2.resize(np.ascontiguousarray(crop), (resized_w, height))
+    padded = np.zeros((3, height, width), dtype=np.float32)
+    padded[:, :, :resized_w] = _normalize(resized, (0.5, 0.5, 0.5), (0.5, 0.5, 0.5))
+    return padded
+
+
+def ctc_greedy_decode(probabilities: np.ndarray, characters: Sequence[str]) -> list[tuple[str, float]]:
+    """Collapse repeats and blanks (index 0) in ``(batch, steps, classes)`` CTC output."""
+
+    indices = probabilities.argmax(axis=2)
+    scores = probabilities.max(axis=2)
+    decoded: list[tuple[str, float]] = []
+    for row_indices, row_scores in zip(indices, scores):
+        keep = row_indices != 0
+        keep[1:] &= row_indices[1:] != row_indices[:-1]
+        text = "".join(characters[int(index)] for index in row_indices[keep])
+        kept_scores = row_scores[keep]
+        decoded.append((text, float(kept_scores.mean()) if kept_scores.size else 0.0))
+    return decoded
+
+
+class OnnxBackend(OcrBackend):
+    """PP-OCR detection, classification and recognition on ONNX Runtime's CPU provider."""
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        cpu_threads: int | None = None,
+        model_dir: str | None = None,
+        *,
+        rec_model_dir: str | None = None,
+    ) -> None:
+        ort = _import_onnxruntime()
+        self.rec_batch = recognition_batch_size()
+        directory = Path(model_dir or onnx_model_dir() or ".")
+        rec_directory = Path(rec_model_dir) if rec_model_dir else directory
+        if not (directory / "det.onnx").is_file() or not (rec_directory / "rec.onnx").is_file():
+            raise BackendNotAvailable(
+                f"ONNX models not found in {str(directory)!r}; set IDCARD_OCR_ONNX_MODEL_DIR"
+            )
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.inter_op_num_threads = 1
+        if cpu_threads:
+            options.intra_op_num_threads = cpu_threads
+
+        def _session(path: Path):
+            try:
+                return ort.InferenceSession(
+                    str(path), sess_options=options, providers=["CPUExecutionProvider"]
+                )
+            except Exception as exc:  # pragma: no cover - initialization paths
+                raise BackendNotAvailable(f"Failed to load {path}") from exc
+
+        self._det = _session(directory / "det.onnx")
+        self._rec = _session(rec_directory / "rec.onnx")
+        self._cls = _session(directory / "cls.onnx") if (directory / "cls.onnx").is_file() else None
+        self.use_angle_cls = self._cls is not None
+        dictionary = rec_directory / "dict.txt"
+        if not dictionary.is_file():
+            raise BackendNotAvailable(f"Recognizer dictionary {str(dictionary)!r} not found")
+        self._characters = _load_character_list(dictionary)
+
+    @staticmethod
+    def _run(session: Any, batch: np.ndarray) -> np.ndarray:
+        return session.run(None, {session.get_inputs()[0].name: batch})[0]
+
+    def detect(self, image: np.ndarray) -> list[Any]:
+        resized, scale_h, scale_w = _resize_for_detection(image)
+        batch = _normalize(resized, _DET_MEAN, _DET_STD)[np.newaxis]
+        probabilities = self._run(self._det, batch)[0, 0]
+        return db_postprocess(probabilities, scale_h, scale_w, image.shape[:2])
+
+    def angles(self, crops: Sequence[np.ndarray]) -> list[tuple[int, float]]:
+        if self._cls is None:
+            return [(0, 1.0)] * len(crops)
+        _, height, width = _CLS_SHAPE
+        results: list[tuple[int, float]] = []
+        for start in range(0, len(crops), _CLS_BATCH):
+            chunk = crops[start : start + _CLS_BATCH]
+            batch = np.stack([_resize_normalize_line(crop, height, width) for crop in chunk])
+            for row in self._run(self._cls, batch):
+                label = int(row.argmax())
+                results.append((_CLS_LABELS[label], float(row[label])))
+        return results
+
+    def recognize(self, crops: Sequence[np.ndarray]) -> list[tuple[str, float]]:
+        results: list[tuple[str, float]] = [("", 0.0)] * len(crops)
+        # Batching lines of similar aspect ratio keeps padding, and wasted compute, small.
+        ratios = [crop.shape[1] / max(crop.shape[0], 1) for crop in crops]
+        order = sorted(range(len(crops)), key=ratios.__getitem__)
+        for start in range(0, len(order), self.rec_batch):
+            chunk = order[start : start + self.rec_batch]
+            max_ratio = max(ratios[index] for index in chunk)
+            width = int(math.ceil(_REC_HEIGHT * max(max_ratio, _REC_MIN_WIDTH / _REC_HEIGHT)))
+            batch = np.stack([_resize_normalize_line(crops[index], _REC_HEIGHT, width) for index in chunk])
+            for index, result in zip(chunk, ctc_greedy_decode(self._run(self._rec, batch), self._characters)):
+                results[index] = result
+        return results
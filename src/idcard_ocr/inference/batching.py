@@ -0,0 +1,112 @@
+"""Dynamic micro-batching of text-line recognition across concurrent requests."""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Sequence
+
+
+@dataclass(slots=True)
+class _PendingRequest:
+    results: list[Any]
+    remaining: int
+    done: threading.Event = field(default_factory=threading.Event)
+    error: BaseException | None = None
+
+
+class RecognitionBatcher:
+    """Collect text-line crops from many callers and recognize them in batches.
+
+    Each worker thread blocks for the first crop, then keeps gathering crops
+    until ``max_batch_size`` is reached or ``max_wait`` seconds have passed
+    since that first crop. The batch goes through ``recognize`` in a single
+    call and results are routed back to the requests that submitted them.
+    """
+
+    def __init__(
+        self,
+        recognize: Callable[[list[Any]], Sequence[Any]],
+        *,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005,
+        workers: int = 1,
+    ) -> None:
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait)
+        self._recognize = recognize
+        self._queue: queue.SimpleQueue[tuple[_PendingRequest, int, Any]] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._crops = 0
+        self._largest_batch = 0
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"idcard-ocr-rec-batch-{idx}", daemon=True)
+            for idx in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def recognize(self, crops: Sequence[Any]) -> list[Any]:
+        """Recognize ``crops`` as part of a shared batch and return results in order."""
+
+        if not crops:
+            return []
+        request = _PendingRequest(results=[None] * len(crops), remaining=len(crops))
+        for index, crop in enumerate(crops):
+            self._queue.put((request, index, crop))
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.results
+
+    def _collect(self) -> list[tuple[_PendingRequest, int, Any]]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(item)
+        return batch
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                outputs = list(self._recognize([crop for _, _, crop in batch]))
+                if len(outputs) != len(batch):
+                    raise RuntimeError(f"Recognizer returned {len(outputs)} results for {len(batch)} crops")
+            except BaseException as exc:  # noqa: BLE001 - surfaced to every waiting request
+                for request, _, _ in batch:
+                    request.error = exc
+                    request.done.set()
+                continue
+            with self._lock:
+                self._batches += 1
+                self._crops += len(batch)
+                self._largest_batch = max(self._largest_batch, len(batch))
+                # A request's crops may be spread over batches handled by different workers.
+                for (request, index, _), output in zip(batch, outputs):
+                    request.results[index] = output
+                    request.remaining -= 1
+                    if request.remaining == 0:
+                        request.done.set()
+
+    def stats(self) -> dict[str, Any]:
+        """Return batch counts and sizes so the batching window can be tuned."""
+
+        with self._lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "workers": len(self._threads),
+                "pending_crops": self._queue.qsize(),
+                "batches": self._batches,
+                "crops": self._crops,
+                "avg_batch_size": self._crops / self._batches if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+            }
@@ -0,0 +1,188 @@
+"""Content-addressed cache for OCR results with single-flight deduplication."""
+from __future__ import annotations
+
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Callable, TypeVar
+
+from idcard_ocr.utils.config import env_float, env_int
+
+T = TypeVar("T")
+
+
+def cache_key(namespace: str, fingerprint: str, *images: bytes) -> str:
+    """Build a cache key from image digests; the image bytes themselves are never kept."""
+
+    digest = hashlib.sha256()
+    digest.update(namespace.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(fingerprint.encode("utf-8"))
+    for image in images:
+        digest.update(b"\0")
+        digest.update(hashlib.sha256(image).digest())
+    return digest.hexdigest()
+
+
+def _estimate_size(value: Any) -> int:
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:  # pragma: no cover - unpicklable values are simply not cached
+        return -1
+
+
+@dataclass(slots=True)
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float
+
+
+@dataclass(slots=True)
+class _Flight:
+    done: threading.Event = field(default_factory=threading.Event)
+    value: Any = None
+    error: BaseException | None = None
+
+
+class ResultCache:
+    """LRU cache bounded by entry count, approximate bytes, and time-to-live.
+
+    :meth:`get_or_compute` coalesces concurrent misses for the same key so
+    only one caller runs the computation while the others wait for its
+    result. Cached values are shared between callers and must not be mutated.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        max_bytes: int,
+        ttl: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max(1, max_bytes)
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._inflight: dict[str, _Flight] = {}
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get_or_compute(self, key: str, compute: Callable[[], T]) -> T:
+        """Return the cached value for ``key`` or compute it exactly once."""
+
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                self._hits += 1
+                return entry.value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        else:
+            flight.value = value
+            self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _lookup(self, key: str) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= self._clock():
+            self._remove(key)
+            self._expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _store(self, key: str, value: Any) -> None:
+        size = _estimate_size(value)
+        if size < 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(value=value, size=size, expires_at=self._clock() + self.ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def purge(self) -> int:
+        """Drop every cached entry and return how many were removed."""
+
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            return removed
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters and current occupancy."""
+
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_ratio": (self._hits + self._coalesced) / lookups if lookups else 0.0,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_result_cache() -> ResultCache | None:
+    """Return the shared result cache, or ``None`` when ``IDCARD_OCR_CACHE_MAX_ENTRIES`` is 0."""
+
+    max_entries = env_int("IDCARD_OCR_CACHE_MAX_ENTRIES", 1024, minimum=0)
+    if max_entries == 0:
+        return None
+    return ResultCache(
+        max_entries=max_entries,
+        max_bytes=env_int("IDCARD_OCR_CACHE_MAX_BYTES", 64 * 1024 * 1024, minimum=1),
+        ttl=env_float("IDCARD_OCR_CACHE_TTL", 600.0, minimum=0.0),
+    )
@@ -0,0 +1,156 @@
+"""Locate the ID card in a photo and warp it to a canonical upright rectangle."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+import numpy as np
+
+# ISO/IEC 7810 ID-1 card: 85.6mm x 54mm, rendered at 10 pixels per millimetre.
+CARD_WIDTH = 856
+CARD_HEIGHT = 540
+CARD_ASPECT = CARD_WIDTH / CARD_HEIGHT
+
+_DETECT_LONG_SIDE = 640
+_MIN_AREA_RATIO = 0.2
+_MIN_SPLIT_AREA_RATIO = 0.04
+_MAX_SPLIT_AREA_RATIO = 0.6
+_MAX_AREA_RATIO = 0.98
+_ASPECT_TOLERANCE = 0.25
+
+
+@dataclass(slots=True)
+class LocalizedCard:
+    """Result of card localization.
+
+    ``image`` is the warped ``CARD_WIDTH`` x ``CARD_HEIGHT`` card when
+    ``found`` is true and the untouched input otherwise. ``quad`` lists the
+    card corners (top-left, top-right, bottom-right, bottom-left) in input
+    image coordinates, and ``size`` is the warped card's width and height.
+    """
+
+    image: np.ndarray
+    found: bool
+    quad: list[list[float]] | None = None
+    size: tuple[int, int] = (CARD_WIDTH, CARD_HEIGHT)
+
+    def boxes_to_input(self, boxes: Sequence[Any]) -> list[list[list[float]]]:
+        """Map boxes drawn on the warped card back to input image coordinates.
+
+        Boxes are returned unchanged (as float lists) when no card was found.
+        """
+
+        points = np.asarray(boxes, dtype=np.float32).reshape(-1, 1, 2)
+        if self.found and len(points):
+            import cv2
+
+            quad = np.asarray(self.quad, dtype=np.float32)
+            matrix = cv2.getPerspectiveTransform(_card_corners(*self.size), quad)
+            points = cv2.perspectiveTransform(points, matrix)
+        return points.reshape(len(boxes), -1, 2).tolist()
+
+
+def _card_corners(width: int, height: int) -> np.ndarray:
+    return np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+
+
+def _order_corners(points: np.ndarray) -> np.ndarray:
+    """Order four points as top-left, top-right, bottom-right, bottom-left."""
+
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array(
+        [points[np.argmin(sums)], points[np.argmin(diffs)], points[np.argmax(sums)], points[np.argmax(diffs)]],
+        dtype=np.float32,
+    )
+
+
+def _find_card_quads(
+    image: np.ndarray,
+    *,
+    min_area_ratio: float = _MIN_AREA_RATIO,
+    max_area_ratio: float = _MAX_AREA_RATIO,
+    limit: int = 1,
+) -> list[np.ndarray]:
+    import cv2
+
+    height, width = image.shape[:2]
+    factor = min(1.0, _DETECT_LONG_SIDE / max(height, width))
+    small = cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA) if factor < 1 else image
+    gray = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY)
+    gray = cv2.GaussianBlur(gray, (5, 5), 0)
+    edges = cv2.Canny(gray, 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), dtype=np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    image_area = small.shape[0] * small.shape[1]
+    quads: list[np.ndarray] = []
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[: 4 + limit]:
+        area = cv2.contourArea(contour)
+        if not min_area_ratio * image_area <= area <= max_area_ratio * image_area:
+            continue
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) != 4 or not cv2.isContourConvex(approx):
+            continue
+        quad = _order_corners(approx.reshape(4, 2).astype(np.float32))
+        top = np.linalg.norm(quad[1] - quad[0])
+        left = np.linalg.norm(quad[3] - quad[0])
+        aspect = max(top, left) / max(min(top, left), 1.0)
+        if abs(aspect - CARD_ASPECT) / CARD_ASPECT > _ASPECT_TOLERANCE:
+            continue
+        if left > top:
+            # Card photographed in portrait orientation; rotate corners so the long edge is on top.
+            quad = np.roll(quad, -1, axis=0)
+        quads.append(quad / factor)
+        if len(quads) == limit:
+            break
+    return quads
+
+
+def _find_card_quad(image: np.ndarray) -> np.ndarray | None:
+    quads = _find_card_quads(image)
+    return quads[0] if quads else None
+
+
+def find_card_quads(
+    image: np.ndarray,
+    limit: int = 2,
+    *,
+    min_area_ratio: float = _MIN_SPLIT_AREA_RATIO,
+    max_area_ratio: float = _MAX_SPLIT_AREA_RATIO,
+) -> list[list[list[float]]]:
+    """Corners of up to ``limit`` separate cards in ``image``, largest first.
+
+    By default each card may cover a smaller share of the photo than
+    ``localize_card`` requires, e.g. both sides of a card placed side by
+    side on a scanner. Returns an empty list when OpenCV is unavailable.
+    """
+
+    try:
+        import cv2  # noqa: F401
+    except ImportError:  # pragma: no cover - OpenCV ships with PaddleOCR
+        return []
+    quads = _find_card_quads(image, min_area_ratio=min_area_ratio, max_area_ratio=max_area_ratio, limit=limit)
+    return [quad.tolist() for quad in quads]
+
+
+def localize_card(image: np.ndarray, size: tuple[int, int] = (CARD_WIDTH, CARD_HEIGHT)) -> LocalizedCard:
+    """Find the card quadrilateral in ``image`` and warp it to ``size`` (the canonical size by default).
+
+    Falls back to returning ``image`` unchanged when OpenCV is unavailable or
+    no convex quadrilateral with a card-like aspect ratio covers a large
+    enough share of the photo.
+    """
+
+    try:
+        import cv2
+    except ImportError:  # pragma: no cover - OpenCV ships with PaddleOCR
+        return LocalizedCard(image=image, found=False)
+
+    quad = _find_card_quad(image)
+    if quad is None:
+        return LocalizedCard(image=image, found=False)
+    width, height = size
+    matrix = cv2.getPerspectiveTransform(quad.astype(np.float32), _card_corners(width, height))
+    warped = cv2.warpPerspective(image, matrix, (width, height), flags=cv2.INTER_LINEAR)
+    return LocalizedCard(image=warped, found=True, quad=quad.tolist(), size=(width, height))
@@ -0,0 +1,138 @@
+"""Two-tier model cascade: escalate only doubtful fields to a heavier recognizer.
+
+Every image is detected and recognized with the fast (mobile) models. The
+side is then parsed, and a field is escalated when its confidence is below
+``IDCARD_OCR_CASCADE_MIN_CONFIDENCE`` or it fails validation: an ID number
+with a wrong GB 11643 check character, a birth date that disagrees with
+the ID number, or a malformed validity period. Only the text lines those
+fields were read from are cropped again and re-recognized with the
+accurate (server) recognizer; detection is not repeated.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import fields
+from functools import lru_cache
+from typing import Any, Callable, Collection, Sequence
+
+from idcard_ocr.inference.backends import crop_text_region
+from idcard_ocr.inference.models import BackSideResult, FrontSideResult, SideProcessingInfo
+from idcard_ocr.inference.parser import Line, parse_id_card
+from idcard_ocr.inference.validation import birth_date_from_id_number, is_valid_id_number, is_valid_period
+from idcard_ocr.utils.config import env_bool, env_float
+from idcard_ocr.utils.metrics import CASCADE_FIELDS, metrics_enabled
+
+FAST_TIER = "fast"
+ACCURATE_TIER = "accurate"
+
+
+@lru_cache(maxsize=1)
+def cascade_enabled() -> bool:
+    """Whether doubtful fields are re-recognized with the accurate tier (``IDCARD_OCR_CASCADE``)."""
+
+    return env_bool("IDCARD_OCR_CASCADE", False)
+
+
+SideResult = FrontSideResult | BackSideResult
+
+
+def _parse_side(
+    detections: list[Any], side: str, fields: Collection[str] | None = None
+) -> tuple[SideResult, dict[str, list[Line]]]:
+    sources: dict[str, list[Line]] = {}
+    if side == "front":
+        return parse_id_card(detections, [], sources=sources, fields=fields).front, sources
+    return parse_id_card([], detections, sources=sources, fields=fields).back, sources
+
+
+def fields_to_escalate(result: SideResult, min_confidence: float) -> set[str]:
+    """Names of the recognized fields that are low-confidence or fail validation."""
+
+    escalate: set[str] = set()
+    for item in fields(result):
+        field_result = getattr(result, item.name)
+        if field_result.value and (field_result.confidence or 0.0) < min_confidence:
+            escalate.add(item.name)
+    if isinstance(result, FrontSideResult):
+        id_number = result.id_number.value
+        if id_number and not is_valid_id_number(id_number):
+            escalate.add("id_number")
+        elif id_number and result.birth_date.value:
+            if birth_date_from_id_number(id_number) != result.birth_date.value:
+                # Either side of the disagreement may be the misread one.
+                escalate.update(("birth_date", "id_number"))
+    elif result.valid_period.value and not is_valid_period(result.valid_period.value):
+        escalate.add("valid_period")
+    return escalate
+
+
+class Cascade:
+    """Escalate doubtful fields of one side to the accurate tier and keep counters."""
+
+    def __init__(self, min_confidence: float) -> None:
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._sides = 0
+        self._escalated_sides = 0
+        self._lines = 0
+        self._escalated_lines = 0
+
+    def review(
+        self,
+        image: Any,
+        detections: list[Any],
+        side: str,
+        info: SideProcessingInfo,
+        recognize: Callable[[Sequence[Any]], Sequence[tuple[str, float]]],
+        fields: Collection[str] | None = None,
+    ) -> list[Any]:
+        """Return ``detections`` with escalated lines re-recognized; each field's tier goes to ``info``.
+
+        With ``fields`` only those fields are considered for escalation.
+        """
+
+        result, sources = _parse_side(detections, side, fields)
+        escalate = fields_to_escalate(result, self.min_confidence)
+        page = list(detections[0]) if detections else []
+        indices = sorted({line.index for name in escalate for line in sources.get(name, [])})
+        if indices:
+            crops = [crop_text_region(image, page[index][0]) for index in indices]
+            for index, (text, score) in zip(indices, recognize(crops)):
+                page[index] = [page[index][0], (text, score)]
+            detections = [page]
+            result, sources = _parse_side(detections, side, fields)
+
+        reread = set(indices)
+        info.field_tiers = {
+            name: ACCURATE_TIER if any(line.index in reread for line in lines) else FAST_TIER
+            for name, lines in sources.items()
+            if lines and getattr(result, name).value
+        }
+        with self._lock:
+            self._sides += 1
+            self._escalated_sides += bool(indices)
+            self._lines += len(page)
+            self._escalated_lines += len(indices)
+        if metrics_enabled():
+            for name, tier in info.field_tiers.items():
+                CASCADE_FIELDS.inc(field=name, tier=tier)
+        return detections
+
+    def stats(self) -> dict[str, Any]:
+        """Return how many sides and text lines needed the accurate tier."""
+
+        with self._lock:
+            return {
+                "sides": self._sides,
+                "escalated_sides": self._escalated_sides,
+                "escalation_ratio": self._escalated_sides / self._sides if self._sides else 0.0,
+                "lines": self._lines,
+                "escalated_lines": self._escalated_lines,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_cascade() -> Cascade:
+    """Return the shared cascade configured by ``IDCARD_OCR_CASCADE_MIN_CONFIDENCE`` (default 0.9)."""
+
+    return Cascade(min_confidence=env_float("IDCARD_OCR_CASCADE_MIN_CONFIDENCE", 0.9, minimum=0.0))
@@ -0,0 +1,330 @@
+"""Capture anonymized raw OCR output into a compact corpus for parser replay.
+
+Each record is one gzip-compressed JSON line holding both sides' raw
+detections (boxes as 8 integers, text, and score) plus the fields the
+current parser extracts from them. Text is anonymized before anything is
+written: every CJK character is replaced through a random per-record
+substitution except where the parser reads it as structure (the label a
+detection starts with, the gender value and inline ethnicity label on the
+gender line, and the date and validity-period words), other letters are
+scrambled, and ID numbers get a new region and sequence code with a valid
+check character. Every date, including the birth date inside the ID
+number, moves by the same random per-record offset, so the dates stay
+valid for the parser and still agree with each other; every other digit
+(house numbers and the like) is replaced by a different one.
+"""
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import string
+import threading
+import time
+from dataclasses import asdict
+from datetime import date, timedelta
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+from idcard_ocr.inference.parser import LABEL_PATTERNS, leading_label, parse_id_card
+from idcard_ocr.inference.validation import id_number_check_code, is_valid_id_number
+from idcard_ocr.utils.config import env_float
+
+logger = logging.getLogger(__name__)
+
+CORPUS_VERSION = 1
+
+# Substitutes never come from the parser's vocabulary, so anonymized text gains no labels,
+# dates or gender values the original did not have.
+_RESERVED_CHARS = frozenset(
+    "".join(label for labels in LABEL_PATTERNS.values() for label in labels) + "男女族年月日长期到至"
+)
+_CJK_POOL = tuple(chr(code) for code in range(0x4E00, 0x9FA6) if chr(code) not in _RESERVED_CHARS)
+_GENDER_VALUES = "男女"
+_INLINE_ETHNICITY_LABEL = "民族"
+# In order of precedence: an ID-number-like run (tolerating spaces the recognizer put between
+# digits), a date as the parser reads it, any other run of digits, and the words joining a
+# validity period's two dates, which are kept as they are.
+_TOKEN_PATTERN = re.compile(
+    r"(?P<id>[0-9Xx](?:\s*[0-9Xx]){14,17})"
+    r"|(?P<date>(?<![0-9])(?:19|20)\d{2}(?:\s*[年./-]\s*)?\d{1,2}(?:\s*[月./-]\s*)?\d{1,2}(?![0-9])日?)"
+    r"|(?P<digits>[0-9]+)"
+    r"|(?P<period>(?<=[0-9日])\s*[到至]\s*(?=[0-9]|长期)|(?<=[-~到至])\s*长期)"
+)
+_DATE_PARTS_PATTERN = re.compile(r"(\d{4})(\D*)(\d{1,2})(\D*)(\d{1,2})")
+# Shifting by more than a year changes every year written on the card.
+_MIN_DATE_SHIFT_DAYS = 366
+_MAX_DATE_SHIFT_DAYS = 3650
+
+
+class Anonymizer:
+    """Consistent, irreversible text substitution for one corpus record.
+
+    The same input always maps to the same output within a record, so a
+    name split across two detections stays one name; the key and the date
+    offset are random and never stored.
+    """
+
+    def __init__(self, rng: random.Random | None = None) -> None:
+        self._rng = rng or random.Random(secrets.randbits(64))
+        self._chars: dict[str, str] = {}
+        self._id_numbers: dict[str, str] = {}
+        self._digit_runs: dict[str, str] = {}
+        shift = self._rng.randint(_MIN_DATE_SHIFT_DAYS, _MAX_DATE_SHIFT_DAYS)
+        self._date_shift = timedelta(days=shift * self._rng.choice((-1, 1)))
+
+    def text(self, value: str) -> str:
+        kept = _structural_positions(value)
+        parts: list[str] = []
+        position = 0
+        for match in _TOKEN_PATTERN.finditer(value):
+            parts.append(self._substitute(value, position, match.start(), kept))
+            parts.append(self._replace_token(match))
+            position = match.end()
+        parts.append(self._substitute(value, position, len(value), kept))
+        return "".join(parts)
+
+    def _substitute(self, value: str, start: int, end: int, kept: set[int]) -> str:
+        chars = enumerate(value[start:end], start)
+        return "".join(char if index in kept else self._char(char) for index, char in chars)
+
+    def _replace_token(self, match: re.Match[str]) -> str:
+        if match.group("id") is not None:
+            return self._replace_id_run(match)
+        run = match.group(0)
+        if match.group("period") is not None:
+            return run
+        if match.group("date") is not None:
+            shifted = self._shift_date(run)
+            if shifted is not None:
+                return shifted
+        return "".join(self._digits(part) if part.isdigit() else part for part in re.split(r"(\d+)", run))
+
+    def _shift_date(self, value: str) -> str | None:
+        """Move a date by the record's offset in its original layout; ``None`` if it is not a real date."""
+
+        suffix = "日" if value.endswith("日") else ""
+        value = value[: len(value) - len(suffix)]
+        year, first_separator, month, second_separator, day = _DATE_PARTS_PATTERN.fullmatch(value).groups()
+        if not (first_separator or second_separator) and len(month + day) != 4:
+            return None  # ambiguous without separators unless written as YYYYMMDD
+        try:
+            shifted = date(int(year), int(month), int(day)) + self._date_shift
+        except (ValueError, OverflowError):
+            return None
+        return (
+            f"{shifted.year:04d}{first_separator}{shifted.month:0{len(month)}d}"
+            f"{second_separator}{shifted.day:0{len(day)}d}{suffix}"
+        )
+
+    def _digits(self, run: str) -> str:
+        replacement = self._digit_runs.get(run)
+        if replacement is None:
+            replacement = self._digit_runs[run] = "".join(self._other_digit(digit) for digit in run)
+        return replacement
+
+    def _other_digit(self, digit: str, step: int = 1) -> str:
+        """A random digit other than ``digit``; ``step=2`` keeps its parity."""
+
+        candidates = string.digits[int(digit) % step :: step]
+        return self._rng.choice([other for other in candidates if other != digit])
+
+    def _char(self, char: str) -> str:
+        if "\u4e00" <= char <= "\u9fa5":
+            pool: Sequence[str] = _CJK_POOL
+        elif char in string.ascii_letters and char not in "Xx":
+            pool = string.ascii_uppercase if char.isupper() else string.ascii_lowercase
+        else:
+            return char
+        mapped = self._chars.get(char)
+        if mapped is None:
+            mapped = self._chars[char] = self._rng.choice(pool)
+        return mapped
+
+    def _replace_id_run(self, match: re.Match[str]) -> str:
+        run = match.group(0)
+        compact = re.sub(r"\s", "", run).upper()
+        replacement = self._id_numbers.get(compact)
+        if replacement is None:
+            replacement = self._id_numbers[compact] = self._new_id_number(compact)
+        # Put the new characters back into the original spacing.
+        chars = iter(replacement)
+        return "".join(char if char.isspace() else next(chars) for char in run)
+
+    def _new_id_number(self, compact: str) -> str:
+        digits = [self._other_digit(char) if char.isdigit() else char for char in compact]
+        # Shift the birth date like the birth date line, so the two still agree.
+        if len(compact) == 15:  # first-generation number with a YYMMDD birth date in the 1900s
+            birth = self._shift_date("19" + compact[6:12]) if compact[6:12].isdigit() else None
+            digits[6:12] = birth[2:] if birth else digits[6:12]
+        else:
+            birth = self._shift_date(compact[6:14]) if compact[6:14].isdigit() else None
+            digits[6:14] = birth or digits[6:14]
+        if len(compact) == 18:
+            # Same gender parity, and a valid check character only if the original had one.
+            if compact[16].isdigit():
+                digits[16] = self._other_digit(compact[16], step=2)
+            body = "".join(digits[:17])
+            valid = body.isdigit() and is_valid_id_number(compact)
+            digits[17] = id_number_check_code(body) if valid else compact[17]
+        return "".join(digits)
+
+
+def _structural_positions(value: str) -> set[int]:
+    """Indices of characters in one detection that the parser reads as structure rather than content.
+
+    That is the label the detection starts with (only the characters that
+    match it exactly, when it was matched with tolerance), and on the gender
+    line the gender value and the inline ethnicity label. A detection that
+    is only a gender value is kept too. Label characters anywhere else are
+    names, addresses or authorities and get substituted like any other text.
+    """
+
+    stripped = value.strip()
+    if stripped and stripped in _GENDER_VALUES:
+        return {value.index(stripped)}
+    match = leading_label(value)
+    if match is None:
+        return set()
+    key, label = match
+    # The parser drops spaces and surrounding whitespace before matching labels.
+    positions = [index for index, char in enumerate(value) if char != " "]
+    while positions and value[positions[0]].isspace():
+        positions.pop(0)
+    kept = {position for position, char in zip(positions, label) if value[position] == char}
+    if key == "gender":
+        rest = value[positions[len(label) - 1] + 1 :] if len(positions) >= len(label) else ""
+        offset = len(value) - len(rest)
+        gender = next((index for index, char in enumerate(rest) if char in _GENDER_VALUES), None)
+        if gender is not None:
+            kept.add(offset + gender)
+        ethnicity = rest.find(_INLINE_ETHNICITY_LABEL)
+        if ethnicity >= 0:
+            kept.update(range(offset + ethnicity, offset + ethnicity + len(_INLINE_ETHNICITY_LABEL)))
+    return kept
+
+
+def encode_detections(
+    raw: Iterable[Any], anonymizer: Anonymizer | None = None
+) -> list[list[list[Any]] | None]:
+    """Convert ``engine.ocr`` pages into ``[x0, y0, ..., y3, text, score]`` rows."""
+
+    pages: list[list[list[Any]] | None] = []
+    for page in raw or []:
+        if not page:
+            pages.append(None)
+            continue
+        rows = []
+        for box, (text, score) in page:
+            coords = [int(round(float(value))) for point in box for value in point]
+            rows.append([*coords, anonymizer.text(text) if anonymizer else text, round(float(score), 4)])
+        pages.append(rows)
+    return pages
+
+
+def decode_detections(pages: Iterable[list[list[Any]] | None]) -> list[list[Any] | None]:
+    """Rebuild ``engine.ocr``-shaped pages from :func:`encode_detections` rows."""
+
+    decoded: list[list[Any] | None] = []
+    for page in pages:
+        if page is None:
+            decoded.append(None)
+            continue
+        decoded.append([[[row[i : i + 2] for i in range(0, 8, 2)], (row[8], row[9])] for row in page])
+    return decoded
+
+
+def expected_fields(front_raw: Any, back_raw: Any) -> dict[str, str | None]:
+    """Field values the current parser extracts, keyed by field name."""
+
+    result = parse_id_card(front_raw, back_raw)
+    return {key: field["value"] for key, field in {**asdict(result.front), **asdict(result.back)}.items()}
+
+
+def build_record(front_raw: Any, back_raw: Any, *, fingerprint: str = "") -> dict[str, Any]:
+    """Anonymize one card's raw detections into a corpus record."""
+
+    anonymizer = Anonymizer()
+    front = encode_detections(front_raw, anonymizer)
+    back = encode_detections(back_raw, anonymizer)
+    return {
+        "v": CORPUS_VERSION,
+        "id": secrets.token_hex(8),
+        "captured_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "engine": hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:12] if fingerprint else None,
+        "front": front,
+        "back": back,
+        "expected": expected_fields(decode_detections(front), decode_detections(back)),
+    }
+
+
+class CorpusWriter:
+    """Append anonymized records to a gzip JSONL corpus, one gzip member per record."""
+
+    def __init__(self, path: Path, *, sample_rate: float = 0.0) -> None:
+        self.path = path
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self._captured = 0
+        self._failed = 0
+
+    def should_capture(self, requested: bool) -> bool:
+        """Whether to capture this card: when asked to, or for a random sample of traffic."""
+
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def record(self, front_raw: Any, back_raw: Any, *, fingerprint: str = "") -> bool:
+        """Write one card; failures are logged and counted, never raised to the request."""
+
+        try:
+            line = json.dumps(build_record(front_raw, back_raw, fingerprint=fingerprint), ensure_ascii=False)
+            payload = gzip.compress((line + "\n").encode("utf-8"))
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with self.path.open("ab") as handle:
+                    handle.write(payload)
+                self._captured += 1
+            return True
+        except Exception:  # noqa: BLE001 - capture must not break recognition
+            logger.warning("failed to write OCR corpus record to %s", self.path, exc_info=True)
+            with self._lock:
+                self._failed += 1
+            return False
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "path": str(self.path),
+                "sample_rate": self.sample_rate,
+                "captured": self._captured,
+                "failed": self._failed,
+            }
+
+
+def read_corpus(path: Path) -> Iterator[dict[str, Any]]:
+    """Yield records from a corpus file; plain (uncompressed) JSONL is accepted too."""
+
+    with path.open("rb") as probe:
+        compressed = probe.read(2) == b"\x1f\x8b"
+    opener = gzip.open if compressed else open
+    with opener(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+@lru_cache(maxsize=1)
+def get_corpus_writer() -> CorpusWriter | None:
+    """Return the capture writer, or ``None`` unless ``IDCARD_OCR_CAPTURE_PATH`` is set."""
+
+    path = os.getenv("IDCARD_OCR_CAPTURE_PATH")
+    if not path:
+        return None
+    rate = min(1.0, env_float("IDCARD_OCR_CAPTURE_SAMPLE_RATE", 0.0, minimum=0.0))
+    return CorpusWriter(Path(path), sample_rate=rate)
@@ -1,62 +1,447 @@
-"""Wrapper around PaddleOCR providing a simplified API for inference."""
+"""OCR pipeline over a pool of pluggable backends (PaddleOCR by default)."""
 from __future__ import annotations
 
 import os
+import threading
+import time
+from contextlib import contextmanager
 from functools import lru_cache
-from typing import Any, Iterable, List, TYPE_CHECKING
+from typing import Any, Callable, Collection, Iterator, List, Sequence
 
-from idcard_ocr.utils.image import decode_image_to_ndarray
+import numpy as np
 
+from idcard_ocr.inference.backends import (
+    BackendNotAvailable,
+    backend_name,
+    build_backend,
+    crop_text_region,
+    sorted_boxes,
+)
+from idcard_ocr.inference.backends.base import ANGLE_THRESHOLD
+from idcard_ocr.inference.backends.onnx import onnx_model_dir
+from idcard_ocr.inference.backends.paddle import (  # noqa: F401 - PaddleOCRNotAvailable is re-exported
+    PaddleOCRNotAvailable,
+    paddle_settings,
+)
+from idcard_ocr.inference.batching import RecognitionBatcher
+from idcard_ocr.inference.cache import cache_key, get_result_cache
+from idcard_ocr.inference.cascade import cascade_enabled, get_cascade
+from idcard_ocr.inference.card import LocalizedCard, localize_card
+from idcard_ocr.inference.models import SideOcrOutput, SideProcessingInfo
+from idcard_ocr.inference.roi import field_bands, get_roi_reader
+from idcard_ocr.utils.config import env_bool, env_float, env_int
+from idcard_ocr.utils.image import decode_image
+from idcard_ocr.utils.metrics import ANGLE_CLS_LINES, metrics_enabled, stage_timer
 
-class PaddleOCRNotAvailable(RuntimeError):
-    """Raised when the Paddle OCR engine cannot be initialized."""
+# Longest lines classified first in ``auto`` mode to decide the whole image's orientation.
+_ANGLE_SAMPLE_SIZE = 3
 
 
-if TYPE_CHECKING:  # pragma: no cover - type hinting only
-    from paddleocr import PaddleOCR
+class EnginePool:
+    """Fixed-size pool of OCR engines, each used by one thread at a time.
 
+    Engines are built lazily on first checkout so an idle process only pays
+    for the models it actually needs. Callers borrow an engine with
+    :meth:`checkout` and it is returned automatically when the block exits.
+    """
 
-def _import_paddleocr():
-    try:
-        from paddleocr import PaddleOCR as _PaddleOCR
-    except Exception as exc:  # pragma: no cover - import error path
-        raise PaddleOCRNotAvailable("PaddleOCR package is not available") from exc
-    return _PaddleOCR
+    def __init__(self, size: int, factory: Callable[[], Any]) -> None:
+        self.size = max(1, size)
+        self._factory = factory
+        self._cond = threading.Condition()
+        self._engines: list[Any] = [None] * self.size
+        self._unbuilt = list(reversed(range(self.size)))
+        self._idle: list[int] = []
+        self._calls = [0] * self.size
+        self._checkouts = 0
+        self._waiting = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
 
+    @contextmanager
+    def checkout(self) -> Iterator[Any]:
+        """Borrow an engine for the duration of the ``with`` block."""
 
-def _build_paddleocr():
-    PaddleOCR = _import_paddleocr()
-    params: dict[str, Any] = {
-        "use_angle_cls": True,
-        "lang": "ch",
-        "use_gpu": os.getenv("PADDLE_OCR_USE_GPU", "false").lower() in {"1", "true", "yes"},
-    }
-    det_model_dir = os.getenv("PADDLE_OCR_DET_MODEL_DIR")
-    rec_model_dir = os.getenv("PADDLE_OCR_REC_MODEL_DIR")
-    cls_model_dir = os.getenv("PADDLE_OCR_CLS_MODEL_DIR")
-    if det_model_dir:
-        params["det_model_dir"] = det_model_dir
-    if rec_model_dir:
-        params["rec_model_dir"] = rec_model_dir
-    if cls_model_dir:
-        params["cls_model_dir"] = cls_model_dir
+        slot = self._acquire()
+        try:
+            yield self._engines[slot]
+        finally:
+            with self._cond:
+                self._idle.append(slot)
+                self._cond.notify()
+
+    @contextmanager
+    def checkout_all(self) -> Iterator[list[Any]]:
+        """Borrow every engine at once, building any that are missing; used for warm-up."""
+
+        slots: list[int] = []
+        try:
+            for _ in range(self.size):
+                slots.append(self._acquire())
+            yield [self._engines[slot] for slot in slots]
+        finally:
+            with self._cond:
+                self._idle.extend(slots)
+                self._cond.notify_all()
+
+    def _acquire(self) -> int:
+        started = time.perf_counter()
+        build = False
+        with self._cond:
+            self._waiting += 1
+            try:
+                while not self._idle and not self._unbuilt:
+                    self._cond.wait()
+            finally:
+                self._waiting -= 1
+            if self._idle:
+                slot = self._idle.pop()
+            else:
+                slot = self._unbuilt.pop()
+                build = True
+            waited = time.perf_counter() - started
+            self._checkouts += 1
+            self._calls[slot] += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        if build:
+            try:
+                self._engines[slot] = self._factory()
+            except BaseException:
+                with self._cond:
+                    self._calls[slot] -= 1
+                    self._unbuilt.append(slot)
+                    self._cond.notify()
+                raise
+        return slot
+
+    def stats(self) -> dict[str, Any]:
+        """Return busy/idle counts, checkout wait times, and per-engine call counts."""
 
-    try:
-        return PaddleOCR(**params)
-    except Exception as exc:  # pragma: no cover - initialization paths
-        raise PaddleOCRNotAvailable("Failed to initialize PaddleOCR") from exc
+        with self._cond:
+            built = self.size - len(self._unbuilt)
+            return {
+                "size": self.size,
+                "built": built,
+                "busy": built - len(self._idle),
+                "idle": len(self._idle),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "wait_seconds_avg": self._wait_total / self._checkouts if self._checkouts else 0.0,
+                "wait_seconds_max": self._wait_max,
+                "calls_per_engine": list(self._calls),
+            }
+
+
+def engine_pool_settings() -> tuple[int, int]:
+    """Return ``(pool_size, cpu_threads)`` so that size × threads matches the cores."""
+
+    cores = os.cpu_count() or 1
+    size = env_int("IDCARD_OCR_ENGINE_POOL_SIZE", min(2, cores), minimum=1)
+    threads = env_int("IDCARD_OCR_ENGINE_CPU_THREADS", max(1, cores // size), minimum=1)
+    return size, threads
 
 
 @lru_cache(maxsize=1)
-def get_engine():
-    """Return a cached PaddleOCR instance so models are loaded once."""
+def get_engine_pool() -> EnginePool:
+    """Return the process-wide engine pool so models are loaded at most ``size`` times."""
+
+    size, threads = engine_pool_settings()
+    return EnginePool(size, lambda: build_backend(cpu_threads=threads))
+
+
+def cascade_rec_model_dir() -> str:
+    """Recognition model of the cascade's accurate tier (``IDCARD_OCR_CASCADE_REC_MODEL_DIR``)."""
+
+    return os.getenv("IDCARD_OCR_CASCADE_REC_MODEL_DIR", "")
+
+
+def _build_accurate_backend(cpu_threads: int) -> Any:
+    rec_model_dir = cascade_rec_model_dir()
+    if not rec_model_dir:
+        raise BackendNotAvailable("Set IDCARD_OCR_CASCADE_REC_MODEL_DIR to the accurate recognition model")
+    return build_backend(cpu_threads=cpu_threads, rec_model_dir=rec_model_dir)
+
+
+@lru_cache(maxsize=1)
+def get_accurate_engine_pool() -> EnginePool:
+    """Return the pool of accurate-tier engines used by the cascade (``IDCARD_OCR_CASCADE_POOL_SIZE``)."""
+
+    _, threads = engine_pool_settings()
+    size = env_int("IDCARD_OCR_CASCADE_POOL_SIZE", 1, minimum=1)
+    return EnginePool(size, lambda: _build_accurate_backend(threads))
+
+
+@lru_cache(maxsize=1)
+def get_recognition_batcher() -> RecognitionBatcher | None:
+    """Return the shared recognition batcher, or ``None`` when batching is disabled.
+
+    ``IDCARD_OCR_REC_BATCH_SIZE`` caps crops per batch (``<= 1`` disables
+    batching) and ``IDCARD_OCR_REC_BATCH_WAIT_MS`` bounds how long the first
+    crop of a batch waits for company.
+    """
+
+    max_batch_size = env_int("IDCARD_OCR_REC_BATCH_SIZE", 32)
+    if max_batch_size <= 1:
+        return None
+    pool = get_engine_pool()
+
+    def _recognize(crops: list[Any]) -> list[Any]:
+        with pool.checkout() as engine:
+            return engine.recognize(crops)
+
+    return RecognitionBatcher(
+        _recognize,
+        max_batch_size=max_batch_size,
+        max_wait=env_float("IDCARD_OCR_REC_BATCH_WAIT_MS", 5.0, minimum=0.0) / 1000,
+        workers=pool.size,
+    )
+
+
+# The batcher's threads stay behind in the parent of a fork; the engines it wraps are inherited.
+os.register_at_fork(after_in_child=get_recognition_batcher.cache_clear)
+
+
+def _recognize_crops(crops: List[Any]) -> List[tuple[str, float]]:
+    """Recognize already-cropped text lines, batching with other requests when enabled."""
+
+    batcher = get_recognition_batcher()
+    with stage_timer("recognition"):
+        if batcher is not None:
+            return batcher.recognize(crops)
+        with get_engine_pool().checkout() as engine:
+            return engine.recognize(crops)
+
+
+def _recognize_accurate(crops: List[Any]) -> List[tuple[str, float]]:
+    """Re-recognize escalated lines on an accurate-tier engine."""
+
+    with get_accurate_engine_pool().checkout() as engine, stage_timer("cascade_recognition"):
+        if engine.use_angle_cls and angle_cls_mode() != "never":
+            crops = engine.classify(crops)
+        return engine.recognize(crops)
+
+
+@lru_cache(maxsize=1)
+def angle_cls_mode() -> str:
+    """When text lines go through the angle classifier (``IDCARD_OCR_ANGLE_CLS``).
+
+    ``always`` classifies every line and ``never`` skips the classifier.
+    ``auto`` (the default) classifies the few longest lines first; when they
+    agree confidently, that orientation is applied to every line of the
+    image and the rest are not classified.
+    """
+
+    mode = os.getenv("IDCARD_OCR_ANGLE_CLS", "auto").strip().lower()
+    return mode if mode in {"auto", "always", "never"} else "auto"
+
+
+def _orient_crops(engine: Any, crops: list[Any], info: SideProcessingInfo) -> list[Any]:
+    """Rotate upside-down lines upright, classifying as few lines as ``angle_cls_mode`` allows."""
 
-    return _build_paddleocr()
+    mode = angle_cls_mode()
+    if not crops or not engine.use_angle_cls or mode == "never":
+        return crops
+    with stage_timer("angle_classification"):
+        sampled = 0
+        if mode == "auto" and len(crops) > _ANGLE_SAMPLE_SIZE:
+            longest = sorted(range(len(crops)), key=lambda index: crops[index].shape[1], reverse=True)
+            angles = engine.angles([crops[index] for index in longest[:_ANGLE_SAMPLE_SIZE]])
+            sampled = len(angles)
+            agreed = len({degrees for degrees, _ in angles}) == 1
+            if agreed and all(score > ANGLE_THRESHOLD for _, score in angles):
+                info.angle_cls, info.angle_cls_lines = "sampled", sampled
+                _count_angle_lines(classified=sampled, skipped=len(crops) - sampled)
+                if angles[0][0] == 180:
+                    return [np.rot90(crop, 2) for crop in crops]
+                return crops
+        info.angle_cls, info.angle_cls_lines = "all", sampled + len(crops)
+        _count_angle_lines(classified=len(crops), skipped=0)
+        return engine.classify(crops)
+
+
+def _count_angle_lines(*, classified: int, skipped: int) -> None:
+    if not metrics_enabled():
+        return
+    ANGLE_CLS_LINES.inc(classified, outcome="classified")
+    ANGLE_CLS_LINES.inc(skipped, outcome="skipped")
+
+
+def _in_bands(box: Any, height: int, bands: Sequence[tuple[float, float]]) -> bool:
+    centre = sum(point[1] for point in box) / len(box) / height
+    return any(top <= centre <= bottom for top, bottom in bands)
+
+
+def _run_ocr(
+    image_array: np.ndarray,
+    info: SideProcessingInfo,
+    batcher: RecognitionBatcher | None,
+    bands: Sequence[tuple[float, float]] | None = None,
+) -> List[list[Any]]:
+    """Detect and orient lines on a pooled engine, then recognize them.
+
+    With a batcher the engine is released before recognition so batcher
+    workers can use it; otherwise the same engine recognizes the lines.
+    With ``bands`` only lines centred in those vertical fractions of the
+    image are oriented and recognized.
+    """
+
+    with get_engine_pool().checkout() as engine:
+        with stage_timer("detection"):
+            boxes = sorted_boxes(engine.detect(image_array))
+            if bands is not None:
+                boxes = [box for box in boxes if _in_bands(box, image_array.shape[0], bands)]
+            crops = [crop_text_region(image_array, box) for box in boxes]
+        crops = _orient_crops(engine, crops, info)
+        drop_score = engine.drop_score
+        if batcher is None:
+            with stage_timer("recognition"):
+                recognized = engine.recognize(crops) if crops else []
+    if batcher is not None:
+        with stage_timer("recognition"):
+            recognized = batcher.recognize(crops)
+    return [
+        [[box, (text, score)] for box, (text, score) in zip(boxes, recognized) if score >= drop_score]
+    ]
+
+
+@lru_cache(maxsize=1)
+def max_image_side() -> int:
+    """Longest edge, in pixels, that images are decoded to (``0`` keeps full size)."""
+
+    return env_int("IDCARD_OCR_MAX_IMAGE_SIDE", 2048, minimum=0)
+
+
+@lru_cache(maxsize=1)
+def card_localization_enabled() -> bool:
+    """Whether photos are cropped and perspective-corrected to the card before OCR."""
+
+    return env_bool("IDCARD_OCR_CARD_LOCALIZATION", True)
+
+
+@lru_cache(maxsize=1)
+def roi_fast_path_enabled() -> bool:
+    """Whether localized cards are first read from template regions without detection."""
+
+    return env_bool("IDCARD_OCR_ROI_FAST_PATH", False)
+
+
+@lru_cache(maxsize=1)
+def engine_fingerprint() -> str:
+    """Describe the model configuration so cached results never cross configurations."""
+
+    backend = backend_name()
+    settings = {
+        "backend": backend,
+        "lang": "ch",
+        "use_angle_cls": "1",
+        "angle_cls": angle_cls_mode(),
+        "max_image_side": str(max_image_side()),
+        "card_localization": str(card_localization_enabled()),
+        "roi_fast_path": str(roi_fast_path_enabled()),
+        "cascade": str(cascade_enabled()),
+    }
+    if cascade_enabled():
+        settings["cascade_rec_model_dir"] = cascade_rec_model_dir()
+        settings["cascade_min_confidence"] = str(get_cascade().min_confidence)
+    if backend == "paddle":
+        settings.update(paddle_settings())
+    elif backend == "onnx":
+        settings["onnx_model_dir"] = onnx_model_dir()
+    return ";".join(f"{key}={value}" for key, value in sorted(settings.items()))
 
 
 def run_ocr(image_bytes: bytes) -> List[list[Any]]:
-    """Execute OCR on image bytes and return raw PaddleOCR detections."""
+    """Execute OCR on image bytes and return raw ``[[box, (text, score)], ...]`` detections."""
+
+    return ocr_side(image_bytes).detections
+
+
+def ocr_side(
+    image_bytes: bytes, side: str | None = None, fields: Collection[str] | None = None
+) -> SideOcrOutput:
+    """Run the OCR pipeline on one image and report how it was processed.
+
+    When ``side`` (``"front"`` or ``"back"``) is given and the ROI fast path
+    is enabled, a localized card is first read from its template regions;
+    the full detect-and-recognize path runs only if that result fails the
+    confidence or format checks. ``fields`` (with ``side``) limits the work
+    to those fields: only their template regions are read, and on a
+    localized card only the detected lines in their rows are recognized.
+    Results are served from the shared result cache when the same image was
+    recognized recently under the same model configuration.
+    """
+
+    namespace = f"ocr:{side or 'any'}"
+    if side is not None and fields is not None:
+        namespace += ":" + ",".join(sorted(fields))
+    else:
+        fields = None
+    cache = get_result_cache()
+    if cache is None:
+        return ocr_side_uncached(image_bytes, side, fields)
+    key = cache_key(namespace, engine_fingerprint(), image_bytes)
+    return cache.get_or_compute(key, lambda: ocr_side_uncached(image_bytes, side, fields))
+
+
+def ocr_side_uncached(
+    image_bytes: bytes, side: str | None, fields: Collection[str] | None = None
+) -> SideOcrOutput:
+    """``ocr_side`` without the result cache, e.g. to exercise the whole pipeline during warmup."""
+
+    decoded = decode_image(image_bytes, max_image_side())
+    info = SideProcessingInfo(scale=decoded.scale)
+    image = decoded.array
+    if card_localization_enabled():
+        with stage_timer("localize"):
+            card = localize_card(image)
+        image = card.image
+        info.card_localized = card.found
+
+    raw = None
+    if side is not None and info.card_localized and roi_fast_path_enabled():
+        raw = get_roi_reader().read(image, side, _recognize_crops, fields)
+        if raw is not None:
+            info.path = "roi"
+    if raw is None:
+        bands = None
+        if fields is not None and info.card_localized:
+            bands = field_bands(side, fields)
+            info.path = "partial"
+        raw = _run_ocr(image, info, get_recognition_batcher(), bands)
+    # ROI results already passed their own confidence and consistency checks.
+    if side is not None and cascade_enabled() and info.path != "roi":
+        raw = get_cascade().review(image, raw, side, info, _recognize_accurate, fields)
+    # Boxes are reported in the uploaded image's coordinates, not the warped card's or the decoded copy's.
+    if info.card_localized:
+        raw = _unwarp_detections(raw, card)
+    if decoded.scale != 1.0:
+        raw = _rescale_detections(raw, 1.0 / decoded.scale)
+    return SideOcrOutput(detections=raw, info=info)
+
+
+def _unwarp_detections(raw: List[Any], card: LocalizedCard) -> List[Any]:
+    """Map box coordinates from the warped card back to the decoded photo."""
+
+    unwarped: List[Any] = []
+    for page in raw:
+        if not page:
+            unwarped.append(page)
+            continue
+        boxes = card.boxes_to_input([box for box, _ in page])
+        unwarped.append([[box, recognition] for box, (_, recognition) in zip(boxes, page)])
+    return unwarped
+
+
+def _rescale_detections(raw: List[Any], factor: float) -> List[Any]:
+    """Map box coordinates from the decoded image back to the uploaded resolution."""
 
-    image_array = decode_image_to_ndarray(image_bytes)
-    engine = get_engine()
-    return list(engine.ocr(image_array, cls=True))
+    rescaled: List[Any] = []
+    for page in raw:
+        if not page:
+            rescaled.append(page)
+            continue
+        rescaled.append(
+            [[[[x * factor, y * factor] for x, y in box], recognition] for box, recognition in page]
+        )
+    return rescaled
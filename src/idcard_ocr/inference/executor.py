@@ -0,0 +1,148 @@
+"""Bounded thread pool that keeps blocking OCR work off the event loop."""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, TypeVar
+
+from idcard_ocr.utils.config import env_int
+from idcard_ocr.utils.metrics import record_stage
+
+T = TypeVar("T")
+
+
+class ExecutorSaturated(RuntimeError):
+    """Raised when the inference queue is full and new work must be rejected."""
+
+    def __init__(self, retry_after: int, message: str = "Inference queue is full, retry later") -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class InferenceExecutor:
+    """Run blocking callables on worker threads with a hard queue-depth limit.
+
+    At most ``max_workers`` calls execute at once and at most ``max_queue``
+    further calls wait for a free worker. Anything beyond that is rejected
+    immediately with :class:`ExecutorSaturated` so callers can shed load.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, *, retry_after: int = 1) -> None:
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.retry_after = max(1, retry_after)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="idcard-ocr")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._last_wait = 0.0
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Execute ``func`` on a worker thread, or raise if the queue is full."""
+
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def submit(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> Future[T]:
+        """Queue ``func`` and return its future, or raise if the queue is full.
+
+        Cancelling the future before a worker picks it up (as cancelling the
+        task awaiting :meth:`run` does) gives its queue slot back.
+        """
+
+        with self._lock:
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturated(self.retry_after)
+            self._queued += 1
+            self._submitted += 1
+        enqueued_at = time.perf_counter()
+        # Worker threads do not inherit context variables; run the call in a copy of the caller's.
+        context = contextvars.copy_context()
+        try:
+            future = self._pool.submit(context.run, self._invoke, enqueued_at, func, args, kwargs)
+        except RuntimeError:
+            self._unqueue()
+            raise
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future[Any]) -> None:
+        # A future cancelled while still queued never reaches ``_invoke``.
+        if future.cancelled():
+            self._unqueue()
+
+    def _unqueue(self) -> None:
+        with self._lock:
+            self._queued -= 1
+
+    def _invoke(self, enqueued_at: float, func: Callable[..., T], args: tuple, kwargs: dict) -> T:
+        waited = time.perf_counter() - enqueued_at
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._last_wait = waited
+        record_stage("queue_wait", waited)
+        failed = False
+        try:
+            return func(*args, **kwargs)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._running -= 1
+                if failed:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+
+    def stats(self) -> dict[str, Any]:
+        """Return a snapshot of queue depth, throughput, and wait times."""
+
+        with self._lock:
+            started = self._completed + self._failed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "wait_seconds_avg": self._wait_total / started if started else 0.0,
+                "wait_seconds_max": self._wait_max,
+                "wait_seconds_last": self._last_wait,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+@lru_cache(maxsize=1)
+def get_executor() -> InferenceExecutor:
+    """Return the process-wide inference executor configured from the environment."""
+
+    workers = env_int("IDCARD_OCR_WORKERS", min(4, os.cpu_count() or 1), minimum=1)
+    return InferenceExecutor(
+        max_workers=workers,
+        max_queue=env_int("IDCARD_OCR_QUEUE_SIZE", workers * 4, minimum=0),
+        retry_after=env_int("IDCARD_OCR_RETRY_AFTER", 1, minimum=1),
+    )
+
+
+# Threads do not survive a fork: a forked worker (see ``idcard_ocr.prefork``) builds its own pool.
+os.register_at_fork(after_in_child=get_executor.cache_clear)
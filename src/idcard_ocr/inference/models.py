@@ -1,8 +1,8 @@
 """Dataclasses that capture structured OCR outputs for Chinese ID cards."""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Any, Optional
 
 
 @dataclass(slots=True)
@@ -33,9 +33,39 @@ class BackSideResult:
     valid_period: FieldResult
 
 
+@dataclass(slots=True)
+class SideProcessingInfo:
+    """Records how one side image travelled through the OCR pipeline."""
+
+    scale: float = 1.0
+    card_localized: bool = False
+    path: str = "full"
+    angle_cls: str = "off"
+    angle_cls_lines: int = 0
+    field_tiers: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class ProcessingInfo:
+    """Pipeline details for both sides, surfaced as response metadata."""
+
+    front: SideProcessingInfo = field(default_factory=SideProcessingInfo)
+    back: SideProcessingInfo = field(default_factory=SideProcessingInfo)
+    side_source: str = "upload"
+
+
+@dataclass(slots=True)
+class SideOcrOutput:
+    """Raw PaddleOCR-style detections for one image plus its processing info."""
+
+    detections: list[Any]
+    info: SideProcessingInfo
+
+
 @dataclass(slots=True)
 class IdCardResult:
     """Aggregates front and back recognition results."""
 
     front: FrontSideResult
     back: BackSideResult
+    processing: Optional[ProcessingInfo] = None
@@ -3,11 +3,11 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Iterable, List, Sequence
+from typing import Any, Callable, Collection, Iterable, List, Sequence
 
 from idcard_ocr.inference.models import BackSideResult, FieldResult, FrontSideResult, IdCardResult
 
-_LABEL_PATTERNS = {
+LABEL_PATTERNS = {
     "name": ("姓名",),
     "gender": ("性别",),
     "ethnicity": ("民族",),
@@ -27,7 +27,7 @@ _ID_NUMBER_PATTERN = re.compile(r"[0-9Xx]{15,18}")
 _DATE_PATTERN = re.compile(
     r"(19|20)\d{2}(?:\s*[年.-]\s*)?(1[0-2]|0?[1-9])(?:\s*[月.-]\s*)?(3[01]|[12]\d|0?[1-9])\s*日?"
 )
-_PERIOD_PATTERN = re.compile(
+PERIOD_PATTERN = re.compile(
     r"(19|20)\d{2}[.年-](1[0-2]|0?[1-9])[.月-](3[01]|[12]\d|0?[1-9])日?\s*[-~到至]\s*"
     r"(长期|(19|20)\d{2}[.年-](1[0-2]|0?[1-9])[.月-](3[01]|[12]\d|0?[1-9])日?)"
 )
@@ -38,9 +38,13 @@ _ETHNICITY_INLINE_PATTERN = re.compile(r"民族[：:\s]*([\w\u4e00-\u9fa5]+)")
 
 @dataclass(slots=True)
 class Line:
+    """One recognized text line; ``index`` and ``box`` locate its detection in the page."""
+
     text: str
     normalized: str
     confidence: float
+    index: int = -1
+    box: Any = None
 
 
 def _normalize_text(text: str) -> str:
@@ -75,21 +79,60 @@ def _iter_detections(raw: Iterable[Sequence]) -> List[Line]:
             break
         candidate = next_level
 
-    for det in candidate:
+    for index, det in enumerate(candidate):
         if not _looks_like_detection(det):
             continue
         try:
-            _, (text, score) = det
+            box, (text, score) = det
         except (TypeError, ValueError):
             continue
         if not text:
             continue
-        detections.append(Line(text=text, normalized=_normalize_text(text), confidence=float(score)))
+        detections.append(
+            Line(text=text, normalized=_normalize_text(text), confidence=float(score), index=index, box=box)
+        )
     return detections
 
 
-def _starts_with_any(line: Line, labels: tuple[str, ...], tolerance: int = 0) -> bool:
-    return _match_label_and_remainder(line.normalized, labels, tolerance)[1] is not None
+@dataclass(slots=True)
+class _LabelIndex:
+    """Per-line label matches computed once and shared by every extractor.
+
+    ``matches[i]`` maps each field key whose label (with that key's
+    tolerance) prefixes line ``i`` to ``(remainder, match_length)``;
+    ``id_numbers[i]`` holds the first ID-number-like run on line ``i``; and
+    ``by_key`` lists, per key, the positions of lines starting with its label.
+    """
+
+    lines: List[Line]
+    matches: List[dict[str, tuple[str, int]]]
+    id_numbers: List[str | None]
+    by_key: dict[str, List[int]]
+
+    def has_other_label(self, pos: int, key: str) -> bool:
+        return any(other_key != key for other_key in self.matches[pos])
+
+    def should_stop_collecting(self, pos: int, key: str) -> bool:
+        return self.id_numbers[pos] is not None or self.has_other_label(pos, key)
+
+
+def _build_label_index(lines: List[Line]) -> _LabelIndex:
+    matches: List[dict[str, tuple[str, int]]] = []
+    id_numbers: List[str | None] = []
+    by_key: dict[str, List[int]] = {key: [] for key in LABEL_PATTERNS}
+    for pos, line in enumerate(lines):
+        line_matches: dict[str, tuple[str, int]] = {}
+        for key, patterns in LABEL_PATTERNS.items():
+            remainder, match_len = _match_label_and_remainder(
+                line.normalized, patterns, _LABEL_TOLERANCE.get(key, 0)
+            )
+            if match_len is not None:
+                line_matches[key] = (remainder, match_len)
+                by_key[key].append(pos)
+        matches.append(line_matches)
+        id_match = _ID_NUMBER_PATTERN.search(line.normalized)
+        id_numbers.append(id_match.group(0) if id_match else None)
+    return _LabelIndex(lines=lines, matches=matches, id_numbers=id_numbers, by_key=by_key)
 
 
 def _match_label_and_remainder(
@@ -118,88 +161,89 @@ def _label_match_length(text: str, label: str, tolerance: int) -> int | None:
     return None
 
 
-def _should_stop_collecting(line: Line, key: str) -> bool:
-    if _ID_NUMBER_PATTERN.search(line.normalized):
-        return True
-    for other_key, other_patterns in _LABEL_PATTERNS.items():
-        if other_key == key:
-            continue
-        tolerance = _LABEL_TOLERANCE.get(other_key, 0)
-        if _starts_with_any(line, other_patterns, tolerance):
-            return True
-    return False
+def leading_label(text: str) -> tuple[str, str] | None:
+    """The field key and label a detection starts with, as the parser reads it.
+
+    Matching uses the parser's normalization and per-field tolerance, and
+    prefers the longest label; ``None`` when the detection starts with no label.
+    """
+
+    normalized = _normalize_text(text)
+    best: tuple[str, str] | None = None
+    for key, patterns in LABEL_PATTERNS.items():
+        for label in patterns:
+            if best is not None and len(label) <= len(best[1]):
+                continue
+            if _label_match_length(normalized, label, _LABEL_TOLERANCE.get(key, 0)) is not None:
+                best = (key, label)
+    return best
+
+
+def _count_digits(text: str) -> int:
+    return sum(1 for char in text if "0" <= char <= "9")
 
 
 def _collect_following_lines(
-    lines: List[Line],
+    index: _LabelIndex,
     start_idx: int,
     key: str,
-    tolerance: int,
     *,
     initial_value: str = "",
 ) -> tuple[str, List[Line]]:
     fragments: List[str] = []
     collected: List[Line] = []
-    digits = re.sub(r"[^0-9]", "", initial_value) if key == "birth_date" else None
+    digit_count = _count_digits(initial_value) if key == "birth_date" else None
 
-    for follow in lines[start_idx:]:
-        if _starts_with_any(follow, _LABEL_PATTERNS[key], tolerance):
+    for pos in range(start_idx, len(index.lines)):
+        if key in index.matches[pos]:
             continue
-        if _should_stop_collecting(follow, key):
+        if index.should_stop_collecting(pos, key):
             break
+        follow = index.lines[pos]
         collected.append(follow)
         fragments.append(follow.normalized)
-        if digits is not None:
-            digits = re.sub(r"[^0-9]", "", initial_value + "".join(fragments))
-            if len(digits) >= 8:
+        if digit_count is not None:
+            digit_count += _count_digits(follow.normalized)
+            if digit_count >= 8:
                 break
 
     return "".join(fragments), collected
 
 
-def _extract_value(lines: List[Line], key: str) -> tuple[str | None, List[Line]]:
-    patterns = _LABEL_PATTERNS[key]
-    tolerance = _LABEL_TOLERANCE.get(key, 0)
-    for idx, line in enumerate(lines):
-        remainder, match_len = _match_label_and_remainder(line.normalized, patterns, tolerance)
-        if match_len is None:
-            continue
-        consumed = [line]
+def _extract_value(index: _LabelIndex, key: str) -> tuple[str | None, List[Line]]:
+    lines = index.lines
+    for idx in index.by_key[key]:
+        remainder, _ = index.matches[idx][key]
+        consumed = [lines[idx]]
         if remainder:
             if key == "birth_date":
                 extra_value, extra_lines = _collect_following_lines(
-                    lines, idx + 1, key, tolerance, initial_value=remainder
+                    index, idx + 1, key, initial_value=remainder
                 )
                 if extra_lines:
                     consumed.extend(extra_lines)
                     remainder += extra_value
             return remainder, consumed
         if key in {"address", "birth_date"}:
-            extra_value, extra_lines = _collect_following_lines(lines, idx + 1, key, tolerance)
+            extra_value, extra_lines = _collect_following_lines(index, idx + 1, key)
             if extra_lines:
                 consumed.extend(extra_lines)
                 return extra_value, consumed
         if idx + 1 < len(lines):
-            next_line = lines[idx + 1]
-            if _ID_NUMBER_PATTERN.search(next_line.normalized):
+            if index.id_numbers[idx + 1] is not None:
                 continue
-            if any(
-                _starts_with_any(next_line, other_patterns, _LABEL_TOLERANCE.get(other_key, 0))
-                for other_key, other_patterns in _LABEL_PATTERNS.items()
-                if other_key != key
-            ):
+            if index.has_other_label(idx + 1, key):
                 continue
+            next_line = lines[idx + 1]
             consumed.append(next_line)
             return next_line.normalized, consumed
     return None, []
 
 
-def _extract_id_number(lines: List[Line]) -> tuple[str | None, List[Line]]:
-    for line in lines:
-        match = _ID_NUMBER_PATTERN.search(line.normalized)
-        if match:
-            value = match.group(0).upper()
-            return value, [line]
+def _extract_id_number(index: _LabelIndex) -> tuple[str | None, List[Line]]:
+    for line, value in zip(index.lines, index.id_numbers):
+        if value is not None:
+            return value.upper(), [line]
     return None, []
 
 
@@ -255,7 +299,7 @@ def _extract_ethnicity(lines: List[Line]) -> tuple[str | None, List[Line]]:
 
 def _extract_period(lines: List[Line]) -> tuple[str | None, List[Line]]:
     for line in lines:
-        match = _PERIOD_PATTERN.search(line.normalized)
+        match = PERIOD_PATTERN.search(line.normalized)
         if match:
             value = match.group(0)
             value = value.replace("年", ".").replace("月", ".").replace("日", "")
@@ -271,50 +315,121 @@ def _aggregate_confidence(consumed: List[Line]) -> float | None:
     return sum(line.confidence for line in consumed) / len(consumed)
 
 
-def parse_id_card(front_raw: Iterable[Sequence], back_raw: Iterable[Sequence]) -> IdCardResult:
-    """Convert PaddleOCR outputs for both sides into structured results."""
-
-    front_lines = _iter_detections(front_raw)
-    back_lines = _iter_detections(back_raw)
-
-    name_value, name_lines = _extract_value(front_lines, "name")
-    gender_value, gender_lines = _extract_gender(front_lines)
-    if not gender_value:
-        gender_value, gender_lines = _extract_value(front_lines, "gender")
-    ethnicity_value, ethnicity_lines = _extract_ethnicity(front_lines)
-    if not ethnicity_value:
-        ethnicity_value, ethnicity_lines = _extract_value(front_lines, "ethnicity")
-    birth_value, birth_lines = _extract_birth_date(front_lines)
-    if not birth_value:
-        birth_value, birth_lines = _extract_value(front_lines, "birth_date")
-    if birth_value:
-        normalized_birth = _normalize_birth_date(birth_value)
-        if normalized_birth:
-            birth_value = normalized_birth
-    address_value, address_lines = _extract_value(front_lines, "address")
-    id_number_value, id_number_lines = _extract_id_number(front_lines)
-    if not id_number_value:
-        id_number_value, id_number_lines = _extract_value(front_lines, "id_number")
-
-    issuing_value, issuing_lines = _extract_value(back_lines, "issuing_authority")
-    period_value, period_lines = _extract_period(back_lines)
-    if not period_value:
-        period_value, period_lines = _extract_value(back_lines, "valid_period")
-
-    front = FrontSideResult(
-        name=FieldResult(value=name_value, confidence=_aggregate_confidence(name_lines)),
-        gender=FieldResult(value=gender_value, confidence=_aggregate_confidence(gender_lines)),
-        ethnicity=FieldResult(value=ethnicity_value, confidence=_aggregate_confidence(ethnicity_lines)),
-        birth_date=FieldResult(value=birth_value, confidence=_aggregate_confidence(birth_lines)),
-        address=FieldResult(value=address_value, confidence=_aggregate_confidence(address_lines)),
-        id_number=FieldResult(value=id_number_value, confidence=_aggregate_confidence(id_number_lines)),
-    )
-    back = BackSideResult(
-        issuing_authority=FieldResult(value=issuing_value, confidence=_aggregate_confidence(issuing_lines)),
-        valid_period=FieldResult(value=period_value, confidence=_aggregate_confidence(period_lines)),
-    )
-
-    return IdCardResult(front=front, back=back)
+def _extract_front_gender(lines: List[Line], index: _LabelIndex) -> tuple[str | None, List[Line]]:
+    value, consumed = _extract_gender(lines)
+    if not value:
+        value, consumed = _extract_value(index, "gender")
+    return value, consumed
+
+
+def _extract_front_ethnicity(lines: List[Line], index: _LabelIndex) -> tuple[str | None, List[Line]]:
+    value, consumed = _extract_ethnicity(lines)
+    if not value:
+        value, consumed = _extract_value(index, "ethnicity")
+    return value, consumed
+
+
+def _extract_front_birth_date(lines: List[Line], index: _LabelIndex) -> tuple[str | None, List[Line]]:
+    value, consumed = _extract_birth_date(lines)
+    if not value:
+        value, consumed = _extract_value(index, "birth_date")
+    if value:
+        normalized = _normalize_birth_date(value)
+        if normalized:
+            value = normalized
+    return value, consumed
+
+
+def _extract_front_id_number(lines: List[Line], index: _LabelIndex) -> tuple[str | None, List[Line]]:
+    value, consumed = _extract_id_number(index)
+    if not value:
+        value, consumed = _extract_value(index, "id_number")
+    return value, consumed
+
+
+def _extract_back_period(lines: List[Line], index: _LabelIndex) -> tuple[str | None, List[Line]]:
+    value, consumed = _extract_period(lines)
+    if not value:
+        value, consumed = _extract_value(index, "valid_period")
+    return value, consumed
+
+
+_Extractor = Callable[[List[Line], _LabelIndex], tuple[str | None, List[Line]]]
+
+_FRONT_EXTRACTORS: dict[str, _Extractor] = {
+    "name": lambda lines, index: _extract_value(index, "name"),
+    "gender": _extract_front_gender,
+    "ethnicity": _extract_front_ethnicity,
+    "birth_date": _extract_front_birth_date,
+    "address": lambda lines, index: _extract_value(index, "address"),
+    "id_number": _extract_front_id_number,
+}
+_BACK_EXTRACTORS: dict[str, _Extractor] = {
+    "issuing_authority": lambda lines, index: _extract_value(index, "issuing_authority"),
+    "valid_period": _extract_back_period,
+}
+
+FRONT_FIELDS: tuple[str, ...] = tuple(_FRONT_EXTRACTORS)
+BACK_FIELDS: tuple[str, ...] = tuple(_BACK_EXTRACTORS)
+ALL_FIELDS: tuple[str, ...] = FRONT_FIELDS + BACK_FIELDS
+
+
+def select_fields(names: Iterable[str] | None) -> frozenset[str] | None:
+    """Validate requested field names; ``None`` selects every field.
+
+    Raises ``ValueError`` for unknown or no names.
+    """
+
+    if names is None:
+        return None
+    selected = frozenset(name.strip() for name in names if name.strip())
+    unknown = sorted(selected.difference(ALL_FIELDS))
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}; choose from: {', '.join(ALL_FIELDS)}")
+    if not selected:
+        raise ValueError("no fields requested")
+    return selected
+
+
+def _parse_side(
+    raw: Iterable[Sequence],
+    extractors: dict[str, _Extractor],
+    wanted: Collection[str],
+    sources: dict[str, List[Line]] | None,
+) -> dict[str, FieldResult]:
+    results = {key: FieldResult(value=None, confidence=None) for key in extractors}
+    keys = [key for key in extractors if key in wanted]
+    if not keys:
+        return results
+    lines = _iter_detections(raw)
+    index = _build_label_index(lines)
+    for key in keys:
+        value, consumed = extractors[key](lines, index)
+        results[key] = FieldResult(value=value, confidence=_aggregate_confidence(consumed))
+        if sources is not None:
+            sources[key] = consumed
+    return results
+
+
+def parse_id_card(
+    front_raw: Iterable[Sequence],
+    back_raw: Iterable[Sequence],
+    *,
+    sources: dict[str, List[Line]] | None = None,
+    fields: Collection[str] | None = None,
+) -> IdCardResult:
+    """Convert PaddleOCR outputs for both sides into structured results.
+
+    When ``sources`` is given it is filled with the lines each field was
+    read from, keyed by field name. ``fields`` restricts extraction to those
+    field names; the others are returned empty, and a side without any
+    requested field is not even split into lines.
+    """
+
+    wanted = ALL_FIELDS if fields is None else fields
+    front = _parse_side(front_raw, _FRONT_EXTRACTORS, wanted, sources)
+    back = _parse_side(back_raw, _BACK_EXTRACTORS, wanted, sources)
+    return IdCardResult(front=FrontSideResult(**front), back=BackSideResult(**back))
 
 
 def _normalize_birth_date(value: str) -> str | None:
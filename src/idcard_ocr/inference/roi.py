@@ -0,0 +1,185 @@
+"""Template fast path: recognize fixed field regions of a normalized card.
+
+On a card warped to ``CARD_WIDTH`` x ``CARD_HEIGHT`` every field sits at a
+known position, so the text detector can be skipped and only the
+recognizer runs on the predefined regions below. The recognized values
+are turned back into label-prefixed detections so the regular parser and
+``raw_text`` output keep working unchanged.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Collection, Sequence
+
+import numpy as np
+
+from idcard_ocr.inference.card import CARD_HEIGHT, CARD_WIDTH
+from idcard_ocr.inference.models import BackSideResult, FrontSideResult
+from idcard_ocr.inference.parser import BACK_FIELDS, FRONT_FIELDS, parse_id_card
+from idcard_ocr.inference.validation import (
+    birth_date_from_id_number,
+    gender_from_id_number,
+    is_valid_id_number,
+    is_valid_period,
+)
+from idcard_ocr.utils.config import env_float
+
+# (label prefix, value regions as (left, top, right, bottom) card fractions).
+# Multi-region fields are read line by line and joined.
+FRONT_ROIS: dict[str, tuple[str, tuple[tuple[float, float, float, float], ...]]] = {
+    "name": ("姓名", ((0.17, 0.08, 0.60, 0.20),)),
+    "gender": ("性别", ((0.17, 0.21, 0.29, 0.32),)),
+    "ethnicity": ("民族", ((0.38, 0.21, 0.58, 0.32),)),
+    "birth_date": ("出生", ((0.17, 0.33, 0.62, 0.45),)),
+    "address": ("住址", ((0.17, 0.46, 0.63, 0.56), (0.17, 0.55, 0.63, 0.65), (0.17, 0.64, 0.63, 0.74))),
+    "id_number": ("公民身份号码", ((0.32, 0.78, 0.95, 0.92),)),
+}
+BACK_ROIS: dict[str, tuple[str, tuple[tuple[float, float, float, float], ...]]] = {
+    "issuing_authority": ("签发机关", ((0.38, 0.70, 0.92, 0.81),)),
+    "valid_period": ("有效期限", ((0.38, 0.81, 0.92, 0.93),)),
+}
+
+_LINE_DROP_SCORE = 0.5
+# Vertical slack around a field's rows when keeping detected lines for it.
+_BAND_MARGIN = 0.03
+
+
+@dataclass(slots=True)
+class _Region:
+    key: str
+    label: str
+    box: list[list[int]]
+
+
+def _layout(side: str, fields: Collection[str] | None) -> dict[str, tuple[str, tuple[Any, ...]]]:
+    layout = FRONT_ROIS if side == "front" else BACK_ROIS
+    if fields is None:
+        return layout
+    return {key: value for key, value in layout.items() if key in fields}
+
+
+def _regions(side: str, fields: Collection[str] | None = None) -> list[_Region]:
+    regions: list[_Region] = []
+    for key, (label, boxes) in _layout(side, fields).items():
+        for left, top, right, bottom in boxes:
+            x0, y0 = int(left * CARD_WIDTH), int(top * CARD_HEIGHT)
+            x1, y1 = int(right * CARD_WIDTH), int(bottom * CARD_HEIGHT)
+            regions.append(_Region(key, label, [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]))
+    return regions
+
+
+def field_bands(side: str, fields: Collection[str]) -> list[tuple[float, float]]:
+    """Vertical card bands, as (top, bottom) fractions, holding the rows of ``fields``.
+
+    A field's label shares its value's row, so detected lines centred in
+    these bands are the only ones the parser needs for those fields.
+    """
+
+    return [
+        (max(0.0, top - _BAND_MARGIN), min(1.0, bottom + _BAND_MARGIN))
+        for _, boxes in _layout(side, fields).values()
+        for _, top, _, bottom in boxes
+    ]
+
+
+def _is_doubtful(field: Any, min_confidence: float) -> bool:
+    return not field.value or (field.confidence or 0.0) < min_confidence
+
+
+def _front_is_consistent(
+    front: FrontSideResult, min_confidence: float, fields: Collection[str] = FRONT_FIELDS
+) -> bool:
+    if any(_is_doubtful(getattr(front, key), min_confidence) for key in fields):
+        return False
+    if "id_number" not in fields:
+        return True
+    id_number = front.id_number.value
+    if not is_valid_id_number(id_number):
+        return False
+    if "birth_date" in fields and birth_date_from_id_number(id_number) != front.birth_date.value:
+        return False
+    return "gender" not in fields or gender_from_id_number(id_number) == front.gender.value
+
+
+def _back_is_consistent(
+    back: BackSideResult, min_confidence: float, fields: Collection[str] = BACK_FIELDS
+) -> bool:
+    if any(_is_doubtful(getattr(back, key), min_confidence) for key in fields):
+        return False
+    return "valid_period" not in fields or is_valid_period(back.valid_period.value)
+
+
+class RoiReader:
+    """Read card fields from template regions and keep hit/fallback counters."""
+
+    def __init__(self, min_confidence: float) -> None:
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._attempts = {"front": 0, "back": 0}
+        self._hits = {"front": 0, "back": 0}
+
+    def read(
+        self,
+        card_image: np.ndarray,
+        side: str,
+        recognize: Callable[[Sequence[Any]], Sequence[tuple[str, float]]],
+        fields: Collection[str] | None = None,
+    ) -> list[list[Any]] | None:
+        """Return label-prefixed detections for ``side``, or ``None`` to request the full path.
+
+        With ``fields`` only their regions are recognized and checked.
+        """
+
+        regions = _regions(side, fields)
+        crops = [card_image[r.box[0][1] : r.box[2][1], r.box[0][0] : r.box[2][0]] for r in regions]
+        recognized = recognize(crops)
+
+        merged: dict[str, list[Any]] = {}
+        for region, (text, score) in zip(regions, recognized):
+            text = (text or "").strip()
+            entry = merged.get(region.key)
+            if entry is None:
+                merged[region.key] = [region.box, region.label + text, [score]]
+            elif text and score >= _LINE_DROP_SCORE:
+                # Continuation line of a multi-line field such as the address.
+                entry[0] = [entry[0][0], entry[0][1], region.box[2], region.box[3]]
+                entry[1] += text
+                entry[2].append(score)
+        detections = [[box, (text, sum(scores) / len(scores))] for box, text, scores in merged.values()]
+
+        if side == "front":
+            keys = FRONT_FIELDS if fields is None else [key for key in FRONT_FIELDS if key in fields]
+            front = parse_id_card(detections, [], fields=keys).front
+            ok = _front_is_consistent(front, self.min_confidence, keys)
+        else:
+            keys = BACK_FIELDS if fields is None else [key for key in BACK_FIELDS if key in fields]
+            back = parse_id_card([], detections, fields=keys).back
+            ok = _back_is_consistent(back, self.min_confidence, keys)
+        with self._lock:
+            self._attempts[side] += 1
+            if ok:
+                self._hits[side] += 1
+        return [detections] if ok else None
+
+    def stats(self) -> dict[str, Any]:
+        """Return attempts, hits, and hit ratio per side."""
+
+        with self._lock:
+            return {
+                side: {
+                    "attempts": self._attempts[side],
+                    "hits": self._hits[side],
+                    "fallbacks": self._attempts[side] - self._hits[side],
+                    "hit_ratio": self._hits[side] / self._attempts[side] if self._attempts[side] else 0.0,
+                }
+                for side in ("front", "back")
+            }
+
+
+@lru_cache(maxsize=1)
+def get_roi_reader() -> RoiReader:
+    """Return the shared ROI reader configured by ``IDCARD_OCR_ROI_MIN_CONFIDENCE``."""
+
+    return RoiReader(min_confidence=env_float("IDCARD_OCR_ROI_MIN_CONFIDENCE", 0.85, minimum=0.0))
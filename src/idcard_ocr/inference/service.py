@@ -1,19 +1,195 @@
 """High-level interface that ties together OCR detection and field parsing."""
 from __future__ import annotations
 
-from typing import Iterable, Sequence
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterable
 
-from idcard_ocr.inference.engine import run_ocr
-from idcard_ocr.inference.models import IdCardResult
-from idcard_ocr.inference.parser import extract_text_lines, parse_id_card
+from idcard_ocr.inference.cache import cache_key, get_result_cache
+from idcard_ocr.inference.corpus import get_corpus_writer
+from idcard_ocr.inference.cascade import cascade_enabled
+from idcard_ocr.inference.engine import engine_fingerprint, max_image_side, ocr_side, roi_fast_path_enabled
+from idcard_ocr.inference.executor import get_executor
+from idcard_ocr.inference.models import IdCardResult, ProcessingInfo, SideOcrOutput, SideProcessingInfo
+from idcard_ocr.inference.parser import (
+    BACK_FIELDS,
+    FRONT_FIELDS,
+    extract_text_lines,
+    parse_id_card,
+    select_fields,
+)
+from idcard_ocr.inference.sides import (
+    classify_side,
+    should_swap,
+    side_detection_enabled,
+    side_from_labels,
+    split_card_photo,
+)
+from idcard_ocr.utils.metrics import SIDE_SWAPS, metrics_enabled, stage_timer
 
 
-def analyze_id_card(front_image: bytes, back_image: bytes) -> tuple[IdCardResult, list[str], list[str]]:
-    """Run PaddleOCR on both sides of the ID card and parse structured data."""
+@lru_cache(maxsize=1)
+def _get_side_executor() -> ThreadPoolExecutor:
+    """Threads used to OCR the second side while the caller handles the first.
 
-    front_raw: Iterable[Sequence] = run_ocr(front_image)
-    back_raw: Iterable[Sequence] = run_ocr(back_image)
-    result = parse_id_card(front_raw, back_raw)
-    front_text = extract_text_lines(front_raw)
-    back_text = extract_text_lines(back_raw)
+    Sized to the request executor so every in-flight request can offload one
+    side without queuing behind another request.
+    """
+
+    return ThreadPoolExecutor(max_workers=get_executor().max_workers, thread_name_prefix="idcard-ocr-side")
+
+
+os.register_at_fork(after_in_child=_get_side_executor.cache_clear)
+
+
+def analyze_id_card(
+    front_image: bytes | None,
+    back_image: bytes | None,
+    *,
+    capture: bool = False,
+    fields: Iterable[str] | None = None,
+    detect_sides: bool | None = None,
+) -> tuple[IdCardResult, list[str], list[str]]:
+    """Run PaddleOCR on both sides of the ID card in parallel and parse structured data.
+
+    ``fields`` limits the work to those field names: a side without any of
+    them is not OCRed (its image may be ``None``), the other side only
+    recognizes what those fields need, and unrequested fields are returned
+    empty. With side detection (``detect_sides``, by default
+    ``IDCARD_OCR_SIDE_DETECTION``) a pair uploaded the wrong way round is
+    reordered before recognition, or after it from the recognized labels.
+    Identical submissions are answered from the result cache, and
+    concurrent identical submissions share a single inference. With
+    ``capture`` (or when sampled) and ``IDCARD_OCR_CAPTURE_PATH`` set, the
+    anonymized raw detections of full requests are appended to the replay
+    corpus; cache hits are not captured again. A ``fields`` request never
+    has the full detections, so asking for ``capture`` with it raises
+    ``ValueError`` and sampling skips it.
+    """
+
+    selected = requested_fields(fields, capture)
+    front_fields = _side_fields(FRONT_FIELDS, selected)
+    back_fields = _side_fields(BACK_FIELDS, selected)
+    if front_image is None and front_fields != ():
+        raise ValueError("front_image is required for the requested fields")
+    if back_image is None and back_fields != ():
+        raise ValueError("back_image is required for the requested fields")
+    detect = side_detection_enabled() if detect_sides is None else detect_sides
+    detect = detect and front_image is not None and back_image is not None
+    if not detect:
+        # Which side is unneeded is only known after detection, so keep both images for it.
+        if front_fields == ():
+            front_image = None
+        if back_fields == ():
+            back_image = None
+
+    writer = get_corpus_writer()
+    capture = selected is None and writer is not None and writer.should_capture(capture)
+    cache = get_result_cache()
+    if cache is None:
+        return _analyze_id_card(front_image, back_image, capture, selected, detect)
+    namespace = "analyze" if selected is None else "analyze:" + ",".join(sorted(selected))
+    if detect:
+        namespace += ":sides"
+    key = cache_key(namespace, engine_fingerprint(), front_image or b"", back_image or b"")
+    return cache.get_or_compute(
+        key, lambda: _analyze_id_card(front_image, back_image, capture, selected, detect)
+    )
+
+
+def analyze_combined_id_card(
+    image: bytes, *, capture: bool = False, fields: Iterable[str] | None = None
+) -> tuple[IdCardResult, list[str], list[str]]:
+    """Recognize one photo holding both sides of the card.
+
+    The photo is split into its two cards and side detection decides which
+    is the front. Raises ``CardSplitError`` when two cards cannot be found.
+    """
+
+    requested_fields(fields, capture)  # reject bad options before splitting
+    with stage_timer("split"):
+        first, second = split_card_photo(image, max_image_side())
+    return analyze_id_card(first, second, capture=capture, fields=fields, detect_sides=True)
+
+
+def requested_fields(fields: Iterable[str] | None, capture: bool = False) -> frozenset[str] | None:
+    """Validate the ``fields`` of a request; ``None`` selects every field.
+
+    Capture records both sides' full raw output, which a ``fields`` request
+    does not produce, so the two options cannot be combined.
+    """
+
+    selected = select_fields(fields)
+    if capture and selected is not None:
+        raise ValueError("capture records the full recognition and cannot be combined with fields")
+    return selected
+
+
+def _side_fields(side_fields: tuple[str, ...], selected: frozenset[str] | None) -> tuple[str, ...] | None:
+    """The requested fields of one side; ``None`` means all of them."""
+
+    if selected is None:
+        return None
+    return tuple(name for name in side_fields if name in selected)
+
+
+def _ocr_requested_side(image: bytes | None, side: str, selected: frozenset[str] | None) -> SideOcrOutput:
+    if image is None:
+        return SideOcrOutput(detections=[], info=SideProcessingInfo(path="skipped"))
+    if selected is None:
+        return ocr_side(image, side)
+    return ocr_side(image, side, _side_fields(FRONT_FIELDS if side == "front" else BACK_FIELDS, selected))
+
+
+def _analyze_id_card(
+    front_image: bytes | None,
+    back_image: bytes | None,
+    capture: bool = False,
+    selected: frozenset[str] | None = None,
+    detect: bool = False,
+) -> tuple[IdCardResult, list[str], list[str]]:
+    side_source = "upload"
+    # The full path reads whatever text is there, so labels alone can reorder it afterwards;
+    # only side-specific processing needs the sides known up front.
+    if detect and (selected is not None or roi_fast_path_enabled() or cascade_enabled()):
+        with stage_timer("side_detection"):
+            guesses = (classify_side(front_image), classify_side(back_image))
+        if should_swap(*guesses):
+            front_image, back_image = back_image, front_image
+            side_source = "emblem"
+    if detect:
+        if _side_fields(FRONT_FIELDS, selected) == ():
+            front_image = None
+        if _side_fields(BACK_FIELDS, selected) == ():
+            back_image = None
+    if front_image is not None and back_image is not None:
+        # Run in a copy of the caller's context so per-request stage timings follow the work.
+        front_future = _get_side_executor().submit(
+            contextvars.copy_context().run, _ocr_requested_side, front_image, "front", selected
+        )
+        try:
+            back = _ocr_requested_side(back_image, "back", selected)
+        except BaseException:
+            front_future.cancel()
+            raise
+        front = front_future.result()
+    else:
+        front = _ocr_requested_side(front_image, "front", selected)
+        back = _ocr_requested_side(back_image, "back", selected)
+    if detect and front_image is not None and back_image is not None:
+        # Labels are a stronger signal than colour, and cost nothing once the text is recognized.
+        if should_swap(side_from_labels(front.detections), side_from_labels(back.detections)):
+            front, back = back, front
+            side_source = "labels"
+    if side_source != "upload" and metrics_enabled():
+        SIDE_SWAPS.inc(method=side_source)
+    with stage_timer("parse"):
+        result = parse_id_card(front.detections, back.detections, fields=selected)
+    result.processing = ProcessingInfo(front=front.info, back=back.info, side_source=side_source)
+    if capture:
+        get_corpus_writer().record(front.detections, back.detections, fingerprint=engine_fingerprint())
+    front_text = extract_text_lines(front.detections)
+    back_text = extract_text_lines(back.detections)
     return result, front_text, back_text
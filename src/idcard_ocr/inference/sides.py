@@ -0,0 +1,183 @@
+"""Tell the front (portrait) side of an ID card from the back (emblem) side.
+
+The back carries the red national emblem in its top-left corner, so a
+low-resolution decode of the localized card is enough to classify it from
+colour alone, before any model runs. Recognized text gives a second,
+stronger opinion for free: the field labels of the two sides never
+overlap. A photo holding both sides can also be cut into two card images.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+from io import BytesIO
+from typing import Any
+
+import numpy as np
+from PIL import Image
+
+from idcard_ocr.inference.card import CARD_HEIGHT, CARD_WIDTH, find_card_quads, localize_card
+from idcard_ocr.inference.parser import BACK_FIELDS, FRONT_FIELDS, LABEL_PATTERNS, extract_text_lines
+from idcard_ocr.utils.config import env_bool
+from idcard_ocr.utils.image import ImageDecodingError, decode_image
+
+FRONT = "front"
+BACK = "back"
+
+_CLASSIFY_LONG_SIDE = 320
+_CLASSIFY_CARD_SIZE = (CARD_WIDTH // 4, CARD_HEIGHT // 4)
+# Emblem corner of an upright back as (left, top, right, bottom) card fractions.
+_EMBLEM_REGION = (0.04, 0.05, 0.28, 0.42)
+_MIN_EMBLEM_RED = 0.04
+_MAX_FRONT_RED = 0.005
+# Share of emblem red that marks a back anywhere in a photo where no card outline was found.
+_MIN_PHOTO_RED = 0.005
+# Mean per-pixel channel spread below which a card is treated as greyscale.
+_MIN_COLOURFULNESS = 12.0
+
+_FRONT_LABELS = tuple(label for key in FRONT_FIELDS for label in LABEL_PATTERNS[key])
+_BACK_LABELS = tuple(label for key in BACK_FIELDS for label in LABEL_PATTERNS[key]) + ("居民身份证",)
+
+_SPLIT_MARGIN = 0.04
+_SINGLE_CARD_AREA_RATIO = 0.5
+_SPLIT_JPEG_QUALITY = 95
+
+
+class CardSplitError(ValueError):
+    """Raised when a photo does not hold two separable card sides."""
+
+
+@lru_cache(maxsize=1)
+def side_detection_enabled() -> bool:
+    """Whether uploads are checked for swapped sides (``IDCARD_OCR_SIDE_DETECTION``)."""
+
+    return env_bool("IDCARD_OCR_SIDE_DETECTION", True)
+
+
+def _region(card: np.ndarray, box: tuple[float, float, float, float]) -> np.ndarray:
+    height, width = card.shape[:2]
+    left, top, right, bottom = box
+    return card[int(top * height) : int(bottom * height), int(left * width) : int(right * width)]
+
+
+def _red_ratio(region: np.ndarray) -> float:
+    if not region.size:
+        return 0.0
+    pixels = region.astype(np.int16)
+    red, green, blue = pixels[..., 0], pixels[..., 1], pixels[..., 2]
+    mask = (red > 100) & (green * 100 < red * 55) & (blue * 100 < red * 55)
+    return float(mask.mean())
+
+
+def _colourfulness(card: np.ndarray) -> float:
+    pixels = card.astype(np.int16)
+    return float((pixels.max(axis=2) - pixels.min(axis=2)).mean())
+
+
+def classify_card(card: np.ndarray) -> str | None:
+    """Classify a localized card by its emblem corner; ``None`` when unsure.
+
+    Localization does not fix a card that lies upside down, so the opposite
+    corner is checked as well. Only a colour image without any emblem red
+    counts as a front: a greyscale back would look the same.
+    """
+
+    upright = _red_ratio(_region(card, _EMBLEM_REGION))
+    red = max(upright, _red_ratio(_region(card[::-1, ::-1], _EMBLEM_REGION)))
+    if red >= _MIN_EMBLEM_RED:
+        return BACK
+    if red <= _MAX_FRONT_RED and _colourfulness(card) >= _MIN_COLOURFULNESS:
+        return FRONT
+    return None
+
+
+def classify_side(image_bytes: bytes) -> str | None:
+    """Guess which side an uploaded image shows from a low-resolution decode.
+
+    When no card outline is found the emblem position is unknown, so only
+    enough emblem red anywhere in the photo is taken as a sign of the back;
+    a front is never inferred from its absence.
+    """
+
+    try:
+        image = decode_image(image_bytes, _CLASSIFY_LONG_SIDE).array
+    except ImageDecodingError:
+        return None
+    card = localize_card(image, _CLASSIFY_CARD_SIZE)
+    if card.found:
+        return classify_card(card.image)
+    return BACK if _red_ratio(image) >= _MIN_PHOTO_RED else None
+
+
+def side_from_labels(detections: list[Any]) -> str | None:
+    """Which side recognized text belongs to, judged by its field labels."""
+
+    front_hits = back_hits = 0
+    for text in extract_text_lines(detections):
+        front_hits += any(label in text for label in _FRONT_LABELS)
+        back_hits += any(label in text for label in _BACK_LABELS)
+    if front_hits >= 2 and not back_hits:
+        return FRONT
+    if back_hits and not front_hits:
+        return BACK
+    return None
+
+
+def should_swap(front_guess: str | None, back_guess: str | None) -> bool:
+    """Whether two uploads are the other way round, given the sides they were classified as.
+
+    One image pointing at a swap is enough, as long as the other does not
+    confirm the uploaded order.
+    """
+
+    evidence = front_guess == BACK or back_guess == FRONT
+    contradicted = front_guess == FRONT or back_guess == BACK
+    return evidence and not contradicted
+
+
+def _encode(image: np.ndarray) -> bytes:
+    buffer = BytesIO()
+    Image.fromarray(np.ascontiguousarray(image)).save(buffer, format="JPEG", quality=_SPLIT_JPEG_QUALITY)
+    return buffer.getvalue()
+
+
+def split_card_photo(image_bytes: bytes, max_side: int | None = None) -> tuple[bytes, bytes]:
+    """Cut a photo of both card sides into two images, in reading order.
+
+    Each card is cropped with a small margin around its outline, so the
+    regular pipeline localizes it again. When two outlines cannot be found
+    the photo is halved along its long edge, which matches how the sides
+    are usually laid out on a scan. Raises ``CardSplitError`` for a photo
+    of a single card.
+    """
+
+    try:
+        image = decode_image(image_bytes, max_side).array
+    except ImageDecodingError as exc:
+        raise CardSplitError("image is not a readable image") from exc
+    height, width = image.shape[:2]
+    quads = find_card_quads(image, limit=2)
+    if len(quads) == 2:
+        boxes = []
+        for quad in quads:
+            xs, ys = [point[0] for point in quad], [point[1] for point in quad]
+            margin_x, margin_y = (max(xs) - min(xs)) * _SPLIT_MARGIN, (max(ys) - min(ys)) * _SPLIT_MARGIN
+            boxes.append(
+                (
+                    max(0, int(min(xs) - margin_x)),
+                    max(0, int(min(ys) - margin_y)),
+                    min(width, int(max(xs) + margin_x)),
+                    min(height, int(max(ys) + margin_y)),
+                )
+            )
+        # Reading order: top to bottom when the cards are stacked, otherwise left to right.
+        upper, lower = sorted(boxes, key=lambda box: box[1])
+        stacked = upper[3] <= lower[1] + (lower[3] - lower[1]) * _SPLIT_MARGIN * 2
+        first, second = (upper, lower) if stacked else sorted(boxes)
+    else:
+        if find_card_quads(image, limit=1, min_area_ratio=_SINGLE_CARD_AREA_RATIO, max_area_ratio=1.0):
+            raise CardSplitError("image shows a single card; upload front_image and back_image instead")
+        if width >= height:
+            first, second = (0, 0, width // 2, height), (width // 2, 0, width, height)
+        else:
+            first, second = (0, 0, width, height // 2), (0, height // 2, width, height)
+    return tuple(_encode(image[top:bottom, left:right]) for left, top, right, bottom in (first, second))
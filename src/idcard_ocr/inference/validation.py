@@ -0,0 +1,47 @@
+"""Consistency checks for recognized ID card fields (GB 11643-1999)."""
+from __future__ import annotations
+
+from idcard_ocr.inference.parser import PERIOD_PATTERN
+
+_ID_WEIGHTS = (7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2)
+_ID_CHECK_CODES = "10X98765432"
+
+
+def id_number_check_code(body: str) -> str:
+    """Return the GB 11643 check character for the first 17 digits of an ID number."""
+
+    total = sum(int(digit) * weight for digit, weight in zip(body, _ID_WEIGHTS))
+    return _ID_CHECK_CODES[total % 11]
+
+
+def is_valid_id_number(value: str | None) -> bool:
+    """Whether ``value`` is an 18-character ID number with a correct check character."""
+
+    if not value or len(value) != 18:
+        return False
+    body, check = value[:17], value[17].upper()
+    if not body.isdigit():
+        return False
+    return id_number_check_code(body) == check
+
+
+def birth_date_from_id_number(value: str | None) -> str | None:
+    """Return the ``YYYY-MM-DD`` birth date embedded in an 18-digit ID number."""
+
+    if not value or len(value) != 18 or not value[6:14].isdigit():
+        return None
+    return f"{value[6:10]}-{value[10:12]}-{value[12:14]}"
+
+
+def gender_from_id_number(value: str | None) -> str | None:
+    """Return 男/女 from the parity of the sequence code (odd is male)."""
+
+    if not value or len(value) != 18 or not value[16].isdigit():
+        return None
+    return "男" if int(value[16]) % 2 else "女"
+
+
+def is_valid_period(value: str | None) -> bool:
+    """Whether a normalized validity period is well formed."""
+
+    return bool(value) and PERIOD_PATTERN.fullmatch(value) is not None
@@ -0,0 +1,143 @@
+"""Load models and run warm-up inferences before the service reports ready.
+
+The first inference on a fresh PaddleOCR predictor pays for graph setup
+and memory planning; doing it at startup on built-in synthetic cards keeps
+that cost off the first real request.
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable
+
+from idcard_ocr.inference.cascade import cascade_enabled
+from idcard_ocr.inference.engine import (
+    EnginePool,
+    get_accurate_engine_pool,
+    get_engine_pool,
+    max_image_side,
+    ocr_side_uncached,
+)
+from idcard_ocr.utils.config import env_bool, env_int
+from idcard_ocr.utils.image import decode_image
+
+
+@lru_cache(maxsize=1)
+def warmup_enabled() -> bool:
+    """Whether engines are built and warmed at startup (``IDCARD_OCR_WARMUP``)."""
+
+    return env_bool("IDCARD_OCR_WARMUP", True)
+
+
+class WarmupState:
+    """Startup progress: ``pending``, ``loading``, ``warming``, then ``ready`` or ``failed``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._status = "pending"
+        self._load_seconds: float | None = None
+        self._warmup_seconds: float | None = None
+        self._error: str | None = None
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return self._status == "ready"
+
+    def mark_ready(self) -> None:
+        """Declare readiness without warming, e.g. when warm-up is disabled."""
+
+        with self._lock:
+            self._status = "ready"
+
+    def run(self, load: Callable[[], Any], warm: Callable[[Any], Any]) -> None:
+        """Run ``load`` then ``warm(loaded)``, recording durations and any failure."""
+
+        try:
+            with self._lock:
+                self._status = "loading"
+            started = time.perf_counter()
+            loaded = load()
+            with self._lock:
+                self._load_seconds = time.perf_counter() - started
+                self._status = "warming"
+            started = time.perf_counter()
+            warm(loaded)
+            with self._lock:
+                self._warmup_seconds = time.perf_counter() - started
+                self._status = "ready"
+        except Exception as exc:  # noqa: BLE001 - reported through /ready
+            with self._lock:
+                self._status = "failed"
+                self._error = str(exc) or type(exc).__name__
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "status": self._status,
+                "load_seconds": self._load_seconds,
+                "warmup_seconds": self._warmup_seconds,
+                "error": self._error,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_warmup_state() -> WarmupState:
+    """Return the process-wide warm-up state reported by ``/ready``."""
+
+    return WarmupState()
+
+
+def _warmup_images() -> tuple[bytes, bytes]:
+    from idcard_ocr.bench.synthetic import generate_card
+
+    card = generate_card("warmup", random.Random(0), photo_size=(1280, 960))
+    return card.front, card.back
+
+
+def load_engines() -> EnginePool:
+    """Build every engine in the pool (and the cascade's accurate tier) now instead of on first use."""
+
+    pool = get_engine_pool()
+    with pool.checkout_all():
+        pass
+    if cascade_enabled():
+        with get_accurate_engine_pool().checkout_all():
+            pass
+    return pool
+
+
+def warm_engines(pool: EnginePool) -> None:
+    """Run warm-up inferences on each engine, then once through the whole pipeline.
+
+    ``IDCARD_OCR_WARMUP_ITERATIONS`` (default 2) inferences run per engine;
+    the final full-pipeline pass per side also warms decoding, card
+    localization, the recognition batcher and, if enabled, the ROI path.
+    """
+
+    front, back = _warmup_images()
+    iterations = env_int("IDCARD_OCR_WARMUP_ITERATIONS", 2, minimum=0)
+    images = [decode_image(data, max_image_side()).array for data in (front, back)]
+    # Requests arriving meanwhile simply wait for an engine, as they would during a load spike.
+    with pool.checkout_all() as engines:
+        for engine in engines:
+            for iteration in range(iterations):
+                engine.ocr(images[iteration % len(images)], cls=True)
+    ocr_side_uncached(front, "front")
+    ocr_side_uncached(back, "back")
+
+
+def start_warmup() -> threading.Thread | None:
+    """Warm up on a background thread so probes are answered meanwhile; ``None`` when disabled."""
+
+    state = get_warmup_state()
+    if not warmup_enabled():
+        state.mark_ready()
+        return None
+    thread = threading.Thread(
+        target=state.run, args=(load_engines, warm_engines), name="idcard-ocr-warmup", daemon=True
+    )
+    thread.start()
+    return thread
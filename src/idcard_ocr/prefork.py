@@ -0,0 +1,349 @@
+"""Production launcher: load the models once, then fork server workers that share them.
+
+Running several uvicorn workers makes each one load every model on its
+own. Here the master process builds the engine pool, freezes the garbage
+collector's view of everything loaded so far, binds the listening socket
+and only then forks; the workers inherit the model weights copy-on-write
+and accept connections on the shared socket. The master runs no
+inference itself, since OpenMP thread pools do not survive a fork, so
+each worker still warms its engines before ``/ready`` reports ready.
+
+The master restarts workers that die (without reloading anything),
+backing off when they keep dying right after start, and periodically
+reports each worker's RSS and PSS; PSS splits shared pages between the
+processes using them, so its total is the real footprint.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from dataclasses import dataclass
+from typing import Any, Callable, Sequence
+
+from idcard_ocr.utils.config import env_int
+
+_THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+_REAP_INTERVAL = 0.5
+# A worker exiting sooner than this after start counts towards the restart back-off.
+_MIN_UPTIME = 5.0
+_MAX_BACKOFF = 30.0
+_STOP_TIMEOUT = 30.0
+_LISTEN_BACKLOG = 2048
+
+
+@dataclass(slots=True)
+class WorkerSlot:
+    """One worker position; its process is replaced when it dies."""
+
+    index: int
+    cpus: tuple[int, ...] | None = None
+    pid: int | None = None
+    started_at: float = 0.0
+    restarts: int = 0
+    quick_exits: int = 0
+    respawn_at: float = 0.0
+
+
+def available_cpus() -> list[int]:
+    """CPUs this process may run on."""
+
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def cpu_sets(workers: int, threads: int, cpus: Sequence[int]) -> list[tuple[int, ...]]:
+    """Give each worker ``threads`` consecutive CPUs, wrapping around when there are too few."""
+
+    cpus = list(cpus)
+    return [
+        tuple(sorted({cpus[(index * threads + offset) % len(cpus)] for offset in range(threads)}))
+        for index in range(workers)
+    ]
+
+
+def configure_threads(threads: int) -> None:
+    """Size every worker's compute thread pools; must run before the models are loaded.
+
+    Workers provide the parallelism, so each one gets a single engine
+    unless ``IDCARD_OCR_ENGINE_POOL_SIZE`` says otherwise, and its engines
+    share ``threads`` CPU threads.
+    """
+
+    for name in _THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    os.environ.setdefault("IDCARD_OCR_ENGINE_POOL_SIZE", "1")
+    pool_size = env_int("IDCARD_OCR_ENGINE_POOL_SIZE", 1, minimum=1)
+    os.environ.setdefault("IDCARD_OCR_ENGINE_CPU_THREADS", str(max(1, threads // pool_size)))
+
+
+def _proc_kilobytes(path: str, key: str) -> int | None:
+    try:
+        with open(path, encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith(key):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def process_memory(pid: int) -> dict[str, int | None]:
+    """Resident (RSS) and proportional (PSS) set size of a process in bytes; ``None`` where unavailable."""
+
+    return {
+        "rss_bytes": _proc_kilobytes(f"/proc/{pid}/status", "VmRSS:"),
+        "pss_bytes": _proc_kilobytes(f"/proc/{pid}/smaps_rollup", "Pss:"),
+    }
+
+
+def _megabytes(value: int | None) -> str:
+    return f"{value / (1024 * 1024):.1f}MB" if value is not None else "n/a"
+
+
+def _log(message: str) -> None:
+    print(f"[prefork] {message}", file=sys.stderr, flush=True)
+
+
+class PreforkLauncher:
+    """Fork ``workers`` processes running ``target(slot)`` and keep them running until stopped."""
+
+    def __init__(
+        self,
+        target: Callable[[WorkerSlot], int],
+        workers: int,
+        *,
+        cpu_sets: Sequence[tuple[int, ...]] | None = None,
+        report_interval: float = 60.0,
+    ) -> None:
+        self.target = target
+        self.slots = [
+            WorkerSlot(index, tuple(cpu_sets[index]) if cpu_sets else None)
+            for index in range(max(1, workers))
+        ]
+        self.report_interval = report_interval
+        self._stopping = False
+
+    def spawn(self, slot: WorkerSlot) -> int:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                if slot.cpus and hasattr(os, "sched_setaffinity"):
+                    os.sched_setaffinity(0, slot.cpus)
+                code = self.target(slot)
+            except BaseException:  # noqa: BLE001 - reported, then the master restarts the worker
+                traceback.print_exc()
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        slot.pid = pid
+        slot.started_at = time.monotonic()
+        return pid
+
+    def start(self) -> None:
+        for slot in self.slots:
+            self.spawn(slot)
+            _log(f"worker {slot.index} started (pid {slot.pid}{self._cpus_note(slot)})")
+
+    def reap(self) -> list[WorkerSlot]:
+        """Collect exited workers and schedule their restart; returns their slots."""
+
+        exited = []
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            slot = next((slot for slot in self.slots if slot.pid == pid), None)
+            if slot is None:
+                continue
+            now = time.monotonic()
+            slot.quick_exits = slot.quick_exits + 1 if now - slot.started_at < _MIN_UPTIME else 0
+            delay = min(_MAX_BACKOFF, 0.5 * 2 ** (slot.quick_exits - 1)) if slot.quick_exits else 0.0
+            slot.pid, slot.respawn_at = None, now + delay
+            exited.append(slot)
+            if not self._stopping:
+                _log(f"worker {slot.index} (pid {pid}) exited with {_describe_status(status)}; restarting")
+        return exited
+
+    def respawn_due(self) -> None:
+        now = time.monotonic()
+        for slot in self.slots:
+            if slot.pid is None and slot.respawn_at <= now and not self._stopping:
+                self.spawn(slot)
+                slot.restarts += 1
+
+    def stop(self, timeout: float = _STOP_TIMEOUT) -> None:
+        """Ask every worker to shut down gracefully, killing those still running after ``timeout``."""
+
+        self._stopping = True
+        for slot in self.slots:
+            if slot.pid is not None:
+                _signal(slot.pid, signal.SIGTERM)
+        deadline = time.monotonic() + timeout
+        while any(slot.pid is not None for slot in self.slots):
+            if time.monotonic() >= deadline:
+                for slot in self.slots:
+                    if slot.pid is not None:
+                        _signal(slot.pid, signal.SIGKILL)
+                deadline = float("inf")
+            self.reap()
+            time.sleep(0.05)
+
+    def memory_report(self) -> dict[str, Any]:
+        """RSS and PSS of the master and every worker, plus worker totals."""
+
+        workers = [
+            {"index": slot.index, "pid": slot.pid, "restarts": slot.restarts, **process_memory(slot.pid)}
+            for slot in self.slots
+            if slot.pid is not None
+        ]
+        master = process_memory(os.getpid())
+        totals = {}
+        for key in ("rss_bytes", "pss_bytes"):
+            values = [worker[key] for worker in workers] + [master[key]]
+            totals[key] = sum(values) if None not in values else None
+        return {"master": master, "workers": workers, "total": totals}
+
+    def log_memory(self) -> None:
+        report = self.memory_report()
+        parts = [
+            f"worker {worker['index']} (pid {worker['pid']}) rss {_megabytes(worker['rss_bytes'])}"
+            f" pss {_megabytes(worker['pss_bytes'])}"
+            for worker in report["workers"]
+        ]
+        master, total = report["master"], report["total"]
+        parts.append(f"master rss {_megabytes(master['rss_bytes'])} pss {_megabytes(master['pss_bytes'])}")
+        parts.append(f"total rss {_megabytes(total['rss_bytes'])} pss {_megabytes(total['pss_bytes'])}")
+        _log("; ".join(parts))
+
+    def run(self) -> int:
+        """Start the workers and supervise them until SIGTERM or SIGINT."""
+
+        def _request_stop(signum: int, _frame: Any) -> None:
+            self._stopping = True
+
+        signal.signal(signal.SIGTERM, _request_stop)
+        signal.signal(signal.SIGINT, _request_stop)
+        self.start()
+        next_report = time.monotonic() + min(self.report_interval, 30.0) if self.report_interval > 0 else None
+        while not self._stopping:
+            self.reap()
+            self.respawn_due()
+            if next_report is not None and time.monotonic() >= next_report:
+                self.log_memory()
+                next_report = time.monotonic() + self.report_interval
+            time.sleep(_REAP_INTERVAL)
+        _log("stopping workers")
+        self.stop()
+        return 0
+
+    @staticmethod
+    def _cpus_note(slot: WorkerSlot) -> str:
+        return f", cpus {','.join(map(str, slot.cpus))}" if slot.cpus else ""
+
+
+def _signal(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def _describe_status(status: int) -> str:
+    if os.WIFSIGNALED(status):
+        return f"signal {signal.Signals(os.WTERMSIG(status)).name}"
+    return f"code {os.waitstatus_to_exitcode(status)}"
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Bind the listening socket in the master so every worker accepts on it."""
+
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(_LISTEN_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    cpus = len(available_cpus())
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--workers", type=int, default=cpus, help="server processes; defaults to the CPU count"
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=None,
+        help="OMP/MKL and engine CPU threads per worker; defaults to the CPUs divided by the workers",
+    )
+    parser.add_argument(
+        "--cpu-affinity",
+        action="store_true",
+        help="pin each worker to its own set of --threads CPUs",
+    )
+    parser.add_argument(
+        "--report-interval",
+        type=float,
+        default=60.0,
+        help="seconds between per-worker RSS/PSS reports on stderr (0 disables them)",
+    )
+
+
+def main(args: argparse.Namespace) -> int:
+    workers = max(1, args.workers)
+    cpus = available_cpus()
+    threads = max(1, args.threads or len(cpus) // workers)
+    configure_threads(threads)
+
+    import uvicorn
+
+    from idcard_ocr.api.app import app
+    from idcard_ocr.inference.backends import BackendNotAvailable
+    from idcard_ocr.inference.warmup import load_engines
+
+    started = time.perf_counter()
+    try:
+        load_engines()
+    except BackendNotAvailable as exc:
+        _log(f"failed to load models: {exc}")
+        return 1
+    # Keep the collector from touching (and so copying) the objects every worker inherits.
+    gc.collect()
+    gc.freeze()
+    master = process_memory(os.getpid())
+    loaded = time.perf_counter() - started
+    _log(f"models loaded in {loaded:.1f}s, master rss {_megabytes(master['rss_bytes'])}")
+
+    sock = bind_socket(args.host, args.port)
+    _log(f"listening on {args.host}:{args.port} with {workers} workers x {threads} threads")
+
+    def _serve(slot: WorkerSlot) -> int:
+        uvicorn.Server(uvicorn.Config(app, host=args.host, port=args.port)).run(sockets=[sock])
+        return 0
+
+    launcher = PreforkLauncher(
+        _serve,
+        workers,
+        cpu_sets=cpu_sets(workers, threads, cpus) if args.cpu_affinity else None,
+        report_interval=args.report_interval,
+    )
+    return launcher.run()
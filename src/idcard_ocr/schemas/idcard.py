@@ -10,17 +10,21 @@ class FieldSchema(BaseModel):
 
 
 class FrontSideSchema(BaseModel):
-    name: FieldSchema
-    gender: FieldSchema
-    ethnicity: FieldSchema
-    birth_date: FieldSchema
-    address: FieldSchema
-    id_number: FieldSchema
+    """正面字段；指定 fields 时只返回请求的字段，未请求的字段不出现在响应中。"""
+
+    name: FieldSchema | None = None
+    gender: FieldSchema | None = None
+    ethnicity: FieldSchema | None = None
+    birth_date: FieldSchema | None = None
+    address: FieldSchema | None = None
+    id_number: FieldSchema | None = None
 
 
 class BackSideSchema(BaseModel):
-    issuing_authority: FieldSchema
-    valid_period: FieldSchema
+    """反面字段；指定 fields 时只返回请求的字段，未请求的字段不出现在响应中。"""
+
+    issuing_authority: FieldSchema | None = None
+    valid_period: FieldSchema | None = None
 
 
 class RawTextSchema(BaseModel):
@@ -28,10 +32,54 @@ class RawTextSchema(BaseModel):
     back: str = Field("", description="OCR 原始识别文本（反面，多行以换行拼接）")
 
 
+class SideMetaSchema(BaseModel):
+    scale: float = Field(1.0, description="解码缩放比例（解码尺寸 / 原图尺寸）")
+    card_localized: bool = Field(False, description="是否定位到证件并做透视校正，否则使用原图")
+    path: str = Field(
+        "full",
+        description=(
+            "识别路径：roi 为模板区域快速识别，full 为完整检测+解析，"
+            "partial 为只识别所请求字段所在行，skipped 为未请求该面字段而未识别"
+        ),
+    )
+    angle_cls: str = Field(
+        "off",
+        description="文本行方向分类：all 为逐行分类，sampled 为抽样几行即确定整图方向，off 为未运行",
+    )
+    angle_cls_lines: int = Field(0, description="送入方向分类器的文本行数")
+    field_tiers: dict[str, str] = Field(
+        default_factory=dict,
+        description="开启模型级联时各字段的识别层级：fast 为快速模型，accurate 为高精度模型复识别",
+    )
+
+
+class ProcessingMetaSchema(BaseModel):
+    front: SideMetaSchema
+    back: SideMetaSchema
+    side_source: str = Field(
+        "upload",
+        description="正反面判定：upload 为沿用上传顺序，emblem 为按国徽颜色纠正，labels 为按识别出的字段标签纠正",
+    )
+
+
 class IdCardResponseSchema(BaseModel):
-    front: FrontSideSchema
-    back: BackSideSchema
+    front: FrontSideSchema | None = Field(None, description="正面字段，未请求任何正面字段时省略")
+    back: BackSideSchema | None = Field(None, description="反面字段，未请求任何反面字段时省略")
     raw_text: RawTextSchema
+    meta: ProcessingMetaSchema | None = Field(None, description="识别流程信息，便于排查与统计")
+
+
+class JobSubmittedSchema(BaseModel):
+    id: str = Field(..., description="任务 ID，用于查询识别结果")
+    status: str = Field(..., description="任务状态：queued 排队中，running 识别中，done 已完成，failed 失败")
+
+
+class JobSchema(JobSubmittedSchema):
+    created_at: str = Field(..., description="提交时间（UTC，ISO 8601）")
+    finished_at: str | None = Field(None, description="完成时间（UTC，ISO 8601），未完成时为空")
+    expires_at: str | None = Field(None, description="结果过期时间，过期后任务不再可查")
+    result: IdCardResponseSchema | None = Field(None, description="识别结果，与同步接口的响应相同，仅 done 时返回")
+    error: str | None = Field(None, description="失败原因，仅 failed 时返回")
 
 
 class ErrorResponseSchema(BaseModel):
@@ -0,0 +1,41 @@
+"""Helpers for reading service configuration from environment variables."""
+from __future__ import annotations
+
+import os
+
+_TRUTHY = {"1", "true", "yes", "on"}
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Return a boolean flag, accepting ``1``/``true``/``yes``/``on``."""
+
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    return raw.strip().lower() in _TRUTHY
+
+
+def env_int(name: str, default: int, *, minimum: int | None = None) -> int:
+    """Return an integer setting, falling back to ``default`` on bad input."""
+
+    raw = os.getenv(name)
+    try:
+        value = int(raw) if raw is not None and raw.strip() else default
+    except ValueError:
+        value = default
+    if minimum is not None and value < minimum:
+        value = minimum
+    return value
+
+
+def env_float(name: str, default: float, *, minimum: float | None = None) -> float:
+    """Return a float setting, falling back to ``default`` on bad input."""
+
+    raw = os.getenv(name)
+    try:
+        value = float(raw) if raw is not None and raw.strip() else default
+    except ValueError:
+        value = default
+    if minimum is not None and value < minimum:
+        value = minimum
+    return value
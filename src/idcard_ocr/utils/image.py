@@ -1,21 +1,142 @@
 """Image loading helpers used by the OCR inference pipeline."""
 from __future__ import annotations
 
+from dataclasses import dataclass
 from io import BytesIO
 
 import numpy as np
 from PIL import Image
 
+from idcard_ocr.utils.metrics import stage_timer
+
 
 class ImageDecodingError(RuntimeError):
     """Raised when an uploaded image cannot be decoded."""
 
 
-def decode_image_to_ndarray(data: bytes) -> np.ndarray:
-    """Convert raw image bytes to an RGB numpy array for PaddleOCR."""
+_EXIF_ORIENTATION_TAG = 0x0112
+# EXIF orientation value -> transpose that makes the image upright (as in ``ImageOps.exif_transpose``).
+_EXIF_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
+
+_MAGIC_SIGNATURES = (
+    (b"\xff\xd8\xff", "JPEG"),
+    (b"\x89PNG\r\n\x1a\n", "PNG"),
+)
+
+
+def sniff_image_format(data: bytes) -> str | None:
+    """Identify JPEG or PNG data from its leading magic bytes, ignoring any client label."""
+
+    for signature, image_format in _MAGIC_SIGNATURES:
+        if data.startswith(signature):
+            return image_format
+    return None
+
+
+def read_image_size(data: bytes) -> tuple[int, int]:
+    """Return ``(width, height)`` from the image header without decoding pixels."""
 
     try:
         with Image.open(BytesIO(data)) as image:
-            return np.array(image.convert("RGB"))
+            return image.size
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        raise ImageDecodingError("Failed to read image header") from exc
+
+
+def estimate_decode_bytes(
+    width: int, height: int, image_format: str | None, max_side: int | None = None
+) -> tuple[int, int]:
+    """Estimate ``(peak, result)`` bytes of :func:`decode_image` from header information alone.
+
+    ``result`` is the RGB array handed to the pipeline; ``peak`` adds the
+    buffer decoded before shrinking. JPEGs are decoded at the draft scale
+    libjpeg would pick, other formats at full size with up to four bytes per
+    pixel (PNG with alpha).
+    """
+
+    long_side = max(width, height)
+    ratio = max_side / long_side if max_side and long_side > max_side else 1.0
+    target = (max(1, round(width * ratio)), max(1, round(height * ratio)))
+    result = target[0] * target[1] * 3
+    if image_format == "JPEG":
+        # Same choice as ``JpegImageFile.draft``: the largest reduction that stays at or above the target.
+        fits = min(width // target[0], height // target[1])
+        reduction = next(factor for factor in (8, 4, 2, 1) if fits >= factor)
+        decoded = -(-width // reduction) * -(-height // reduction) * 3
+    else:
+        decoded = width * height * 4
+    return (decoded + result if decoded != result else result), result
+
+
+@dataclass(slots=True)
+class DecodedImage:
+    """Decoded RGB pixels plus how they relate to the original resolution.
+
+    ``scale`` is decoded size divided by original size, so a coordinate in
+    ``array`` maps back to the uploaded image by dividing it by ``scale``.
+    ``array`` may share Pillow's buffer and be read-only; copy before mutating.
+    Sizes are upright, i.e. after the EXIF ``orientation`` has been applied.
+    """
+
+    array: np.ndarray
+    size: tuple[int, int]
+    original_size: tuple[int, int]
+    scale: float
+    orientation: int = 1
+
+
+def decode_image(data: bytes, max_side: int | None = None) -> DecodedImage:
+    """Decode image bytes to RGB, shrinking so the long edge is at most ``max_side``.
+
+    JPEGs are decoded in draft mode, letting libjpeg produce a 1/2, 1/4 or
+    1/8 scale image directly instead of decompressing every pixel first.
+    EXIF orientation is applied after shrinking, where the transpose is cheap.
+    """
+
+    try:
+        with stage_timer("decode"), Image.open(BytesIO(data)) as image:
+            orientation = image.getexif().get(_EXIF_ORIENTATION_TAG, 1)
+            transpose = _EXIF_TRANSPOSE.get(orientation)
+            original_size = image.size
+            long_side = max(original_size)
+            image_to_use = image
+            if max_side and long_side > max_side:
+                ratio = max_side / long_side
+                target = (max(1, round(original_size[0] * ratio)), max(1, round(original_size[1] * ratio)))
+                if image.format == "JPEG":
+                    image.draft("RGB", target)
+                if max(image.size) > max_side:
+                    image_to_use = image.resize(target, Image.Resampling.BILINEAR, reducing_gap=2.0)
+            if image_to_use.mode != "RGB":
+                image_to_use = image_to_use.convert("RGB")
+            if transpose is not None:
+                image_to_use = image_to_use.transpose(transpose)
+                if orientation >= 5:
+                    original_size = original_size[::-1]
+            # Pillow exports pixels through __array_interface__ as a tobytes() copy; asarray wraps that
+            # copy (read-only) where np.array would copy it a second time.
+            array = np.asarray(image_to_use)
+            size = image_to_use.size
     except (OSError, ValueError) as exc:  # pragma: no cover - Pillow-specific errors
         raise ImageDecodingError("Failed to decode image bytes") from exc
+    return DecodedImage(
+        array=array,
+        size=size,
+        original_size=original_size,
+        scale=size[0] / original_size[0],
+        orientation=orientation if transpose is not None else 1,
+    )
+
+
+def decode_image_to_ndarray(data: bytes, max_side: int | None = None) -> np.ndarray:
+    """Convert raw image bytes to an RGB numpy array for PaddleOCR."""
+
+    return decode_image(data, max_side).array
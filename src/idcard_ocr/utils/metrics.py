@@ -0,0 +1,281 @@
+"""Lightweight Prometheus-style metrics and per-request stage timings.
+
+Stages are timed with :func:`stage_timer`, which feeds both a process-wide
+histogram and the current request's timings (rendered as a
+``Server-Timing`` header). When ``IDCARD_OCR_METRICS`` is disabled the
+timer is a shared no-op context manager, so instrumented code pays only a
+cached flag lookup.
+"""
+from __future__ import annotations
+
+import contextvars
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from functools import lru_cache
+from typing import ContextManager, Iterator, Sequence
+
+from idcard_ocr.utils.config import env_bool
+
+_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_NULL_TIMER = nullcontext()
+
+
+@lru_cache(maxsize=1)
+def metrics_enabled() -> bool:
+    """Whether metrics and ``Server-Timing`` headers are collected (``IDCARD_OCR_METRICS``)."""
+
+    return env_bool("IDCARD_OCR_METRICS", True)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> list[str]:  # pragma: no cover - implemented by subclasses
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down, typically refreshed at scrape time."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Bucketed distribution with ``_bucket``, ``_sum`` and ``_count`` series."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = _LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts followed by the running sum.
+                series = self._series[key] = [0.0] * (len(self.buckets) + 1)
+            series[slot] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = self.header()
+        for key, series in items:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class Registry:
+    """Ordered collection of metrics rendered in the Prometheus text format."""
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(
+    Histogram("idcard_ocr_stage_seconds", "Time spent in each pipeline stage.", ["stage"])
+)
+REQUESTS_TOTAL = REGISTRY.register(
+    Counter("idcard_ocr_requests_total", "HTTP requests by route and outcome.", ["route", "outcome"])
+)
+IMAGE_BYTES = REGISTRY.register(
+    Histogram(
+        "idcard_ocr_image_bytes",
+        "Size of uploaded images in bytes.",
+        buckets=(64e3, 128e3, 256e3, 512e3, 1e6, 2e6, 4e6, 8e6),
+    )
+)
+IMAGE_PIXELS = REGISTRY.register(
+    Histogram(
+        "idcard_ocr_image_pixels",
+        "Pixel count of uploaded images, read from the header.",
+        buckets=(0.3e6, 1e6, 2e6, 4e6, 8e6, 12e6, 24e6, 50e6),
+    )
+)
+FIELD_CONFIDENCE = REGISTRY.register(
+    Histogram(
+        "idcard_ocr_field_confidence",
+        "Confidence of recognized fields.",
+        ["field"],
+        buckets=(0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98, 0.99, 1.0),
+    )
+)
+ANGLE_CLS_LINES = REGISTRY.register(
+    Counter(
+        "idcard_ocr_angle_cls_lines_total",
+        "Detected text lines by whether the angle classifier ran on them.",
+        ["outcome"],
+    )
+)
+CASCADE_FIELDS = REGISTRY.register(
+    Counter(
+        "idcard_ocr_cascade_fields_total",
+        "Recognized fields by the cascade tier that produced them.",
+        ["field", "tier"],
+    )
+)
+SIDE_SWAPS = REGISTRY.register(
+    Counter(
+        "idcard_ocr_side_swaps_total",
+        "Card pairs uploaded the wrong way round, by the check that reordered them.",
+        ["method"],
+    )
+)
+
+ADMISSION_BYTES = REGISTRY.register(
+    Gauge(
+        "idcard_ocr_admission_bytes",
+        "Estimated decode and inference memory reserved by admitted requests, and the budget it is held to.",
+        ["state"],
+    )
+)
+
+
+class RequestTimings:
+    """Stage durations accumulated for one request, possibly from several threads."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.stages: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        """Render a ``Server-Timing`` header value in milliseconds."""
+
+        with self._lock:
+            return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.stages.items())
+
+
+_current_timings: contextvars.ContextVar[RequestTimings | None] = contextvars.ContextVar(
+    "idcard_ocr_request_timings", default=None
+)
+
+
+def start_request_timings() -> RequestTimings | None:
+    """Begin collecting stage timings for the current request context."""
+
+    if not metrics_enabled():
+        return None
+    timings = RequestTimings()
+    _current_timings.set(timings)
+    return timings
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    """Record an already-measured stage duration, e.g. time spent queued."""
+
+    if not metrics_enabled():
+        return
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+@contextmanager
+def _timed(stage: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def stage_timer(stage: str) -> ContextManager[None]:
+    """Time a pipeline stage; a no-op when metrics are disabled."""
+
+    if not metrics_enabled():
+        return _NULL_TIMER
+    return _timed(stage)
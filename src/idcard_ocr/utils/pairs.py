@@ -0,0 +1,18 @@
+"""Naming conventions for front/back image pairs in directories and archives."""
+from __future__ import annotations
+
+import re
+
+_PAIR_ENTRY_PATTERN = re.compile(
+    r"^(?:.*/)?(?P<id>[^/]+?)[/_.-](?P<side>front|back)\.(?:jpe?g|png)$",
+    re.IGNORECASE,
+)
+
+
+def match_card_image(name: str) -> tuple[str, str] | None:
+    """Return ``(card_id, side)`` for names like ``<id>/front.jpg`` or ``<id>_back.png``."""
+
+    match = _PAIR_ENTRY_PATTERN.match(name.replace("\\", "/"))
+    if match is None:
+        return None
+    return match.group("id"), match.group("side").lower()
@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import os
 import sys
+from io import BytesIO
 from types import SimpleNamespace
 
 
@@ -34,3 +35,32 @@ class _StubPaddleOCR:  # pragma: no cover - simple stub for injection
 
 if "paddleocr" not in sys.modules:
     sys.modules["paddleocr"] = SimpleNamespace(PaddleOCR=_StubPaddleOCR)
+
+
+import pytest  # noqa: E402 - imported after the stubs above are installed
+
+
+@pytest.fixture(autouse=True)
+def _purge_result_cache():
+    """Keep cached OCR results from leaking between tests."""
+
+    from idcard_ocr.inference.cache import get_result_cache
+
+    cache = get_result_cache()
+    if cache is not None:
+        cache.purge()
+    yield
+
+
+@pytest.fixture
+def image_bytes():
+    """Encode a solid test image: ``image_bytes(fmt="JPEG", size=(32, 20), color=200)``."""
+
+    from PIL import Image
+
+    def _encode(fmt: str = "JPEG", size: tuple[int, int] = (32, 20), color: int = 200) -> bytes:
+        buffer = BytesIO()
+        Image.new("RGB", size, color=color).save(buffer, format=fmt)
+        return buffer.getvalue()
+
+    return _encode
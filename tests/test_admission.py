@@ -0,0 +1,178 @@
+import asyncio
+import threading
+import time
+from importlib import import_module
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from idcard_ocr.api.app import app
+from idcard_ocr.inference.admission import MemoryBudget, MemoryBudgetExhausted, image_cost
+from idcard_ocr.inference.executor import ExecutorSaturated, InferenceExecutor
+from idcard_ocr.utils.image import estimate_decode_bytes
+
+
+def test_estimate_follows_jpeg_draft_scale(image_bytes):
+    data = image_bytes("JPEG", (4000, 3000))
+    with Image.open(BytesIO(data)) as image:
+        image.draft("RGB", (2048, 1536))
+        drafted = image.size
+    peak, result = estimate_decode_bytes(4000, 3000, "JPEG", 2048)
+    assert result == 2048 * 1536 * 3
+    assert peak - result == drafted[0] * drafted[1] * 3
+
+    # PNG has no draft mode: the full image is decoded first, possibly with alpha.
+    peak, result = estimate_decode_bytes(4000, 3000, "PNG", 2048)
+    assert peak == 4000 * 3000 * 4 + result
+    assert estimate_decode_bytes(800, 600, "JPEG", 2048) == (800 * 600 * 3, 800 * 600 * 3)
+
+
+def test_image_cost_reads_only_the_header(image_bytes):
+    small, large = image_bytes("PNG", (64, 48)), image_bytes("PNG", (1024, 768))
+    assert 0 < image_cost(small, 2048) < image_cost(large, 2048)
+    assert image_cost(None) == image_cost(b"not an image") == 0
+
+
+def test_budget_waits_in_order_and_rejects_after_max_wait():
+    budget = MemoryBudget(100, max_wait=0.05)
+    with budget.reserve(70):
+        assert budget.stats()["in_use_bytes"] == 70
+        with pytest.raises(MemoryBudgetExhausted) as excinfo:
+            with budget.reserve(50):
+                pass
+        assert isinstance(excinfo.value, ExecutorSaturated)
+
+        admitted = []
+
+        def _waiter(cost):  # noqa: ANN001 - test helper
+            with budget.reserve(cost, timeout=5):
+                admitted.append(cost)
+
+        large = threading.Thread(target=_waiter, args=(60,))
+        large.start()
+        while budget.stats()["waiting"] < 1:
+            time.sleep(0.005)
+        small = threading.Thread(target=_waiter, args=(10,))
+        small.start()
+        while budget.stats()["waiting"] < 2:
+            time.sleep(0.005)
+        # 10 bytes would fit now, but must not overtake the request queued before it.
+        assert admitted == []
+    large.join(5)
+    small.join(5)
+    assert sorted(admitted) == [10, 60]
+
+    stats = budget.stats()
+    assert stats["in_use_bytes"] == 0 and stats["peak_bytes"] == 70
+    assert stats["rejected"] == 1 and stats["waited"] == 3
+
+
+def test_average_wait_counts_only_admitted_waiters():
+    budget = MemoryBudget(10, max_wait=5)
+    with budget.reserve(10):
+        with pytest.raises(MemoryBudgetExhausted):
+            with budget.reserve(10, timeout=0.01):
+                pass
+
+        def _admitted_waiter():
+            with budget.reserve(10):
+                pass
+
+        admitted = threading.Thread(target=_admitted_waiter)
+        admitted.start()
+        while budget.stats()["waiting"] < 1:
+            time.sleep(0.005)
+        time.sleep(0.05)
+    admitted.join(5)
+
+    stats = budget.stats()
+    assert (stats["waited"], stats["admitted_after_wait"], stats["rejected"]) == (2, 1, 1)
+    assert stats["wait_seconds_avg"] == stats["wait_seconds_max"] > 0
+
+
+def test_budget_caps_oversized_requests_and_waits_asynchronously():
+    budget = MemoryBudget(100, max_wait=5)
+
+    async def _scenario():
+        with budget.reserve(10_000) as cost:  # larger than the budget: runs, but alone
+            assert cost == 100
+            waiting = asyncio.ensure_future(_hold(budget, 30))
+            await asyncio.sleep(0.01)
+            assert budget.stats()["waiting"] == 1
+        assert await waiting == 30
+
+        blocker = budget.reserve(100)
+        blocker.__enter__()
+        cancelled = asyncio.ensure_future(_hold(budget, 30))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        blocker.__exit__(None, None, None)
+
+    asyncio.run(_scenario())
+    assert budget.stats()["in_use_bytes"] == 0 and budget.stats()["waiting"] == 0
+
+
+async def _hold(budget, cost):  # noqa: ANN001 - test helper
+    async with budget.reserve_async(cost) as reserved:
+        return reserved
+
+
+def test_parse_returns_503_when_the_budget_stays_exhausted(monkeypatch, image_bytes):
+    client = TestClient(app)
+    app_module = import_module("idcard_ocr.api.app")
+    budget = MemoryBudget(1, max_wait=0.01, retry_after=3)
+    monkeypatch.setattr(app_module, "get_memory_budget", lambda: budget)
+
+    def _fail_analyze(front, back, **_):  # noqa: ANN001 - test helper
+        raise AssertionError("a rejected request must not reach OCR")
+
+    monkeypatch.setattr(app_module, "analyze_id_card", _fail_analyze)
+    files = {
+        "front_image": ("front.jpg", BytesIO(image_bytes()), "image/jpeg"),
+        "back_image": ("back.jpg", BytesIO(image_bytes()), "image/jpeg"),
+    }
+    with budget.reserve(1):
+        response = client.post("/api/v1/idcard/parse", files=files)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+    assert "Memory budget" in response.json()["detail"]
+
+
+def test_cancelled_request_holds_its_reservation_until_the_work_ends(monkeypatch, image_bytes):
+    app_module = import_module("idcard_ocr.api.app")
+    budget = MemoryBudget(10**9, max_wait=1)
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    monkeypatch.setattr(app_module, "get_memory_budget", lambda: budget)
+    monkeypatch.setattr(app_module, "get_executor", lambda: executor)
+    started, release = threading.Event(), threading.Event()
+
+    def _decode():
+        started.set()
+        release.wait(5)
+
+    async def _scenario():
+        image = image_bytes("PNG", (64, 48))
+        task = asyncio.ensure_future(app_module._run_admitted((image,), _decode))
+        while not started.is_set():
+            await asyncio.sleep(0.005)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The client is gone, but its decode is still running and still needs the memory.
+        assert executor.stats()["running"] == 1
+        assert budget.stats()["in_use_bytes"] > 0
+        release.set()
+        while executor.stats()["running"]:
+            await asyncio.sleep(0.005)
+
+    try:
+        asyncio.run(_scenario())
+    finally:
+        release.set()
+        executor.shutdown()
+    assert budget.stats()["in_use_bytes"] == 0
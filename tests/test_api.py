@@ -5,10 +5,11 @@ from fastapi.testclient import TestClient
 from importlib import import_module
 
 from idcard_ocr.api.app import app
+from idcard_ocr.inference.executor import ExecutorSaturated
 from idcard_ocr.inference.models import BackSideResult, FieldResult, FrontSideResult, IdCardResult
 
 
-def test_parse_id_card_endpoint(monkeypatch):
+def test_parse_id_card_endpoint(monkeypatch, image_bytes):
     client = TestClient(app)
 
     fake_result = IdCardResult(
@@ -26,15 +27,15 @@ def test_parse_id_card_endpoint(monkeypatch):
         ),
     )
 
-    def _fake_analyze(front: bytes, back: bytes):  # noqa: ANN001 - test helper
+    def _fake_analyze(front: bytes, back: bytes, capture: bool = False, **_):  # noqa: ANN001 - test helper
         return fake_result, ["姓名 张三", "性别 男"], ["签发机关 北京市公安局"]
 
     app_module = import_module("idcard_ocr.api.app")
     monkeypatch.setattr(app_module, "analyze_id_card", _fake_analyze)
 
     files = {
-        "front_image": ("front.jpg", BytesIO(b"fakefront"), "image/jpeg"),
-        "back_image": ("back.jpg", BytesIO(b"fakeback"), "image/jpeg"),
+        "front_image": ("front.jpg", BytesIO(image_bytes()), "image/jpeg"),
+        "back_image": ("back.jpg", BytesIO(image_bytes()), "image/jpeg"),
     }
 
     response = client.post("/api/v1/idcard/parse", files=files)
@@ -44,3 +45,173 @@ def test_parse_id_card_endpoint(monkeypatch):
     assert data["front"]["name"]["value"] == "张三"
     assert data["back"]["valid_period"]["value"] == "2010.01.01-2030.01.01"
     assert "姓名 张三" in data["raw_text"]["front"]
+
+
+def test_parse_id_card_returns_503_when_queue_is_full(monkeypatch, image_bytes):
+    client = TestClient(app)
+
+    class _SaturatedExecutor:
+        async def run(self, func, *args, **kwargs):  # noqa: ANN001 - test helper
+            raise ExecutorSaturated(retry_after=2)
+
+        def submit(self, func, *args, **kwargs):  # noqa: ANN001 - test helper
+            raise ExecutorSaturated(retry_after=2)
+
+    app_module = import_module("idcard_ocr.api.app")
+    monkeypatch.setattr(app_module, "get_executor", lambda: _SaturatedExecutor())
+
+    files = {
+        "front_image": ("front.jpg", BytesIO(image_bytes()), "image/jpeg"),
+        "back_image": ("back.jpg", BytesIO(image_bytes()), "image/jpeg"),
+    }
+
+    response = client.post("/api/v1/idcard/parse", files=files)
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+
+
+def test_parse_id_card_sniffs_type_from_magic_bytes(monkeypatch, image_bytes):
+    client = TestClient(app)
+    app_module = import_module("idcard_ocr.api.app")
+
+    def _fail_analyze(front: bytes, back: bytes, capture: bool = False, **_):  # noqa: ANN001 - test helper
+        raise AssertionError("invalid uploads must not reach OCR")
+
+    monkeypatch.setattr(app_module, "analyze_id_card", _fail_analyze)
+
+    files = {
+        "front_image": ("front.jpg", BytesIO(b"not really a jpeg"), "image/jpeg"),
+        "back_image": ("back.jpg", BytesIO(image_bytes()), "image/jpeg"),
+    }
+    response = client.post("/api/v1/idcard/parse", files=files)
+
+    assert response.status_code == 400
+    assert "front_image" in response.json()["detail"]
+
+
+def test_parse_id_card_accepts_mislabeled_png(monkeypatch, image_bytes):
+    client = TestClient(app)
+    app_module = import_module("idcard_ocr.api.app")
+    seen = {}
+
+    def _fake_analyze(front: bytes, back: bytes, capture: bool = False, **_):  # noqa: ANN001 - test helper
+        seen["front"] = front
+        empty = FieldResult(None, None)
+        front_result = FrontSideResult(empty, empty, empty, empty, empty, empty)
+        return IdCardResult(front=front_result, back=BackSideResult(empty, empty)), [], []
+
+    monkeypatch.setattr(app_module, "analyze_id_card", _fake_analyze)
+    png = image_bytes("PNG")
+
+    files = {
+        "front_image": ("front.bin", BytesIO(png), "application/octet-stream"),
+        "back_image": ("back.jpg", BytesIO(image_bytes()), "image/jpeg"),
+    }
+    response = client.post("/api/v1/idcard/parse", files=files)
+
+    assert response.status_code == 200
+    assert seen["front"] == png
+
+
+def test_parse_id_card_rejects_oversized_upload(monkeypatch, image_bytes):
+    client = TestClient(app)
+    app_module = import_module("idcard_ocr.api.app")
+    monkeypatch.setattr(app_module, "MAX_UPLOAD_SIZE", 1024)
+
+    files = {
+        "front_image": ("front.png", BytesIO(b"\x89PNG\r\n\x1a\n" + b"\0" * 4096), "image/png"),
+        "back_image": ("back.jpg", BytesIO(image_bytes()), "image/jpeg"),
+    }
+    response = client.post("/api/v1/idcard/parse", files=files)
+
+    assert response.status_code == 400
+    assert "limit" in response.json()["detail"]
+
+
+def test_parse_id_card_returns_only_requested_fields(monkeypatch, image_bytes):
+    client = TestClient(app)
+    app_module = import_module("idcard_ocr.api.app")
+    seen = {}
+
+    def _fake_analyze(front, back, capture=False, fields=None):  # noqa: ANN001 - test helper
+        seen.update(back=back, fields=fields)
+        empty = FieldResult(None, None)
+        front_result = FrontSideResult(FieldResult("张三", 0.99), empty, empty, empty, empty, empty)
+        return IdCardResult(front=front_result, back=BackSideResult(empty, empty)), ["姓名张三"], []
+
+    monkeypatch.setattr(app_module, "analyze_id_card", _fake_analyze)
+    files = {"front_image": ("front.jpg", BytesIO(image_bytes()), "image/jpeg")}
+
+    data = {"fields": "name,id_number", "raw_text": "false"}
+    response = client.post("/api/v1/idcard/parse", files=files, data=data)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["raw_text"] == {}
+    assert data["front"] == {
+        "name": {"value": "张三", "confidence": 0.99},
+        "id_number": {"value": None, "confidence": None},
+    }
+    assert "back" not in data
+    assert seen == {"back": None, "fields": {"name", "id_number"}}
+
+    response = client.post("/api/v1/idcard/parse", files=files, data={"fields": "valid_period"})
+    assert response.status_code == 400
+    assert "back_image" in response.json()["detail"]
+
+    response = client.post("/api/v1/idcard/parse", files=files, data={"fields": "name,nickname"})
+    assert response.status_code == 400
+    assert "nickname" in response.json()["detail"]
+
+    response = client.post("/api/v1/idcard/parse", files=files, data={"fields": "name", "capture": "true"})
+    assert response.status_code == 400
+    assert "capture" in response.json()["detail"]
+
+
+def test_parse_id_card_accepts_a_combined_photo(monkeypatch, image_bytes):
+    client = TestClient(app)
+    app_module = import_module("idcard_ocr.api.app")
+    seen = {}
+
+    def _fake_combined(image, capture=False, fields=None):  # noqa: ANN001 - test helper
+        seen["image"] = image
+        empty = FieldResult(None, None)
+        front_result = FrontSideResult(FieldResult("张三", 0.99), empty, empty, empty, empty, empty)
+        return IdCardResult(front=front_result, back=BackSideResult(empty, empty)), [], []
+
+    monkeypatch.setattr(app_module, "analyze_combined_id_card", _fake_combined)
+    photo = image_bytes()
+
+    files = {"image": ("both.jpg", BytesIO(photo), "image/jpeg")}
+    response = client.post("/api/v1/idcard/parse", files=files)
+
+    assert response.status_code == 200
+    assert response.json()["front"]["name"]["value"] == "张三"
+    assert seen["image"] == photo
+
+    files = {
+        "image": ("both.jpg", BytesIO(photo), "image/jpeg"),
+        "front_image": ("front.jpg", BytesIO(photo), "image/jpeg"),
+    }
+    response = client.post("/api/v1/idcard/parse", files=files)
+    assert response.status_code == 400
+
+
+def test_oversized_body_is_rejected_before_the_form_is_parsed(monkeypatch):
+    app_module = import_module("idcard_ocr.api.app")
+    monkeypatch.setattr(app_module, "MAX_UPLOAD_SIZE", 1024)
+    monkeypatch.setattr(app_module, "_FORM_OVERHEAD", 1024)
+    parsed = []
+    monkeypatch.setattr(app_module, "analyze_id_card", lambda *args, **kwargs: parsed.append(args))
+    client = TestClient(app)
+    body = b"--x\r\n" + b"0" * 8192 + b"\r\n--x--\r\n"
+    headers = {"Content-Type": "multipart/form-data; boundary=x"}
+
+    declared = client.post("/api/v1/idcard/parse", content=body, headers=headers)
+    # Without Content-Length the body is counted while it streams in.
+    streamed = client.post("/api/v1/idcard/parse", content=iter([body[:4096], body[4096:]]), headers=headers)
+
+    assert declared.status_code == streamed.status_code == 413
+    assert streamed.json()["detail"].startswith("request body exceeds")
+    assert parsed == []
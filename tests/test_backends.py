@@ -0,0 +1,77 @@
+import pytest
+
+from idcard_ocr.bench.compare import edit_distance, line_parity
+from idcard_ocr.inference.backends import BackendNotAvailable, OcrBackend, build_backend, register_backend
+from idcard_ocr.inference.backends.paddle import PaddleBackend
+from idcard_ocr.inference.engine import engine_fingerprint
+
+
+class _FakeBackend(OcrBackend):
+    name = "fake"
+
+    def __init__(self, cpu_threads=None):
+        self.cpu_threads = cpu_threads
+
+    def detect(self, image):
+        return []
+
+    def angles(self, crops):
+        return [(0, 1.0) for _ in crops]
+
+    def recognize(self, crops):
+        return [("", 0.0) for _ in crops]
+
+
+def test_build_backend_uses_configured_backend(monkeypatch):
+    register_backend("fake", _FakeBackend)
+    monkeypatch.setenv("IDCARD_OCR_BACKEND", "fake")
+
+    backend = build_backend(cpu_threads=3)
+
+    assert isinstance(backend, _FakeBackend)
+    assert backend.cpu_threads == 3
+    assert backend.ocr(object()) == [[]]
+    with pytest.raises(BackendNotAvailable):
+        build_backend("missing")
+
+
+def test_paddle_is_the_default_backend(monkeypatch):
+    monkeypatch.delenv("IDCARD_OCR_BACKEND", raising=False)
+
+    backend = build_backend()
+
+    assert isinstance(backend, PaddleBackend)
+    assert backend.ocr(object()) == []
+
+
+def test_paddleocr_recognizes_a_full_merged_batch_at_once(monkeypatch):
+    from idcard_ocr.inference.backends import paddle
+
+    built = {}
+    monkeypatch.setattr(paddle, "_import_paddleocr", lambda: lambda **kwargs: built.update(kwargs))
+    monkeypatch.delenv("IDCARD_OCR_REC_BATCH_SIZE", raising=False)
+
+    paddle._build_paddleocr()
+
+    assert built["rec_batch_num"] == 32
+
+
+def test_engine_fingerprint_depends_on_backend(monkeypatch):
+    fingerprints = []
+    for name in ("paddle", "onnx"):
+        monkeypatch.setenv("IDCARD_OCR_BACKEND", name)
+        engine_fingerprint.cache_clear()
+        fingerprints.append(engine_fingerprint())
+    engine_fingerprint.cache_clear()
+
+    assert "backend=paddle" in fingerprints[0]
+    assert "backend=onnx" in fingerprints[1]
+
+
+def test_line_parity_counts_matched_lines_and_character_edits():
+    box = [[0, 0], [1, 0], [1, 1], [0, 1]]
+    reference = [[[box, ("姓名张三", 0.9)], [box, ("性别男", 0.9)]]]
+    candidate = [[[box, ("姓名张王", 0.9)], [box, ("性别男", 0.9)]]]
+
+    assert edit_distance("kitten", "sitting") == 3
+    assert line_parity(reference, candidate) == {"lines": 2, "lines_matched": 1, "chars": 8, "char_edits": 1}
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import threading
+import zipfile
+from importlib import import_module
+from io import BytesIO
+
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+from idcard_ocr.api.app import app
+from idcard_ocr.api.batch import BatchItem, items_from_archive, read_archive_item, read_spooled_item
+from idcard_ocr.inference.executor import InferenceExecutor
+from idcard_ocr.inference.models import BackSideResult, FieldResult, FrontSideResult, IdCardResult
+
+
+def _fake_analyze(front: bytes, back: bytes):  # noqa: ANN001 - test helper
+    empty = FieldResult(None, None)
+    front_result = FrontSideResult(FieldResult(str(len(front)), 0.9), empty, empty, empty, empty, empty)
+    return IdCardResult(front=front_result, back=BackSideResult(empty, empty)), ["front"], ["back"]
+
+
+def _read_lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_parse_batch_streams_one_line_per_pair(monkeypatch, image_bytes):
+    app_module = import_module("idcard_ocr.api.app")
+    monkeypatch.setattr(app_module, "analyze_id_card", _fake_analyze)
+    client = TestClient(app)
+
+    files = [
+        ("front_images", ("a-front.jpg", BytesIO(image_bytes()), "image/jpeg")),
+        ("back_images", ("a-back.jpg", BytesIO(image_bytes()), "image/jpeg")),
+        ("front_images", ("b-front.jpg", BytesIO(b"broken"), "image/jpeg")),
+        ("back_images", ("b-back.jpg", BytesIO(image_bytes()), "image/jpeg")),
+    ]
+    response = client.post("/api/v1/idcard/parse-batch", files=files, data={"ids": ["card-a", "card-b"]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = {line["id"]: line for line in _read_lines(response)}
+    assert lines["card-a"]["status"] == "ok"
+    assert lines["card-a"]["result"]["raw_text"]["front"] == "front"
+    assert lines["card-b"]["status"] == "error"
+    assert "front_image" in lines["card-b"]["error"]
+
+
+def test_parse_batch_accepts_zip_archive(monkeypatch, image_bytes):
+    app_module = import_module("idcard_ocr.api.app")
+    monkeypatch.setattr(app_module, "analyze_id_card", _fake_analyze)
+    client = TestClient(app)
+
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("x1/front.jpg", image_bytes())
+        archive.writestr("x1/back.jpg", image_bytes())
+        archive.writestr("x2_front.jpg", image_bytes())
+    files = {"archive": ("cards.zip", BytesIO(buffer.getvalue()), "application/zip")}
+
+    response = client.post("/api/v1/idcard/parse-batch", files=files)
+
+    lines = {line["id"]: line for line in _read_lines(response)}
+    assert lines["x1"]["status"] == "ok"
+    assert lines["x2"]["status"] == "error"
+
+
+def test_items_from_archive_flags_oversized_entries():
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("big_front.png", b"x" * 100)
+        archive.writestr("big_back.png", b"x")
+
+    with zipfile.ZipFile(BytesIO(buffer.getvalue())) as archive:
+        items = items_from_archive(archive, max_items=10, max_entry_size=10)
+
+    assert len(items) == 1
+    assert "limit" in items[0].error
+
+
+def test_archive_entries_are_read_only_when_their_pair_is_processed(image_bytes):
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("c1/front.jpg", image_bytes(color=10))
+        archive.writestr("c1/back.jpg", image_bytes(color=20))
+
+    with zipfile.ZipFile(BytesIO(buffer.getvalue())) as archive:
+        (item,) = items_from_archive(archive, max_items=10, max_entry_size=1024 * 1024)
+        assert item.error is None and item.front is None and item.back is None
+        read_archive_item(archive, item)
+
+    assert (item.front, item.back) == (image_bytes(color=10), image_bytes(color=20))
+
+
+def test_uploaded_pairs_are_spooled_and_read_only_when_processed(image_bytes):
+    app_module = import_module("idcard_ocr.api.app")
+    fronts = [UploadFile(BytesIO(image_bytes(color=10))), UploadFile(BytesIO(b""))]
+    backs = [UploadFile(BytesIO(image_bytes(color=20))), UploadFile(BytesIO(image_bytes()))]
+
+    items, archive = asyncio.run(app_module._collect_batch_items(fronts, backs, [], None))
+    for upload in fronts + backs:
+        upload.file.close()  # as FastAPI does once the handler returns
+
+    assert archive is None
+    assert items[0].front is None and items[0].front_file is not None
+    assert items[1].error == "front_image is empty" and items[1].back_file is None
+    read_spooled_item(items[0])
+    assert (items[0].front, items[0].back) == (image_bytes(color=10), image_bytes(color=20))
+    assert items[0].front_file is None and items[0].back_file is None
+
+
+def test_abandoned_batch_gives_back_its_executor_slots(monkeypatch, image_bytes):
+    app_module = import_module("idcard_ocr.api.app")
+    executor = InferenceExecutor(max_workers=1, max_queue=2)
+    release = threading.Event()
+    monkeypatch.setattr(app_module, "get_executor", lambda: executor)
+    monkeypatch.setattr(app_module, "analyze_id_card", lambda front, back: release.wait(5))
+    items = [BatchItem(id=str(index), front=image_bytes(), back=image_bytes()) for index in range(3)]
+
+    async def _run():
+        busy = executor.submit(release.wait, 5)  # another request holds the only worker
+        stream = app_module._stream_batch(items)
+        first_line = asyncio.ensure_future(stream.__anext__())
+        while executor.stats()["queued"] < 1:
+            await asyncio.sleep(0.005)
+        first_line.cancel()  # the client went away
+        await asyncio.gather(first_line, return_exceptions=True)
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+        assert executor.stats()["queued"] == 0
+        release.set()
+        await asyncio.wrap_future(busy)
+
+    try:
+        asyncio.run(_run())
+    finally:
+        release.set()
+        executor.shutdown()
+    stats = executor.stats()
+    assert stats["queued"] == 0 and stats["running"] == 0
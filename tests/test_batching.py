@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from idcard_ocr.inference.batching import RecognitionBatcher
+
+
+def test_batcher_merges_crops_from_concurrent_requests():
+    batch_sizes = []
+
+    def _recognize(crops):
+        batch_sizes.append(len(crops))
+        return [(crop.upper(), 0.9) for crop in crops]
+
+    batcher = RecognitionBatcher(_recognize, max_batch_size=6, max_wait=0.5)
+    barrier = threading.Barrier(3, timeout=5)
+    results = {}
+
+    def _submit(name):
+        barrier.wait()
+        results[name] = batcher.recognize([f"{name}-a", f"{name}-b"])
+
+    threads = [threading.Thread(target=_submit, args=(name,)) for name in ("x", "y", "z")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results["x"] == [("X-A", 0.9), ("X-B", 0.9)]
+    assert results["z"] == [("Z-A", 0.9), ("Z-B", 0.9)]
+    assert batch_sizes == [6]
+    assert batcher.stats()["largest_batch"] == 6
+
+
+def test_batcher_splits_requests_larger_than_max_batch():
+    batch_sizes = []
+
+    def _recognize(crops):
+        batch_sizes.append(len(crops))
+        return list(crops)
+
+    batcher = RecognitionBatcher(_recognize, max_batch_size=4, max_wait=0.0)
+
+    assert batcher.recognize(list(range(10))) == list(range(10))
+    assert max(batch_sizes) <= 4
+    assert sum(batch_sizes) == 10
+
+
+def test_batcher_propagates_recognizer_errors():
+    def _recognize(crops):
+        raise ValueError("bad crop")
+
+    batcher = RecognitionBatcher(_recognize, max_wait=0.0)
+
+    with pytest.raises(ValueError):
+        batcher.recognize(["crop"])
@@ -0,0 +1,54 @@
+from dataclasses import asdict
+from types import SimpleNamespace
+
+from idcard_ocr.bench.engine import LatencyModel, SimulatedEngine
+from idcard_ocr.bench.runner import percentile
+from idcard_ocr.bench.synthetic import generate_cards
+from idcard_ocr.inference.parser import parse_id_card
+from idcard_ocr.inference.roi import FRONT_ROIS
+from idcard_ocr.utils.image import sniff_image_format
+
+
+def _detections(lines):
+    return [[line.pixel_box(), (line.text, 0.97)] for line in lines]
+
+
+def test_synthetic_transcripts_parse_to_expected_fields():
+    for card in generate_cards(5, seed=7, photo_size=(640, 480)):
+        result = parse_id_card(_detections(card.front_lines), _detections(card.back_lines))
+        values = {key: field["value"] for key, field in {**asdict(result.front), **asdict(result.back)}.items()}
+
+        assert values == card.expected
+        assert sniff_image_format(card.front) == "JPEG"
+
+
+def test_synthetic_cards_are_reproducible():
+    first = generate_cards(2, seed=3, photo_size=(320, 240))
+    second = generate_cards(2, seed=3, photo_size=(320, 240))
+
+    assert [card.front for card in first] == [card.front for card in second]
+
+
+def test_simulated_recognizer_matches_crops_to_reference_lines():
+    card = generate_cards(1, photo_size=(320, 240))[0]
+    engine = SimulatedEngine(card, LatencyModel(0, 0, 0, 0, cpu_fraction=0, jitter=0))
+
+    def _crop(box):
+        (x0, y0), _, (x1, y1), _ = box
+        return SimpleNamespace(shape=(y1 - y0, x1 - x0, 3))
+
+    full_line = card.front_lines[0]
+    left, top, right, bottom = FRONT_ROIS["name"][1][0]
+    roi_box = [[int(left * 856), int(top * 540)], None, [int(right * 856), int(bottom * 540)], None]
+    results = engine.recognize([_crop(full_line.pixel_box()), _crop(roi_box)])
+
+    assert results[0][0] == full_line.text
+    assert results[1][0] == card.expected["name"]
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+
+    assert percentile(values, 0.5) == 51.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) is None
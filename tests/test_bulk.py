@@ -0,0 +1,66 @@
+import json
+from importlib import import_module
+
+from idcard_ocr.api.serialize import json_bytes, result_payload
+from idcard_ocr.bulk import CardTask, discover_directory, load_completed_ids, read_manifest, run_bulk
+from idcard_ocr.inference.models import BackSideResult, FieldResult, FrontSideResult, IdCardResult
+
+
+def _fake_analyze(front: bytes, back: bytes):  # noqa: ANN001 - test helper
+    if front == b"broken":
+        raise ValueError("cannot decode")
+    empty = FieldResult(None, None)
+    name = FieldResult(front.decode(), 0.9)
+    front_result = FrontSideResult(name, empty, empty, empty, empty, empty)
+    return IdCardResult(front=front_result, back=BackSideResult(empty, empty)), [], []
+
+
+def _write_pairs(root, names):
+    for name in names:
+        (root / f"{name}_front.jpg").write_bytes(name.encode())
+        (root / f"{name}_back.jpg").write_bytes(b"back")
+
+
+def test_discover_directory_pairs_front_and_back(tmp_path):
+    _write_pairs(tmp_path, ["a", "b"])
+    (tmp_path / "c").mkdir()
+    (tmp_path / "c" / "front.png").write_bytes(b"c")
+    (tmp_path / "c" / "back.png").write_bytes(b"c")
+    (tmp_path / "orphan_front.jpg").write_bytes(b"x")
+
+    tasks = discover_directory(tmp_path)
+
+    assert sorted(task.id for task in tasks) == ["a", "b", "c"]
+
+
+def test_run_bulk_resumes_from_existing_output(tmp_path, monkeypatch):
+    monkeypatch.setattr(import_module("idcard_ocr.inference.service"), "analyze_id_card", _fake_analyze)
+    _write_pairs(tmp_path, ["a", "b", "c"])
+    (tmp_path / "c_front.jpg").write_bytes(b"broken")
+    output = tmp_path / "out" / "results.jsonl"
+    output.parent.mkdir()
+    # Simulate an interrupted earlier run: one finished record and a torn line.
+    output.write_text(json.dumps({"id": "a", "status": "ok"}) + "\n" + '{"id": "b", "sta', encoding="utf-8")
+
+    stats = run_bulk(discover_directory(tmp_path), output, workers=0, progress=False)
+
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [record["id"] for record in records] == ["a", "b", "c"]
+    assert records[1]["result"]["front"]["name"]["value"] == "b"
+    # The same document the API returns for the card.
+    assert records[1]["result"] == json.loads(json_bytes(result_payload(*_fake_analyze(b"b", b"back"))))
+    assert records[2]["status"] == "error"
+    summary = stats.summary()
+    assert summary["skipped"] == 1
+    assert summary["ok"] == 1
+    assert summary["failed"] == 1
+    assert load_completed_ids(output) == {"a", "b", "c"}
+
+
+def test_card_task_paths_from_manifest(tmp_path):
+    manifest = tmp_path / "cards.csv"
+    manifest.write_text("id,front,back\nx,img/x1.jpg,img/x2.jpg\n", encoding="utf-8")
+
+    assert read_manifest(manifest) == [
+        CardTask(id="x", front=str(tmp_path / "img/x1.jpg"), back=str(tmp_path / "img/x2.jpg"))
+    ]
@@ -0,0 +1,74 @@
+import threading
+import time
+
+from idcard_ocr.inference.cache import ResultCache, cache_key
+
+
+def test_cache_key_depends_on_content_and_configuration():
+    key = cache_key("ocr", "cfg-a", b"image")
+
+    assert key == cache_key("ocr", "cfg-a", b"image")
+    assert key != cache_key("ocr", "cfg-b", b"image")
+    assert key != cache_key("ocr", "cfg-a", b"other")
+    assert b"image".hex() not in key
+
+
+def test_cache_hits_expire_after_ttl():
+    now = [0.0]
+    cache = ResultCache(max_entries=4, max_bytes=10_000, ttl=10, clock=lambda: now[0])
+    calls = []
+
+    def _compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    assert cache.get_or_compute("k", _compute) == {"value": 1}
+    assert cache.get_or_compute("k", _compute) == {"value": 1}
+    now[0] = 11
+    assert cache.get_or_compute("k", _compute) == {"value": 2}
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["expirations"] == 1
+
+
+def test_cache_evicts_least_recently_used_entry():
+    cache = ResultCache(max_entries=2, max_bytes=10_000, ttl=60)
+    cache.get_or_compute("a", lambda: "a")
+    cache.get_or_compute("b", lambda: "b")
+    cache.get_or_compute("a", lambda: "unused")
+    cache.get_or_compute("c", lambda: "c")
+
+    assert cache.get_or_compute("a", lambda: "recomputed") == "a"
+    assert cache.get_or_compute("b", lambda: "recomputed") == "recomputed"
+    assert cache.stats()["evictions"] >= 1
+
+
+def test_cache_coalesces_concurrent_identical_requests():
+    cache = ResultCache(max_entries=4, max_bytes=10_000, ttl=60)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def _compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", _compute)))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=lambda: results.append(cache.get_or_compute("k", _compute)))
+    follower.start()
+    while cache.stats()["coalesced"] == 0:
+        time.sleep(0.001)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert results == ["result", "result"]
+    assert len(calls) == 1
+    assert cache.purge() == 1
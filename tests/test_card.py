@@ -0,0 +1,46 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+if not hasattr(np, "ndarray"):
+    pytest.skip("requires real numpy (set IDCARD_OCR_REAL_NUMPY=1)", allow_module_level=True)
+cv2 = pytest.importorskip("cv2")
+
+from idcard_ocr.inference.card import CARD_HEIGHT, CARD_WIDTH, localize_card  # noqa: E402
+
+
+def _photo_with_card(angle: float = 0.0) -> "np.ndarray":
+    photo = np.full((900, 1200, 3), 40, dtype=np.uint8)
+    rect = ((600, 450), (700, 700 / 1.585), angle)
+    corners = cv2.boxPoints(rect).astype(np.int32)
+    cv2.fillConvexPoly(photo, corners, (235, 235, 235))
+    return photo
+
+
+def test_localize_card_warps_card_to_canonical_size():
+    card = localize_card(_photo_with_card(angle=8))
+
+    assert card.found is True
+    assert card.image.shape[:2] == (CARD_HEIGHT, CARD_WIDTH)
+    assert card.image.mean() > 200
+
+
+def test_localize_card_falls_back_to_original_image():
+    photo = np.full((600, 800, 3), 90, dtype=np.uint8)
+
+    card = localize_card(photo)
+
+    assert card.found is False
+    assert card.image is photo
+    assert card.quad is None
+
+
+def test_boxes_on_the_warped_card_map_back_to_the_photo():
+    card = localize_card(_photo_with_card(angle=8))
+    corners = [[0, 0], [CARD_WIDTH - 1, 0], [CARD_WIDTH - 1, CARD_HEIGHT - 1], [0, CARD_HEIGHT - 1]]
+    centre = [[CARD_WIDTH / 2, CARD_HEIGHT / 2]] * 4
+
+    outline, middle = card.boxes_to_input([corners, centre])
+
+    assert np.allclose(outline, card.quad, atol=0.5)
+    assert np.allclose(middle, [[600, 450]] * 4, atol=5)
+    assert localize_card(np.full((600, 800, 3), 90, dtype=np.uint8)).boxes_to_input([corners]) == [corners]
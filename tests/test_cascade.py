@@ -0,0 +1,61 @@
+from importlib import import_module
+
+from idcard_ocr.inference.cascade import Cascade, fields_to_escalate
+from idcard_ocr.inference.models import SideProcessingInfo
+from idcard_ocr.inference.parser import parse_id_card
+
+_VALID_ID = "11010519491231002X"
+
+
+def _page(*lines):
+    return [
+        [[[10, 10 + 40 * i], [300, 10 + 40 * i], [300, 40 + 40 * i], [10, 40 + 40 * i]], (text, score)]
+        for i, (text, score) in enumerate(lines)
+    ]
+
+
+def _front(id_number=_VALID_ID, id_score=0.99):
+    return [
+        _page(
+            ("姓名张三", 0.99),
+            ("性别男民族汉", 0.99),
+            ("出生1949年12月31日", 0.99),
+            ("住址北京市朝阳区建国路1号", 0.99),
+            (f"公民身份号码{id_number}", id_score),
+        )
+    ]
+
+
+def test_fields_to_escalate_flags_low_confidence_and_failed_checks():
+    clean = parse_id_card(_front(), []).front
+    low = parse_id_card(_front(id_score=0.6), []).front
+    bad_check = parse_id_card(_front(id_number="110105194912310021"), []).front
+    other_birth = parse_id_card(_front(id_number="110105195001010012"), []).front
+    back = parse_id_card([], [_page(("签发机关北京市公安局", 0.99), ("有效期限2010.01.01-2030.01", 0.99))]).back
+
+    assert fields_to_escalate(clean, 0.9) == set()
+    assert fields_to_escalate(low, 0.9) == {"id_number"}
+    assert fields_to_escalate(bad_check, 0.9) == {"id_number"}
+    assert fields_to_escalate(other_birth, 0.9) == {"birth_date", "id_number"}
+    assert fields_to_escalate(back, 0.9) == {"valid_period"}
+
+
+def test_review_rerecognizes_only_escalated_lines(monkeypatch):
+    cascade_module = import_module("idcard_ocr.inference.cascade")
+    monkeypatch.setattr(cascade_module, "crop_text_region", lambda image, box: box)
+    detections = _front(id_number="110105194912310021")
+    reread = []
+
+    def _recognize(crops):
+        reread.extend(crops)
+        return [(f"公民身份号码{_VALID_ID}", 0.98)]
+
+    cascade = Cascade(min_confidence=0.9)
+    info = SideProcessingInfo()
+    reviewed = cascade.review(None, detections, "front", info, _recognize)
+
+    assert reread == [detections[0][4][0]]
+    assert parse_id_card(reviewed, []).front.id_number.value == _VALID_ID
+    assert info.field_tiers["id_number"] == "accurate"
+    assert info.field_tiers["name"] == "fast"
+    assert cascade.stats()["escalated_lines"] == 1
@@ -0,0 +1,134 @@
+import random
+import re
+from importlib import import_module
+
+from idcard_ocr.bench.replay import compare, load_cases
+from idcard_ocr.inference.corpus import Anonymizer, CorpusWriter, get_corpus_writer, read_corpus
+from idcard_ocr.inference.models import SideOcrOutput, SideProcessingInfo
+from idcard_ocr.inference.service import analyze_id_card
+from idcard_ocr.inference.validation import (
+    birth_date_from_id_number,
+    gender_from_id_number,
+    is_valid_id_number,
+)
+
+_ID_NUMBER = "11010519491231002X"
+
+
+def _page(*texts: str):
+    return [
+        [[[10, 10 + 40 * i], [300, 10 + 40 * i], [300, 40 + 40 * i], [10, 40 + 40 * i]], (text, 0.95)]
+        for i, text in enumerate(texts)
+    ]
+
+
+_FRONT = [
+    _page("姓名张三", "性别男民族汉", "出生1949年12月31日", "住址", "北京市朝阳区建国路1号", f"公民身份号码{_ID_NUMBER}")
+]
+_BACK = [_page("签发机关北京市公安局朝阳分局", "有效期限2010.01.01-2030.01.01")]
+
+
+def test_anonymizer_keeps_labels_and_shifts_dates_consistently():
+    anonymizer = Anonymizer()
+
+    name = anonymizer.text("姓名张三")
+    id_line = anonymizer.text(f"公民身份号码{_ID_NUMBER[:6]} {_ID_NUMBER[6:]}")
+    new_id = id_line[len("公民身份号码") :].replace(" ", "")
+    birth_line = anonymizer.text("出生1949年12月31日")
+    period = anonymizer.text("有效期限2010.01.01-2030.01.01")
+
+    assert name.startswith("姓名") and "张" not in name and "三" not in name
+    assert anonymizer.text("张三") == name[2:]
+    assert new_id != _ID_NUMBER
+    assert is_valid_id_number(new_id)
+    assert gender_from_id_number(new_id) == gender_from_id_number(_ID_NUMBER)
+
+    year, month, day = re.fullmatch(r"出生(\d{4})年(\d{2})月(\d{2})日", birth_line).groups()
+    assert year != "1949"
+    assert birth_date_from_id_number(new_id) == f"{year}-{month}-{day}"
+    # Both ends move by the same offset, so the period keeps its length.
+    start, end = re.fullmatch(r"有效期限(\d{4})\.\d{2}\.\d{2}-(\d{4})\.\d{2}\.\d{2}", period).groups()
+    assert start != "2010" and int(end) - int(start) == 20
+
+
+def test_anonymizer_keeps_label_characters_only_where_they_are_labels():
+    label_chars = set("公民出生住关有名机")
+    anonymizer = Anonymizer(random.Random(0))
+
+    name = anonymizer.text("姓名公民")
+    address = anonymizer.text("住址出生关有名机住")
+    authority = anonymizer.text("签发机关民生公安局")
+    gender_line = anonymizer.text("性别女民族汉")
+    period = anonymizer.text("有效期限2010.01.01至长期")
+
+    assert name[:2] == "姓名" and not set(name[2:]) & label_chars
+    assert address[:2] == "住址" and not set(address[2:]) & label_chars
+    assert authority[:4] == "签发机关" and not set(authority[4:]) & label_chars
+    assert anonymizer.text("公民出生") == name[2:] + address[2:4]
+    assert gender_line[:5] == "性别女民族" and gender_line[5] != "汉"
+    assert re.fullmatch(r"有效期限\d{4}\.\d{2}\.\d{2}至长期", period)
+
+
+def test_anonymizer_leaves_no_digit_run_of_the_input_behind():
+    address = "北京市朝阳区建国路88号院3号楼1201"
+    texts = [address, "出生1949年12月31日", f"公民身份号码{_ID_NUMBER}", "有效期限2010.01.01-2030.01.01"]
+    runs = {run for text in texts for run in re.findall(r"\d{3,}", text)}
+    for seed in range(50):
+        anonymizer = Anonymizer(random.Random(seed))
+        output = " ".join(anonymizer.text(text) for text in texts)
+        assert not [run for run in runs if run in output], seed
+        # House numbers are not dates: every single digit changes.
+        new_address = anonymizer.text(address)
+        assert all(old != new for old, new in zip(address, new_address) if old.isdigit()), seed
+
+
+def test_corpus_round_trip_replays_without_diffs(tmp_path):
+    path = tmp_path / "corpus.jsonl.gz"
+    writer = CorpusWriter(path)
+
+    assert writer.record(_FRONT, _BACK, fingerprint="test")
+    assert writer.record(_FRONT, _BACK)
+
+    records = list(read_corpus(path))
+    assert len(records) == 2
+    assert "张三" not in path.read_bytes().decode("latin-1")
+    birth_date = records[0]["expected"]["birth_date"]
+    assert birth_date != "1949-12-31"
+    assert birth_date == birth_date_from_id_number(records[0]["expected"]["id_number"])
+    assert records[0]["expected"]["name"] != records[1]["expected"]["name"]
+    assert compare(load_cases(path))["diffs"] == []
+
+
+def test_replay_reports_field_level_diffs(tmp_path):
+    path = tmp_path / "corpus.jsonl.gz"
+    CorpusWriter(path).record(_FRONT, _BACK)
+    cases = load_cases(path)
+    card_id, front, back, expected = cases[0]
+    expected["gender"] = "女"
+
+    report = compare([(card_id, front, back, expected)])
+
+    assert report["fields"]["gender"] == {"compared": 1, "mismatched": 1, "accuracy": 0.0}
+    assert report["diffs"] == [{"id": card_id, "field": "gender", "expected": "女", "actual": "男"}]
+
+
+def test_analyze_id_card_captures_when_requested(monkeypatch, tmp_path):
+    path = tmp_path / "capture.jsonl.gz"
+    monkeypatch.setenv("IDCARD_OCR_CAPTURE_PATH", str(path))
+    get_corpus_writer.cache_clear()
+    outputs = {b"front": _FRONT, b"back": _BACK, b"front-2": _FRONT, b"back-2": _BACK}
+
+    def _fake_ocr_side(image_bytes: bytes, side: str):
+        return SideOcrOutput(outputs[image_bytes], SideProcessingInfo())
+
+    monkeypatch.setattr(import_module("idcard_ocr.inference.service"), "ocr_side", _fake_ocr_side)
+    try:
+        analyze_id_card(b"front", b"back")
+        assert not path.exists()
+
+        result, _, _ = analyze_id_card(b"front-2", b"back-2", capture=True)
+    finally:
+        get_corpus_writer.cache_clear()
+
+    assert result.front.name.value == "张三"
+    assert len(list(read_corpus(path))) == 1
@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from idcard_ocr.inference.engine import EnginePool
+
+
+def test_engine_pool_builds_lazily_and_reuses_engines():
+    built = []
+
+    def _factory():
+        built.append(object())
+        return built[-1]
+
+    pool = EnginePool(2, _factory)
+    assert pool.stats()["built"] == 0
+
+    with pool.checkout() as first:
+        pass
+    with pool.checkout() as second:
+        pass
+
+    assert first is second
+    assert len(built) == 1
+    stats = pool.stats()
+    assert stats["idle"] == 1
+    assert stats["busy"] == 0
+    assert sum(stats["calls_per_engine"]) == 2
+
+
+def test_engine_pool_hands_each_thread_its_own_engine():
+    pool = EnginePool(2, object)
+    barrier = threading.Barrier(2, timeout=5)
+    seen = []
+
+    def _worker():
+        with pool.checkout() as engine:
+            seen.append(engine)
+            barrier.wait()
+
+    threads = [threading.Thread(target=_worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(seen) == 2
+    assert seen[0] is not seen[1]
+    assert pool.stats()["calls_per_engine"] == [1, 1]
+
+
+def test_engine_pool_releases_slot_when_build_fails():
+    attempts = []
+
+    def _factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return object()
+
+    pool = EnginePool(1, _factory)
+    with pytest.raises(RuntimeError):
+        with pool.checkout():
+            pass
+    with pool.checkout() as engine:
+        assert engine is not None
+    assert pool.stats()["built"] == 1
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import pytest
+
+from idcard_ocr.inference.executor import ExecutorSaturated, InferenceExecutor
+
+
+def test_executor_runs_callable_off_the_event_loop():
+    executor = InferenceExecutor(max_workers=1, max_queue=0)
+    loop_thread = threading.get_ident()
+
+    async def _run():
+        return await executor.run(threading.get_ident)
+
+    worker_thread = asyncio.run(_run())
+
+    assert worker_thread != loop_thread
+    stats = executor.stats()
+    assert stats["completed"] == 1
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+
+
+def test_executor_rejects_when_queue_is_full():
+    executor = InferenceExecutor(max_workers=1, max_queue=1, retry_after=3)
+    release = threading.Event()
+
+    async def _run():
+        first = asyncio.ensure_future(executor.run(release.wait))
+        second = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(ExecutorSaturated) as excinfo:
+            await executor.run(release.wait)
+        assert excinfo.value.retry_after == 3
+        assert executor.stats()["queued"] == 1
+        release.set()
+        await asyncio.gather(first, second)
+
+    asyncio.run(_run())
+
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 2
+
+
+def test_cancelling_a_queued_call_frees_its_slot():
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def _run():
+        running = asyncio.ensure_future(executor.run(release.wait))
+        queued = asyncio.ensure_future(executor.run(lambda: "never"))
+        await asyncio.sleep(0.05)
+        assert executor.stats()["queued"] == 1
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        release.set()
+        await running
+        # Both slots are free again, so a full load is accepted once more.
+        return await asyncio.gather(executor.run(lambda: 1), executor.run(lambda: 2))
+
+    try:
+        assert asyncio.run(_run()) == [1, 2]
+        stats = executor.stats()
+        assert stats["queued"] == 0 and stats["running"] == 0 and stats["rejected"] == 0
+    finally:
+        release.set()
+        executor.shutdown()
@@ -0,0 +1,47 @@
+from io import BytesIO
+
+from PIL import Image
+
+from idcard_ocr.utils.image import decode_image
+
+
+def _encode(size: tuple[int, int], fmt: str, mode: str = "RGB") -> bytes:
+    buffer = BytesIO()
+    Image.new(mode, size, color=128).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def test_decode_image_caps_long_edge_of_large_jpeg():
+    decoded = decode_image(_encode((4000, 3000), "JPEG"), max_side=1000)
+
+    assert decoded.original_size == (4000, 3000)
+    assert max(decoded.size) == 1000
+    assert decoded.scale == decoded.size[0] / 4000
+
+
+def test_decode_image_caps_long_edge_of_large_png():
+    decoded = decode_image(_encode((1200, 2400), "PNG", mode="L"), max_side=600)
+
+    assert decoded.size == (300, 600)
+    assert decoded.scale == 0.25
+
+
+def test_decode_image_keeps_small_images_untouched():
+    decoded = decode_image(_encode((640, 400), "JPEG"), max_side=2048)
+
+    assert decoded.size == (640, 400)
+    assert decoded.scale == 1.0
+
+
+def test_decode_image_applies_exif_orientation():
+    buffer = BytesIO()
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees clockwise by the camera
+    Image.new("RGB", (2000, 1000), color=128).save(buffer, format="JPEG", exif=exif)
+
+    decoded = decode_image(buffer.getvalue(), max_side=500)
+
+    assert decoded.orientation == 6
+    assert decoded.original_size == (1000, 2000)
+    assert decoded.size == (250, 500)
+    assert decoded.scale == 0.25
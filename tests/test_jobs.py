@@ -0,0 +1,279 @@
+import json
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from importlib import import_module
+from io import BytesIO
+
+import pytest
+from fastapi.testclient import TestClient
+
+from idcard_ocr.api import jobs
+from idcard_ocr.api.app import app
+from idcard_ocr.api.jobs import (
+    DONE,
+    FAILED,
+    QUEUED,
+    RUNNING,
+    JobQueueFull,
+    JobRunner,
+    JobStore,
+    valid_callback_url,
+)
+from idcard_ocr.inference.admission import MemoryBudget
+from idcard_ocr.inference.executor import ExecutorSaturated
+from idcard_ocr.inference.models import BackSideResult, FieldResult, FrontSideResult, IdCardResult
+
+
+def _fake_result():
+    empty = FieldResult(None, None)
+    front = FrontSideResult(FieldResult("张三", 0.99), empty, empty, empty, empty, empty)
+    return IdCardResult(front=front, back=BackSideResult(empty, empty)), ["姓名张三"], []
+
+
+def _wait_for(store, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = store.get(job_id)
+        if job is not None and job.status in (DONE, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_store_claims_completes_and_expires(tmp_path, monkeypatch):
+    store = JobStore(tmp_path / "jobs.db", ttl=60, max_queued=2)
+    first = store.submit(front=b"f", back=b"b", options={"raw_text": False})
+    store.submit(image=b"both")
+    with pytest.raises(JobQueueFull):
+        store.submit(front=b"f", back=b"b")
+
+    claimed = store.claim()
+    assert (claimed.id, claimed.status, claimed.front) == (first.id, RUNNING, b"f")
+    assert claimed.options == {"raw_text": False}
+    assert store.get(first.id).status == RUNNING
+
+    store.complete(first.id, b'{"ok":true}')
+    done = store.get(first.id)
+    assert done.status == DONE and done.result == b'{"ok":true}'
+    assert done.expires_at - done.finished_at == 60
+    assert store.stats()[QUEUED] == 1
+
+    later = time.time() + 61
+    monkeypatch.setattr(jobs.time, "time", lambda: later)
+    assert store.get(first.id) is None
+    assert store.purge_expired() == 1
+
+
+def test_store_reclaims_expired_leases_and_gives_up(tmp_path, monkeypatch):
+    store = JobStore(tmp_path / "jobs.db")
+    job = store.submit(front=b"f", back=b"b")
+    now = time.time()
+    for attempt in range(1, jobs._MAX_ATTEMPTS + 1):
+        monkeypatch.setattr(jobs.time, "time", lambda: now)
+        claimed = store.claim()
+        assert (claimed.id, claimed.attempts) == (job.id, attempt)
+        assert store.claim() is None  # still leased
+        now += jobs._LEASE_SECONDS + 1
+
+    monkeypatch.setattr(jobs.time, "time", lambda: now)
+    assert store.claim() is None
+    failed = store.get(job.id)
+    assert failed.status == FAILED and "attempts" in failed.error
+
+
+def test_job_short_of_memory_is_requeued_without_spending_an_attempt(tmp_path, monkeypatch, image_bytes):
+    budget = MemoryBudget(1, max_wait=5)
+    runs = []
+    monkeypatch.setattr(jobs, "get_memory_budget", lambda: budget)
+    monkeypatch.setattr(jobs, "_ADMISSION_WAIT", 0.01)
+
+    def _fake_analyze(front, back, **_):  # noqa: ANN001 - test helper
+        runs.append(front)
+        return _fake_result()
+
+    monkeypatch.setattr(jobs, "analyze_id_card", _fake_analyze)
+    store = JobStore(tmp_path / "jobs.db")
+    runner = JobRunner(store, workers=1)
+    job = store.submit(front=image_bytes(), back=image_bytes())
+
+    with budget.reserve(1):
+        for _ in range(jobs._MAX_ATTEMPTS + 1):
+            runner._process(store.claim())
+            waiting = store.get(job.id)
+            assert (waiting.status, waiting.attempts) == (QUEUED, 0)
+    runner._process(store.claim())
+
+    done = store.get(job.id)
+    assert (done.status, done.attempts) == (DONE, 1)
+    assert len(runs) == 1
+
+
+def test_jobs_run_on_the_shared_executor_and_renew_their_lease(tmp_path, monkeypatch, image_bytes):
+    monkeypatch.setattr(jobs, "_LEASE_RENEW_INTERVAL", 0.01)
+    threads = []
+
+    def _slow_analyze(front, back, **_):  # noqa: ANN001 - test helper
+        threads.append(threading.current_thread().name)
+        time.sleep(0.1)
+        return _fake_result()
+
+    monkeypatch.setattr(jobs, "analyze_id_card", _slow_analyze)
+    store = JobStore(tmp_path / "jobs.db")
+    renewed = []
+    renew = store.renew
+    monkeypatch.setattr(store, "renew", lambda job_id: renewed.append(job_id) or renew(job_id))
+    runner = JobRunner(store, workers=1)
+    job = store.submit(front=image_bytes(), back=image_bytes())
+
+    assert runner._process(store.claim()) is True
+    assert store.get(job.id).status == DONE
+    assert threads[0].startswith("idcard-ocr")
+    assert renewed and set(renewed) == {job.id}
+
+    class _SaturatedExecutor:
+        def submit(self, *args, **kwargs):  # noqa: ANN002, ANN003 - test helper
+            raise ExecutorSaturated(1)
+
+    monkeypatch.setattr(jobs, "get_executor", lambda: _SaturatedExecutor())
+    waiting = store.submit(front=image_bytes(), back=image_bytes())
+    assert runner._process(store.claim()) is False
+    requeued = store.get(waiting.id)
+    assert (requeued.status, requeued.attempts) == (QUEUED, 0)
+
+
+def test_runner_runs_jobs_and_reports_failures(tmp_path, monkeypatch):
+    seen = []
+
+    def _fake_analyze(front, back, capture=False, fields=None):  # noqa: ANN001 - test helper
+        if front == b"bad":
+            raise ValueError("front_image is not a readable image")
+        seen.append(fields)
+        return _fake_result()
+
+    monkeypatch.setattr(jobs, "analyze_id_card", _fake_analyze)
+    store = JobStore(tmp_path / "jobs.db")
+    runner = JobRunner(store, workers=2, poll_interval=0.01)
+    good = store.submit(front=b"f", back=None, options={"fields": ["name"], "raw_text": False})
+    bad = store.submit(front=b"bad", back=b"b")
+    runner.start()
+    try:
+        good_job, bad_job = _wait_for(store, good.id), _wait_for(store, bad.id)
+    finally:
+        runner.stop(timeout=5)
+
+    expected = {"front": {"name": {"value": "张三", "confidence": 0.99}}, "raw_text": {}, "meta": None}
+    assert json.loads(good_job.result) == expected
+    assert seen == [frozenset({"name"})]
+    assert bad_job.status == FAILED and "readable" in bad_job.error
+    assert runner.stats()["completed"] == 1 and runner.stats()["failed"] == 1
+
+
+def test_worker_survives_a_database_error_while_storing_a_result(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "analyze_id_card", lambda front, back, **_: _fake_result())
+    store = JobStore(tmp_path / "jobs.db")
+    first = store.submit(front=b"f", back=b"b")
+    second = store.submit(front=b"f", back=b"b")
+    complete = store.complete
+
+    def _complete(job_id, result):  # noqa: ANN001 - test helper
+        if job_id == first.id:
+            raise sqlite3.OperationalError("database is locked")
+        complete(job_id, result)
+
+    monkeypatch.setattr(store, "complete", _complete)
+    runner = JobRunner(store, workers=1, poll_interval=0.01)
+    runner.start()
+    try:
+        assert _wait_for(store, second.id).status == DONE
+    finally:
+        runner.stop(timeout=5)
+
+    # Left running, so it is claimed again once its lease runs out.
+    assert store.get(first.id).status == RUNNING
+    assert runner.stats()["completed"] == 1
+
+
+def test_callbacks_need_an_allowed_host_and_do_not_follow_redirects(tmp_path, monkeypatch):
+    assert valid_callback_url("https://hooks.example.com/done", {".example.com"})
+    assert valid_callback_url("http://ci.internal:8080/done", {"ci.internal"})
+    assert not valid_callback_url("http://notexample.com/", {".example.com"})
+    assert not valid_callback_url("http://169.254.169.254/latest/meta-data", set())
+    assert not valid_callback_url("ftp://ci.internal/done", {"ci.internal"})
+
+    requested = []
+
+    class _Redirecting(BaseHTTPRequestHandler):
+        def do_POST(self):  # noqa: N802 - http.server API
+            requested.append(self.path)
+            self.send_response(302)
+            self.send_header("Location", "/internal")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        do_GET = do_POST  # where a followed redirect would land
+
+        def log_message(self, *args):  # noqa: ANN002 - silence the test server
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), _Redirecting)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(jobs, "analyze_id_card", lambda front, back, **_: _fake_result())
+    store = JobStore(tmp_path / "jobs.db")
+    runner = JobRunner(store, workers=1, poll_interval=0.01, callback_hosts={"127.0.0.1"})
+    job = store.submit(front=b"f", back=b"b", callback_url=f"http://127.0.0.1:{server.server_port}/hook")
+    runner.start()
+    try:
+        assert _wait_for(store, job.id).status == DONE
+        deadline = time.monotonic() + 5
+        while runner.stats()["callbacks_failed"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        runner.stop(timeout=5)
+        server.shutdown()
+
+    assert requested == ["/hook"]
+    assert runner.stats()["callbacks_failed"] == 1
+
+
+def test_job_endpoints(tmp_path, monkeypatch, image_bytes):
+    monkeypatch.setenv("IDCARD_OCR_JOB_DB", str(tmp_path / "jobs.db"))
+    monkeypatch.setenv("IDCARD_OCR_WARMUP", "0")
+    app_module = import_module("idcard_ocr.api.app")
+    monkeypatch.setattr(jobs, "analyze_id_card", lambda front, back, **_: _fake_result())
+    monkeypatch.setattr(app_module, "start_warmup", lambda: None)
+    jobs.get_job_store.cache_clear()
+    jobs.get_job_runner.cache_clear()
+    try:
+        with TestClient(app) as client:
+            files = {
+                "front_image": ("front.jpg", BytesIO(image_bytes()), "image/jpeg"),
+                "back_image": ("back.jpg", BytesIO(image_bytes()), "image/jpeg"),
+            }
+            response = client.post("/api/v1/idcard/jobs", files=files)
+            assert response.status_code == 202
+            job_id = response.json()["id"]
+            assert response.headers["Location"] == f"/api/v1/idcard/jobs/{job_id}"
+
+            _wait_for(jobs.get_job_store(), job_id)
+            data = client.get(f"/api/v1/idcard/jobs/{job_id}").json()
+            assert data["status"] == "done"
+            assert data["result"]["front"]["name"]["value"] == "张三"
+            assert data["result"]["raw_text"]["front"] == "姓名张三"
+
+            assert client.get("/api/v1/idcard/jobs/unknown").status_code == 404
+            for url in ("file:///etc/passwd", "http://127.0.0.1:8080/admin"):  # no callback hosts configured
+                data = {"callback_url": url}
+                assert client.post("/api/v1/idcard/jobs", files=files, data=data).status_code == 400
+            assert client.get("/stats").json()["jobs"]["done"] == 1
+    finally:
+        jobs.get_job_store.cache_clear()
+        jobs.get_job_runner.cache_clear()
+
+
+def test_job_endpoints_are_unavailable_without_a_database(monkeypatch):
+    monkeypatch.delenv("IDCARD_OCR_JOB_DB", raising=False)
+    jobs.get_job_store.cache_clear()
+    client = TestClient(app)
+    assert client.get("/api/v1/idcard/jobs/abc").status_code == 503
@@ -0,0 +1,66 @@
+from io import BytesIO
+
+from fastapi.testclient import TestClient
+
+from importlib import import_module
+
+from idcard_ocr.api.app import app
+from idcard_ocr.inference.models import BackSideResult, FieldResult, FrontSideResult, IdCardResult
+from idcard_ocr.utils.metrics import Histogram, stage_timer, start_request_timings
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ["stage"], buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="ocr")
+    histogram.observe(0.5, stage="ocr")
+    histogram.observe(3.0, stage="ocr")
+
+    lines = histogram.render()
+
+    assert 'demo_seconds_bucket{stage="ocr",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{stage="ocr",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{stage="ocr",le="+Inf"} 3' in lines
+    assert 'demo_seconds_count{stage="ocr"} 3' in lines
+
+
+def test_stage_timer_accumulates_request_timings():
+    timings = start_request_timings()
+    with stage_timer("decode"):
+        pass
+    with stage_timer("decode"):
+        pass
+
+    assert timings is not None
+    assert list(timings.stages) == ["decode"]
+    assert timings.server_timing().startswith("decode;dur=")
+
+
+def test_parse_sets_server_timing_and_metrics_endpoint_reports_stages(monkeypatch, image_bytes):
+    client = TestClient(app)
+    result = IdCardResult(
+        front=FrontSideResult(*(FieldResult("x", 0.9) for _ in range(6))),
+        back=BackSideResult(FieldResult("x", 0.9), FieldResult("x", 0.9)),
+    )
+    app_module = import_module("idcard_ocr.api.app")
+    monkeypatch.setattr(app_module, "analyze_id_card", lambda front, back, **_: (result, [], []))
+
+    files = {
+        "front_image": ("front.jpg", BytesIO(image_bytes()), "image/jpeg"),
+        "back_image": ("back.jpg", BytesIO(image_bytes()), "image/jpeg"),
+    }
+    response = client.post("/api/v1/idcard/parse", files=files)
+
+    assert response.status_code == 200
+    server_timing = response.headers["Server-Timing"]
+    for stage in ("upload_read", "queue_wait", "serialize", "total"):
+        assert f"{stage};dur=" in server_timing
+
+    metrics = client.get("/metrics")
+
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    body = metrics.text
+    assert 'idcard_ocr_requests_total{route="/api/v1/idcard/parse",outcome="ok"}' in body
+    assert 'idcard_ocr_stage_seconds_count{stage="queue_wait"}' in body
+    assert 'idcard_ocr_field_confidence_count{field="id_number"}' in body
+    assert 'idcard_ocr_runtime{component="executor",stat="max_workers"}' in body
@@ -0,0 +1,50 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+if not hasattr(np, "ndarray"):
+    pytest.skip("requires real numpy (set IDCARD_OCR_REAL_NUMPY=1)", allow_module_level=True)
+pytest.importorskip("cv2")
+
+from idcard_ocr.inference.backends import recognition_batch_size  # noqa: E402
+from idcard_ocr.inference.backends.onnx import OnnxBackend, ctc_greedy_decode, db_postprocess  # noqa: E402
+
+
+def test_db_postprocess_grows_kernel_and_maps_to_original_scale():
+    probabilities = np.zeros((320, 640), dtype=np.float32)
+    probabilities[100:120, 50:400] = 0.9
+
+    boxes = db_postprocess(probabilities, 0.5, 0.5, (640, 1280))
+
+    assert len(boxes) == 1
+    (left, top), _, (right, bottom), _ = boxes[0].tolist()
+    # The 20px-high kernel is unclipped by area * 1.5 / perimeter on every side, then scaled by 2.
+    assert left < 100 and right > 800
+    assert top < 200 and bottom > 240
+
+
+def test_ctc_greedy_decode_collapses_repeats_and_blanks():
+    characters = ["blank", "a", "b", " "]
+    probabilities = np.zeros((1, 6, 4), dtype=np.float32)
+    for step, index in enumerate([1, 1, 0, 1, 2, 0]):
+        probabilities[0, step, index] = 0.8
+
+    assert ctc_greedy_decode(probabilities, characters) == [("aab", pytest.approx(0.8))]
+
+
+def test_recognize_runs_a_full_merged_batch_in_one_call(monkeypatch):
+    monkeypatch.delenv("IDCARD_OCR_REC_BATCH_SIZE", raising=False)
+    backend = OnnxBackend.__new__(OnnxBackend)
+    backend._rec = object()
+    backend._characters = ["blank", "a", " "]
+    backend.rec_batch = recognition_batch_size()
+    calls = []
+
+    def fake_run(session, batch):
+        calls.append(len(batch))
+        return np.zeros((len(batch), 4, 3), dtype=np.float32)
+
+    monkeypatch.setattr(backend, "_run", fake_run)
+
+    crops = [np.full((32, 40 + index, 3), 200, dtype=np.uint8) for index in range(32)]
+    assert len(backend.recognize(crops)) == 32
+    assert calls == [32]
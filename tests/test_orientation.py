@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from idcard_ocr.inference.engine import _orient_crops, angle_cls_mode
+from idcard_ocr.inference.models import SideProcessingInfo
+
+
+class _Engine:
+    use_angle_cls = True
+
+    def __init__(self, angles):
+        self._angles = angles
+        self.sampled = []
+        self.classified = []
+
+    def angles(self, crops):
+        self.sampled.extend(crops)
+        return self._angles[: len(crops)]
+
+    def classify(self, crops):
+        self.classified.extend(crops)
+        return list(crops)
+
+
+def _crops(*widths):
+    return [SimpleNamespace(shape=(32, width, 3)) for width in widths]
+
+
+@pytest.fixture
+def _angle_mode(monkeypatch):
+    def _set(mode):
+        monkeypatch.setenv("IDCARD_OCR_ANGLE_CLS", mode)
+        angle_cls_mode.cache_clear()
+
+    yield _set
+    angle_cls_mode.cache_clear()
+
+
+def test_auto_mode_skips_classifier_when_sample_agrees(_angle_mode):
+    _angle_mode("auto")
+    crops = _crops(100, 400, 300, 50, 200)
+    engine = _Engine([(0, 0.99)] * 3)
+    info = SideProcessingInfo()
+
+    assert _orient_crops(engine, crops, info) == crops
+    assert [crop.shape[1] for crop in engine.sampled] == [400, 300, 200]
+    assert engine.classified == []
+    assert (info.angle_cls, info.angle_cls_lines) == ("sampled", 3)
+
+
+def test_auto_mode_classifies_every_line_when_sample_is_uncertain(_angle_mode):
+    _angle_mode("auto")
+    crops = _crops(100, 400, 300, 50, 200)
+    engine = _Engine([(0, 0.99), (180, 0.95), (0, 0.99)])
+    info = SideProcessingInfo()
+
+    _orient_crops(engine, crops, info)
+
+    assert engine.classified == crops
+    assert (info.angle_cls, info.angle_cls_lines) == ("all", 8)
+
+
+def test_never_mode_leaves_crops_alone(_angle_mode):
+    _angle_mode("never")
+    engine = _Engine([])
+    info = SideProcessingInfo()
+
+    _orient_crops(engine, _crops(100, 200), info)
+
+    assert engine.sampled == engine.classified == []
+    assert (info.angle_cls, info.angle_cls_lines) == ("off", 0)
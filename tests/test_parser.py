@@ -1,5 +1,7 @@
+import pytest
+
 from idcard_ocr.inference.models import BackSideResult, FieldResult, FrontSideResult, IdCardResult
-from idcard_ocr.inference.parser import parse_id_card
+from idcard_ocr.inference.parser import parse_id_card, select_fields
 
 
 def _detection(text: str, score: float = 0.9):
@@ -99,3 +101,44 @@ def test_parse_id_card_handles_split_birth_components():
     result = parse_id_card(front_raw, back_raw)
 
     assert result.front.birth_date.value == "1990-01-01"
+
+
+def test_parse_id_card_reads_values_from_following_lines():
+    front_raw = [
+        _detection("姓名"),
+        _detection("王五"),
+        _detection("住址"),
+        _detection("上海市浦东新区"),
+        _detection("世纪大道100号"),
+        _detection("公民身份号码"),
+        _detection("310115199203041234"),
+    ]
+    back_raw = [_detection("签发机关"), _detection("上海市公安局浦东分局")]
+
+    result = parse_id_card(front_raw, back_raw)
+
+    assert result.front.name.value == "王五"
+    assert result.front.address.value == "上海市浦东新区世纪大道100号"
+    assert result.front.id_number.value == "310115199203041234"
+    assert result.back.issuing_authority.value == "上海市公安局浦东分局"
+
+
+def test_parse_id_card_runs_only_requested_extractors():
+    front_raw = [_detection("姓名张三"), _detection("性别男"), _detection("公民身份号码110101199001011234")]
+    sources = {}
+
+    result = parse_id_card(front_raw, [], sources=sources, fields={"id_number"})
+
+    assert result.front.id_number.value == "110101199001011234"
+    assert result.front.name.value is None
+    assert result.back.valid_period.value is None
+    assert set(sources) == {"id_number"}
+
+
+def test_select_fields_rejects_unknown_names():
+    assert select_fields(None) is None
+    assert select_fields([" name", "valid_period "]) == {"name", "valid_period"}
+    with pytest.raises(ValueError, match="nickname"):
+        select_fields(["name", "nickname"])
+    with pytest.raises(ValueError):
+        select_fields([""])
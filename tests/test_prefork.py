@@ -0,0 +1,105 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import pytest
+
+from idcard_ocr import prefork
+from idcard_ocr.inference.executor import get_executor
+from idcard_ocr.prefork import PreforkLauncher, configure_threads, cpu_sets, process_memory
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork needs os.fork")
+
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_cpu_sets_split_and_wrap():
+    assert cpu_sets(2, 2, [0, 1, 2, 3]) == [(0, 1), (2, 3)]
+    assert cpu_sets(3, 1, [4, 6]) == [(4,), (6,), (4,)]
+
+
+def test_configure_threads_sets_per_worker_threads(monkeypatch):
+    for name in ("IDCARD_OCR_ENGINE_POOL_SIZE", "IDCARD_OCR_ENGINE_CPU_THREADS", *prefork._THREAD_ENV_VARS):
+        monkeypatch.delenv(name, raising=False)
+    configure_threads(4)
+    assert os.environ["OMP_NUM_THREADS"] == os.environ["MKL_NUM_THREADS"] == "4"
+    assert os.environ["IDCARD_OCR_ENGINE_POOL_SIZE"] == "1"
+    assert os.environ["IDCARD_OCR_ENGINE_CPU_THREADS"] == "4"
+
+    monkeypatch.setenv("IDCARD_OCR_ENGINE_POOL_SIZE", "2")
+    monkeypatch.delenv("IDCARD_OCR_ENGINE_CPU_THREADS")
+    configure_threads(4)
+    assert os.environ["IDCARD_OCR_ENGINE_CPU_THREADS"] == "2"
+
+
+def test_process_memory_reads_proc():
+    if not os.path.exists("/proc/self/status"):
+        pytest.skip("needs /proc")
+    assert process_memory(os.getpid())["rss_bytes"] > 0
+
+
+def test_launcher_restarts_dead_workers_and_stops(monkeypatch):
+    monkeypatch.setattr(prefork, "_log", lambda message: None)
+
+    def _idle(slot):  # noqa: ANN001 - test helper
+        time.sleep(60)
+        return 0
+
+    launcher = PreforkLauncher(_idle, 2)
+    launcher.start()
+    try:
+        first, second = (slot.pid for slot in launcher.slots)
+        os.kill(first, signal.SIGKILL)
+        assert _wait_until(lambda: launcher.reap())
+        launcher.respawn_due()  # a quick exit waits out its back-off before the restart
+        assert _wait_until(lambda: launcher.respawn_due() or launcher.slots[0].pid is not None)
+
+        restarted = launcher.slots[0]
+        assert restarted.pid not in (None, first) and restarted.restarts == 1
+        assert launcher.slots[1].pid == second
+        assert [worker["pid"] for worker in launcher.memory_report()["workers"]] == [restarted.pid, second]
+    finally:
+        launcher.stop(timeout=5)
+    assert all(slot.pid is None for slot in launcher.slots)
+
+
+def test_forked_child_builds_its_own_executor():
+    parent = get_executor()
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_end)
+        os.write(write_end, b"1" if get_executor() is not parent else b"0")
+        os._exit(0)
+    os.close(write_end)
+    result = os.read(read_end, 1)
+    os.close(read_end)
+    os.waitpid(pid, 0)
+    assert result == b"1"
+
+
+def test_prefork_command_sizes_threads_before_numpy_is_imported():
+    script = (
+        "import sys\n"
+        "from idcard_ocr import __main__ as cli, prefork\n"
+        "def configure_threads(threads):\n"
+        "    print('numpy' in sys.modules)\n"
+        "    raise SystemExit(0)\n"
+        "prefork.configure_threads = configure_threads\n"
+        "cli.main(['prefork', '--workers', '1'])\n"
+    )
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [src, os.environ.get("PYTHONPATH")]))}
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, env=env, timeout=60)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "False"
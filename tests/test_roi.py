@@ -0,0 +1,91 @@
+from idcard_ocr.inference.roi import RoiReader, field_bands
+
+
+class _FakeCard:
+    """Stands in for a normalized card image; a crop is identified by its top-left corner."""
+
+    def __getitem__(self, key):
+        rows, cols = key
+        return rows.start, cols.start
+
+
+def _recognizer(texts_by_corner):
+    def _recognize(crops):
+        return [texts_by_corner.get(corner, ("", 0.1)) for corner in crops]
+
+    return _recognize
+
+
+_FRONT_TEXT = {
+    (43, 145): ("张三", 0.99),
+    (113, 145): ("男", 0.99),
+    (113, 325): ("汉", 0.98),
+    (178, 145): ("1990年1月1日", 0.97),
+    (248, 145): ("北京市东城区", 0.96),
+    (297, 145): ("幸福路1号", 0.95),
+    (421, 273): ("110101199001011237", 0.99),
+}
+
+
+def test_roi_reader_accepts_consistent_front_side():
+    reader = RoiReader(min_confidence=0.85)
+
+    detections = reader.read(_FakeCard(), "front", _recognizer(_FRONT_TEXT))
+
+    assert detections is not None
+    texts = [text for _, (text, _) in detections[0]]
+    assert "姓名张三" in texts
+    assert "住址北京市东城区幸福路1号" in texts
+    assert reader.stats()["front"]["hits"] == 1
+
+
+def test_roi_reader_falls_back_on_bad_checksum():
+    texts = dict(_FRONT_TEXT)
+    texts[(421, 273)] = ("110101199001011234", 0.99)
+    reader = RoiReader(min_confidence=0.85)
+
+    assert reader.read(_FakeCard(), "front", _recognizer(texts)) is None
+    assert reader.stats()["front"]["fallbacks"] == 1
+
+
+def test_roi_reader_falls_back_on_low_confidence():
+    texts = dict(_FRONT_TEXT)
+    texts[(43, 145)] = ("张三", 0.4)
+    reader = RoiReader(min_confidence=0.85)
+
+    assert reader.read(_FakeCard(), "front", _recognizer(texts)) is None
+
+
+def test_roi_reader_reads_back_side():
+    reader = RoiReader(min_confidence=0.85)
+    texts = {(378, 325): ("北京市公安局", 0.97), (437, 325): ("2010.01.01-2030.01.01", 0.96)}
+
+    detections = reader.read(_FakeCard(), "back", _recognizer(texts))
+
+    assert detections is not None
+    assert reader.stats()["back"]["hit_ratio"] == 1.0
+
+
+def test_roi_reader_reads_only_requested_fields():
+    texts = dict(_FRONT_TEXT)
+    texts[(113, 145)] = ("女", 0.99)  # inconsistent with the ID number, but not requested
+    reader = RoiReader(min_confidence=0.85)
+    crops = []
+
+    def _recognize(batch):
+        crops.extend(batch)
+        return _recognizer(texts)(batch)
+
+    detections = reader.read(_FakeCard(), "front", _recognize, fields=("name", "id_number"))
+
+    assert detections is not None
+    assert sorted(crops) == [(43, 145), (421, 273)]
+    assert [text for _, (text, _) in detections[0]] == ["姓名张三", "公民身份号码110101199001011237"]
+
+
+def test_field_bands_cover_requested_rows():
+    bands = field_bands("front", ["id_number"])
+
+    assert len(bands) == 1
+    top, bottom = bands[0]
+    assert top < 0.78 < 0.92 < bottom
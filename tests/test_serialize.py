@@ -0,0 +1,59 @@
+import json
+
+from idcard_ocr.api import serialize
+from idcard_ocr.api.serialize import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    encode_payload,
+    negotiate_media_type,
+    result_payload,
+)
+from idcard_ocr.inference.models import (
+    BackSideResult,
+    FieldResult,
+    FrontSideResult,
+    IdCardResult,
+    ProcessingInfo,
+    SideProcessingInfo,
+)
+from idcard_ocr.schemas.idcard import IdCardResponseSchema
+
+
+def _result() -> IdCardResult:
+    empty = FieldResult(None, None)
+    return IdCardResult(
+        front=FrontSideResult(FieldResult("张三", 0.99), empty, empty, empty, empty, FieldResult("1101", 0.9)),
+        back=BackSideResult(empty, FieldResult("2010.01.01-2030.01.01", 0.8)),
+        processing=ProcessingInfo(
+            front=SideProcessingInfo(scale=0.5, card_localized=True, field_tiers={"name": "fast"}),
+            back=SideProcessingInfo(path="roi"),
+            side_source="labels",
+        ),
+    )
+
+
+def test_result_payload_matches_response_schema():
+    payload = result_payload(_result(), ["姓名张三"], ["有效期限"])
+
+    assert payload == IdCardResponseSchema.model_validate(payload).model_dump(mode="json")
+    assert json.loads(encode_payload(payload, JSON_MEDIA_TYPE)) == payload
+
+
+def test_result_payload_leaves_out_unrequested_fields_and_raw_text():
+    payload = result_payload(_result(), ["姓名张三"], [], selected=frozenset({"name"}), raw_text=False)
+
+    assert payload["front"] == {"name": {"value": "张三", "confidence": 0.99}}
+    assert "back" not in payload
+    assert payload["raw_text"] == {}
+    IdCardResponseSchema.model_validate(payload)
+
+
+def test_negotiate_media_type_prefers_msgpack_only_when_available(monkeypatch):
+    monkeypatch.setattr(serialize, "_msgpack", lambda: None)
+    assert negotiate_media_type("application/msgpack") == JSON_MEDIA_TYPE
+
+    monkeypatch.setattr(serialize, "_msgpack", lambda: object())
+    assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("application/x-msgpack") == MSGPACK_MEDIA_TYPE
+    assert negotiate_media_type("application/json, application/msgpack;q=0.5") == JSON_MEDIA_TYPE
+    assert negotiate_media_type("application/msgpack, */*;q=0.1") == MSGPACK_MEDIA_TYPE
@@ -0,0 +1,78 @@
+import threading
+from importlib import import_module
+
+import pytest
+
+from idcard_ocr.inference.models import SideOcrOutput, SideProcessingInfo
+from idcard_ocr.inference.service import analyze_id_card
+
+
+def _detection(text: str, score: float = 0.9):
+    return [[[0, 0], [1, 0], [1, 1], [0, 1]], (text, score)]
+
+
+def test_analyze_id_card_processes_both_sides_concurrently(monkeypatch):
+    barrier = threading.Barrier(2, timeout=5)
+    outputs = {
+        b"front": [_detection("姓名张三")],
+        b"back": [_detection("签发机关北京市公安局")],
+    }
+
+    def _fake_ocr_side(image_bytes: bytes, side: str):
+        # Both sides must be in flight at the same time to pass the barrier.
+        barrier.wait()
+        return SideOcrOutput(outputs[image_bytes], SideProcessingInfo(card_localized=image_bytes == b"front"))
+
+    service_module = import_module("idcard_ocr.inference.service")
+    monkeypatch.setattr(service_module, "ocr_side", _fake_ocr_side)
+
+    result, front_text, back_text = analyze_id_card(b"front", b"back")
+
+    assert result.front.name.value == "张三"
+    assert result.back.issuing_authority.value == "北京市公安局"
+    assert front_text == ["姓名张三"]
+    assert back_text == ["签发机关北京市公安局"]
+    assert result.processing.front.card_localized is True
+    assert result.processing.back.card_localized is False
+
+
+def test_analyze_id_card_skips_sides_without_requested_fields(monkeypatch):
+    calls = []
+
+    def _fake_ocr_side(image_bytes: bytes, side: str, fields=None):
+        calls.append((side, fields))
+        return SideOcrOutput([_detection("姓名张三"), _detection("性别男")], SideProcessingInfo(path="partial"))
+
+    monkeypatch.setattr(import_module("idcard_ocr.inference.service"), "ocr_side", _fake_ocr_side)
+
+    result, front_text, back_text = analyze_id_card(b"front", None, fields=["name"])
+
+    assert calls == [("front", ("name",))]
+    assert result.front.name.value == "张三"
+    assert result.front.gender.value is None
+    assert back_text == []
+    assert result.processing.back.path == "skipped"
+    with pytest.raises(ValueError, match="back_image"):
+        analyze_id_card(b"front", None, fields=["valid_period"])
+
+
+def test_analyze_id_card_swaps_sides_by_recognized_labels(monkeypatch):
+    outputs = {
+        b"first": [_detection("签发机关北京市公安局"), _detection("有效期限2010.01.01-2030.01.01")],
+        b"second": [_detection("姓名张三"), _detection("性别男")],
+    }
+
+    def _fake_ocr_side(image_bytes: bytes, side: str):
+        return SideOcrOutput(outputs[image_bytes], SideProcessingInfo())
+
+    monkeypatch.setattr(import_module("idcard_ocr.inference.service"), "ocr_side", _fake_ocr_side)
+
+    result, front_text, _ = analyze_id_card(b"first", b"second", detect_sides=True)
+
+    assert result.front.name.value == "张三"
+    assert result.back.issuing_authority.value == "北京市公安局"
+    assert front_text == ["姓名张三", "性别男"]
+    assert result.processing.side_source == "labels"
+
+    result, _, _ = analyze_id_card(b"first", b"second", detect_sides=False)
+    assert result.front.name.value is None
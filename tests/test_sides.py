@@ -0,0 +1,65 @@
+from io import BytesIO
+
+import pytest
+
+np = pytest.importorskip("numpy")
+if not hasattr(np, "ndarray"):
+    pytest.skip("requires real numpy (set IDCARD_OCR_REAL_NUMPY=1)", allow_module_level=True)
+pytest.importorskip("cv2")
+
+from PIL import Image  # noqa: E402
+
+from idcard_ocr.bench.synthetic import generate_cards  # noqa: E402
+from idcard_ocr.inference.sides import (  # noqa: E402
+    BACK,
+    FRONT,
+    CardSplitError,
+    classify_side,
+    split_card_photo,
+)
+
+
+def _jpeg(image: Image.Image) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def _card_only(photo: bytes) -> Image.Image:
+    # Synthetic photos centre an 80% scale card on a dark background.
+    image = Image.open(BytesIO(photo))
+    width, height = image.size
+    card_width, card_height = int(width * 0.8), int(width * 0.8 * 540 / 856)
+    left, top = (width - card_width) // 2, (height - card_height) // 2
+    return image.crop((left, top, left + card_width, top + card_height))
+
+
+def test_classify_side_finds_the_emblem():
+    card = generate_cards(1, photo_size=(800, 600))[0]
+    upside_down = _jpeg(Image.open(BytesIO(card.back)).rotate(180))
+    greyscale = _jpeg(Image.open(BytesIO(card.back)).convert("L").convert("RGB"))
+
+    assert classify_side(card.front) == FRONT
+    assert classify_side(card.back) == BACK
+    assert classify_side(upside_down) == BACK
+    assert classify_side(greyscale) is None
+    assert classify_side(b"not an image") is None
+
+
+def test_split_card_photo_returns_both_cards_in_reading_order():
+    card = generate_cards(1, photo_size=(800, 600))[0]
+    page = Image.new("RGB", (1500, 600), (40, 40, 40))
+    page.paste(_card_only(card.back), (40, 80))
+    page.paste(_card_only(card.front), (780, 80))
+
+    first, second = split_card_photo(_jpeg(page))
+
+    assert classify_side(first) == BACK
+    assert classify_side(second) == FRONT
+
+
+def test_split_card_photo_rejects_a_single_card():
+    card = generate_cards(1, photo_size=(800, 600))[0]
+
+    with pytest.raises(CardSplitError):
+        split_card_photo(card.front)
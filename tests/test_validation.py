@@ -0,0 +1,28 @@
+from idcard_ocr.inference.validation import (
+    birth_date_from_id_number,
+    gender_from_id_number,
+    is_valid_id_number,
+    is_valid_period,
+)
+
+
+def test_id_number_check_code():
+    assert is_valid_id_number("11010519491231002X")
+    assert is_valid_id_number("11010519491231002x")
+    assert is_valid_id_number("110101199001011237")
+    assert not is_valid_id_number("110101199001011234")
+    assert not is_valid_id_number("11010119900101123")
+    assert not is_valid_id_number(None)
+
+
+def test_id_number_embedded_birth_date_and_gender():
+    assert birth_date_from_id_number("110101199001011237") == "1990-01-01"
+    assert gender_from_id_number("110101199001011237") == "男"
+    assert gender_from_id_number("11010519491231002X") == "女"
+
+
+def test_validity_period_format():
+    assert is_valid_period("2010.01.01-2030.01.01")
+    assert is_valid_period("2015.06.30-长期")
+    assert not is_valid_period("2010.01.01")
+    assert not is_valid_period(None)
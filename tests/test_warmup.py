@@ -0,0 +1,68 @@
+from importlib import import_module
+
+from fastapi.testclient import TestClient
+
+from idcard_ocr.api.app import app
+from idcard_ocr.inference.engine import EnginePool
+from idcard_ocr.inference.warmup import WarmupState, get_warmup_state, warmup_enabled
+
+
+def test_checkout_all_builds_every_engine_and_returns_them():
+    pool = EnginePool(3, object)
+
+    with pool.checkout_all() as engines:
+        assert len({id(engine) for engine in engines}) == 3
+        assert pool.stats()["busy"] == 3
+
+    stats = pool.stats()
+    assert stats["built"] == 3
+    assert stats["idle"] == 3
+
+
+def test_warmup_state_records_durations_and_failures():
+    warmed = []
+    state = WarmupState()
+    state.run(lambda: "pool", warmed.append)
+
+    snapshot = state.snapshot()
+    assert state.ready
+    assert warmed == ["pool"]
+    assert snapshot["load_seconds"] is not None and snapshot["warmup_seconds"] is not None
+
+    def _fail():
+        raise RuntimeError("model files missing")
+
+    failed = WarmupState()
+    failed.run(_fail, warmed.append)
+    assert failed.snapshot()["status"] == "failed"
+    assert failed.snapshot()["error"] == "model files missing"
+
+
+def test_ready_endpoint_reports_503_until_warm(monkeypatch):
+    client = TestClient(app)
+    state = WarmupState()
+    monkeypatch.setattr(import_module("idcard_ocr.api.app"), "get_warmup_state", lambda: state)
+
+    pending = client.get("/ready")
+    state.mark_ready()
+    ready = client.get("/ready")
+
+    assert pending.status_code == 503
+    assert pending.json()["status"] == "pending"
+    assert ready.status_code == 200
+    assert ready.json()["status"] == "ready"
+    assert client.get("/health").status_code == 200
+
+
+def test_lifespan_marks_ready_when_warmup_is_disabled(monkeypatch):
+    monkeypatch.setenv("IDCARD_OCR_WARMUP", "0")
+    warmup_enabled.cache_clear()
+    get_warmup_state.cache_clear()
+    try:
+        with TestClient(app) as client:
+            response = client.get("/ready")
+    finally:
+        warmup_enabled.cache_clear()
+        get_warmup_state.cache_clear()
+
+    assert response.status_code == 200